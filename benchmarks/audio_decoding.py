@@ -0,0 +1,83 @@
+"""Measure per-request decoding overhead: ffmpeg subprocess vs in-process.
+
+Usage:
+    python -m benchmarks.audio_decoding [--repeats 20] [file ...]
+
+Without files, a synthetic 3 second command is written as WAV, FLAC and
+Opus. For each file the script times the ``ffmpeg`` subprocess that
+openai-whisper starts for a path (fork/exec, pipe and parsing of its
+output) against ``load_audio``, which reads WAV with NumPy and decodes
+other formats with PyAV in this process.
+"""
+import argparse
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.audio_transport import synthetic_speech
+from src.frontend.audio import encode_audio, SAMPLE_RATE
+from src.voice.codecs import load_audio
+
+
+def ffmpeg_decode(path: str) -> np.ndarray:
+    """Decode the way whisper.audio.load_audio does."""
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def time_ms(fn, path: str, repeats: int) -> float:
+    fn(path)  # warm up the page cache and lazy imports
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(path)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def synthetic_files(directory: Path):
+    samples = synthetic_speech(3.0)
+    wav = directory / "command.wav"
+    with wave.open(str(wav), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(samples.tobytes())
+    paths = [wav]
+    for fmt, suffix in (("flac", ".flac"), ("opus", ".ogg")):
+        path = directory / f"command{suffix}"
+        path.write_bytes(encode_audio(samples, fmt))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    if not have_ffmpeg:
+        print("ffmpeg not found on PATH; only in-process decoding is timed\n")
+
+    with tempfile.TemporaryDirectory() as td:
+        paths = [Path(p) for p in args.files] or synthetic_files(Path(td))
+        print(f"{'file':<24}{'decoder':>9}{'ffmpeg ms':>11}{'in-proc ms':>12}{'speedup':>9}")
+        for path in paths:
+            _, decoder = load_audio(str(path))
+            inproc = time_ms(load_audio, str(path), args.repeats)
+            if have_ffmpeg:
+                subproc = time_ms(ffmpeg_decode, str(path), args.repeats)
+                print(f"{path.name:<24}{decoder:>9}{subproc:>11.2f}{inproc:>12.2f}{subproc / inproc:>8.1f}x")
+            else:
+                print(f"{path.name:<24}{decoder:>9}{'-':>11}{inproc:>12.2f}{'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
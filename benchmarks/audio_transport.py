@@ -0,0 +1,57 @@
+"""Measure upload size and codec cost of WAV vs FLAC vs Opus transport.
+
+Usage:
+    python -m benchmarks.audio_transport [file.wav ...]
+
+Without arguments a synthetic 5 second speech-like signal is used.
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import load_wav
+from src.frontend.audio import encode_audio, ENCODINGS, SAMPLE_RATE
+from src.voice.codecs import decode_to_pcm
+
+
+def synthetic_speech(seconds: float = 5.0) -> np.ndarray:
+    """Amplitude-modulated harmonics with pauses and a little noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    voiced = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((140, 280, 420, 560), start=1))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.3 * t) > -0.5)
+    signal = voiced * syllables * 6000 + rng.normal(0, 60, len(t))
+    return signal.astype(np.int16)
+
+
+def measure(samples: np.ndarray, repeats: int = 5):
+    wav_bytes = samples.nbytes + 44
+    print(f"{'format':<8}{'bytes':>10}{'vs WAV':>9}{'encode ms':>11}{'decode ms':>11}")
+    print(f"{'wav':<8}{wav_bytes:>10}{1:>9.0%}{0:>11.2f}{0:>11.2f}")
+    for fmt in ENCODINGS:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            data = encode_audio(samples, fmt)
+        encode_ms = (time.perf_counter() - start) / repeats * 1000
+        
+        start = time.perf_counter()
+        for _ in range(repeats):
+            decode_to_pcm(data, SAMPLE_RATE)
+        decode_ms = (time.perf_counter() - start) / repeats * 1000
+        
+        print(f"{fmt:<8}{len(data):>10}{len(data) / wav_bytes:>9.0%}{encode_ms:>11.2f}{decode_ms:>11.2f}")
+
+
+def main(paths):
+    if not paths:
+        print("synthetic speech, 5.0s")
+        measure(synthetic_speech())
+    for path in paths:
+        samples = load_wav(path)
+        print(f"{path}, {len(samples) / SAMPLE_RATE:.1f}s")
+        measure(samples)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
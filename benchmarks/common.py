@@ -0,0 +1,63 @@
+"""Helpers shared by the benchmark scripts."""
+import re
+import resource
+import sys
+import wave
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def load_wav(path: str | Path) -> np.ndarray:
+    """Load 16kHz mono 16-bit WAV as int16 samples."""
+    with wave.open(str(path), 'rb') as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+            raise ValueError(f"{path}: expected 16kHz mono 16-bit WAV")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+
+def audio_duration(path: str | Path) -> float:
+    with wave.open(str(path), 'rb') as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def load_dataset(data_dir: str | Path) -> List[Tuple[Path, Optional[str]]]:
+    """Return (audio path, reference transcript) pairs.
+
+    References are read from a ``.txt`` file next to each ``.wav`` file and
+    are None when missing.
+    """
+    pairs = []
+    for path in sorted(Path(data_dir).glob("*.wav")):
+        reference = path.with_suffix(".txt")
+        pairs.append((path, reference.read_text().strip() if reference.exists() else None))
+    if not pairs:
+        raise SystemExit(f"No .wav files found in {data_dir}")
+    return pairs
+
+
+def normalize_text(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(references: List[str], hypotheses: List[str]) -> float:
+    """Corpus-level WER: word edit distance over total reference words."""
+    errors = words = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+        row = list(range(len(hyp) + 1))
+        for i, r in enumerate(ref, start=1):
+            prev, row[0] = row[0], i
+            for j, h in enumerate(hyp, start=1):
+                prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+        errors += row[-1]
+        words += len(ref)
+    return errors / max(words, 1)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
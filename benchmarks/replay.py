@@ -0,0 +1,293 @@
+"""Replay recorded production traffic through the API with local stand-ins.
+
+Usage:
+    python -m benchmarks.replay RECORDING --out RUN.jsonl [--baseline BASELINE.jsonl]
+        [--audio-dir DIR] [--provider-latency recorded|zero] [--concurrency 1]
+        [--tolerance 0.10]
+
+RECORDING is a file written with CLAWD_RECORD_FILE set. Every request is
+sent through the real FastAPI app, including its middleware, admission
+control, command parsing, execution and history, in the recorded mix of
+routes, command lengths, audio formats and actions. Whisper, Claude and
+the system actions are replaced by stand-ins that wait as long as the
+recorded calls took (or not at all with ``--provider-latency zero``) and
+never touch the network or the desktop. Streamed uploads are replayed as
+single uploads.
+
+Audio kept with CLAWD_RECORD_AUDIO_DIR is found by hash in ``--audio-dir``.
+Otherwise synthetic audio of the recorded format and duration is used.
+
+The replay is itself recorded to RUN.jsonl. With ``--baseline`` (an earlier
+RUN.jsonl), per-stage p50 and p95 are compared and the script exits
+non-zero on a regression.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import wave
+from contextvars import ContextVar
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from benchmarks.audio_transport import synthetic_speech
+from src.frontend.audio import encode_audio, SAMPLE_RATE
+
+_replaying: ContextVar[Optional[Dict[str, Any]]] = ContextVar("replaying", default=None)
+PROVIDER_LATENCY = {"scale": 1.0}
+
+
+def configure_environment(out: str, workdir: str):
+    """Point the app at the replay output and keep it away from real state."""
+    os.environ["CLAWD_RECORD_FILE"] = out
+    os.environ["CLAWD_RECORD_SAMPLE"] = "1"
+    os.environ.pop("CLAWD_RECORD_AUDIO_DIR", None)
+    os.environ["CLAWD_HISTORY_DB"] = str(Path(workdir) / "history.db")
+    os.environ["CLAWD_TRACE_EXPORTER"] = "none"
+    os.environ["CLAWD_INTENT_MODE"] = "tool"
+    os.environ["CLAWD_RATE_PER_MINUTE"] = "1000000000"
+    os.environ["CLAWD_RATE_BURST"] = "1000000000"
+    os.environ.setdefault("CLAWD_LOG_LEVEL", "WARNING")
+    # Provider clients are built but never called
+    os.environ.setdefault("OPENAI_API_KEY", "replay")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "replay")
+
+
+def span_ms(record: Dict[str, Any], *names: str) -> float:
+    for name in names:
+        if name in record["spans"]:
+            return record["spans"][name]["ms"]
+    return 0.0
+
+
+async def wait(ms: float):
+    await asyncio.sleep(ms * PROVIDER_LATENCY["scale"] / 1000)
+
+
+def stt_ms(record: Dict[str, Any]) -> float:
+    api = span_ms(record, "openai.transcription")
+    if api:
+        return api
+    stage = record["spans"].get("transcription", {})
+    return max(stage.get("ms", 0.0) - stage.get("queue_wait_ms", 0.0), 0.0)
+
+
+def recorded_intent(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    actions = record.get("actions") or []
+    if not actions:
+        return {"action": "none", "params": "", "summary": "replay"}
+    steps = [
+        {"action": a["action"], "params": "x" * max(a["chars"], 1),
+         "search_content": a.get("content", False), "after_previous": bool(a["depends_on"])}
+        for a in actions
+    ]
+    return {**steps[0], "summary": "replay", "steps": steps}
+
+
+def install_stand_ins(voice, agent_module):
+    """Replace providers and system actions with recorded-latency stand-ins."""
+    from src.core.tracing import add_attributes
+
+    async def transcribe(audio_path, profile=None):
+        record = _replaying.get()
+        # Keeps the replay run itself replayable
+        add_attributes(audio_seconds=record["spans"].get("transcription", {}).get("audio_seconds"))
+        await wait(stt_ms(record))
+        return "x" * max(record.get("chars", 0), 1)
+
+    async def tool_call(prompt, tool, **kwargs):
+        record = _replaying.get()
+        await wait(span_ms(record, "anthropic.tool_call", "anthropic.messages"))
+        return recorded_intent(record)
+
+    async def response(prompt, **kwargs):
+        await wait(span_ms(_replaying.get(), "anthropic.messages"))
+        return "replay"
+
+    def system_action(span_name, action, result):
+        def run(*args, **kwargs):
+            record = _replaying.get()
+            count = sum(a["action"] == action for a in record.get("actions", [])) or 1
+            # Runs in a worker thread, like the real action
+            time.sleep(span_ms(record, span_name) / count * PROVIDER_LATENCY["scale"] / 1000)
+            return result
+        return run
+
+    voice.whisper_handler.transcribe = transcribe
+    voice.ai_services.get_claude_tool_call = tool_call
+    voice.ai_services.get_claude_response = response
+    system = voice.computer_agent.system
+    system.open_application = system_action("system.open_application", "open_app", True)
+    system.search_files = system_action("system.search_files", "search_files", [])
+    system.create_note = system_action("system.create_note", "create_note", Path("replay-note.txt"))
+    agent_module.webbrowser = SimpleNamespace(open=lambda url: True)
+
+
+def audio_upload(record: Dict[str, Any], audio_dir: Optional[Path], cache: Dict) -> tuple:
+    """(filename, bytes) of the recorded audio, or synthetic audio like it."""
+    audio = record.get("audio") or {"format": "wav"}
+    fmt = audio.get("format") or "wav"
+    if audio_dir is not None and audio.get("sha256"):
+        kept = audio_dir / f"{audio['sha256']}.{fmt}"
+        if kept.exists():
+            return kept.name, kept.read_bytes()
+
+    seconds = record["spans"].get("transcription", {}).get("audio_seconds") or 3.0
+    key = (fmt, round(seconds, 1))
+    if key not in cache:
+        samples = synthetic_speech(seconds)
+        if fmt == "flac":
+            cache[key] = ("replay.flac", encode_audio(samples, "flac"))
+        elif fmt in ("ogg", "opus", "webm"):
+            cache[key] = ("replay.ogg", encode_audio(samples, "opus"))
+        else:
+            with tempfile.NamedTemporaryFile(suffix=".wav") as f:
+                with wave.open(f.name, "wb") as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(SAMPLE_RATE)
+                    wf.writeframes(samples.tobytes())
+                cache[key] = ("replay.wav", Path(f.name).read_bytes())
+    return cache[key]
+
+
+async def replay(records, app, audio_dir: Optional[Path], concurrency: int):
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    audio_cache: Dict = {}
+
+    async def send(client, record):
+        async with semaphore:
+            _replaying.set(record)
+            if record["route"] == "text":
+                return await client.post(
+                    "/voice/process-text", json={"command": "x" * max(record.get("chars", 0), 1)}
+                )
+            filename, data = audio_upload(record, audio_dir, audio_cache)
+            return await client.post("/voice/process-voice", files={"audio_file": (filename, data)})
+
+    async with httpx.AsyncClient(app=app, base_url="http://replay", timeout=None) as client:
+        responses = await asyncio.gather(*(send(client, record) for record in records))
+    return [response.status_code for response in responses]
+
+
+# Pipeline stages compared between runs, in request order
+STAGES = ("transcription", "interpretation", "execution", "history.record")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def stage_latencies(recordings: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Per-stage latency percentiles in ms, plus "total" for whole requests."""
+    samples: Dict[str, List[float]] = {"total": [r["total_ms"] for r in recordings]}
+    for stage in STAGES:
+        values = [r["spans"][stage]["ms"] for r in recordings if stage in r["spans"]]
+        if values:
+            samples[stage] = values
+    return {
+        stage: {
+            "n": len(values),
+            "p50": round(_percentile(values, 0.5), 3),
+            "p95": round(_percentile(values, 0.95), 3),
+            "mean": round(sum(values) / len(values), 3),
+        }
+        for stage, values in samples.items() if values
+    }
+
+
+def compare_latencies(
+    baseline: Dict[str, Dict[str, float]],
+    current: Dict[str, Dict[str, float]],
+    tolerance: float = 0.10,
+    min_ms: float = 2.0
+) -> List[Dict[str, Any]]:
+    """Compare stage percentiles of two runs.
+
+    A stage regresses when its p50 or p95 grew by more than ``tolerance``
+    (relative) and more than ``min_ms``, so noise on sub-millisecond stages
+    is ignored.
+    """
+    rows = []
+    for stage, now in current.items():
+        before = baseline.get(stage)
+        if before is None:
+            continue
+        row = {"stage": stage, "regressed": False}
+        for key in ("p50", "p95"):
+            delta = now[key] - before[key]
+            row[key] = (before[key], now[key])
+            if delta > min_ms and delta > tolerance * before[key]:
+                row["regressed"] = True
+        rows.append(row)
+    return rows
+
+
+def print_latencies(title: str, latencies: Dict[str, Dict[str, float]]):
+    print(title)
+    print(f"  {'stage':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for stage, row in latencies.items():
+        print(f"  {stage:<16}{row['n']:>6}{row['p50']:>10.1f}{row['p95']:>10.1f}{row['mean']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--out", required=True, help="Where to record the replay run")
+    parser.add_argument("--baseline", help="Earlier replay run to compare with")
+    parser.add_argument("--audio-dir", help="Directory of audio kept by the recorder")
+    parser.add_argument("--provider-latency", choices=["recorded", "zero"], default="recorded")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative p50/p95 increase per stage counted as a regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="clawd-replay-")
+    if os.path.exists(args.out):
+        os.unlink(args.out)
+    configure_environment(args.out, workdir)
+    PROVIDER_LATENCY["scale"] = 1.0 if args.provider_latency == "recorded" else 0.0
+
+    # Imported only now so the services pick up the replay environment
+    from src.api.main import app
+    from src.api.routes import voice
+    from src.core import agent as agent_module
+    from src.core.recording import load_recordings, recorder
+
+    records = load_recordings(args.recording)
+    install_stand_ins(voice, agent_module)
+    audio_dir = Path(args.audio_dir) if args.audio_dir else None
+    statuses = asyncio.run(replay(records, app, audio_dir, args.concurrency))
+    recorder.flush()
+
+    routes = {route: sum(r["route"] == route for r in records) for route in ("text", "voice", "stream")}
+    print(f"Replayed {len(records)} requests ({routes}), provider latency {args.provider_latency}")
+    failed = [status for status in statuses if status >= 400]
+    if failed:
+        print(f"{len(failed)} requests failed: {sorted(set(failed))}")
+
+    current = stage_latencies(load_recordings(args.out))
+    print_latencies(f"\n{args.out}", current)
+    if not args.baseline:
+        return
+
+    baseline = stage_latencies(load_recordings(args.baseline))
+    rows = compare_latencies(baseline, current, tolerance=args.tolerance)
+    print(f"\nvs {args.baseline}")
+    print(f"  {'stage':<16}{'p50 ms':>18}{'p95 ms':>18}")
+    for row in rows:
+        p50 = f"{row['p50'][0]:.1f} -> {row['p50'][1]:.1f}"
+        p95 = f"{row['p95'][0]:.1f} -> {row['p95'][1]:.1f}"
+        print(f"  {row['stage']:<16}{p50:>18}{p95:>18}{'  REGRESSED' if row['regressed'] else ''}")
+    if any(row["regressed"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
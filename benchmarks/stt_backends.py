@@ -0,0 +1,84 @@
+"""Compare local STT backends on real-time factor, memory and word error rate.
+
+Usage:
+    python -m benchmarks.stt_backends DATA_DIR [--backends openai-whisper faster-whisper]
+        [--model base.en] [--compute-type int8] [--wer-tolerance 0.02]
+
+DATA_DIR holds 16kHz mono WAV files with optional ``.txt`` reference
+transcripts of the same name. Each backend runs in a fresh process so that
+load time and peak memory are measured in isolation. The first backend is
+the baseline; the script exits non-zero if another backend's WER exceeds
+the baseline's by more than the tolerance.
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from benchmarks.common import load_dataset, audio_duration, word_error_rate, peak_rss_mb
+
+
+def run_backend(backend_name, model_name, compute_type, paths, queue):
+    from src.voice.backends import create_backend
+    
+    start = time.perf_counter()
+    backend = create_backend(backend_name, model_name, compute_type=compute_type)
+    load_seconds = time.perf_counter() - start
+    
+    # Warm up caches and lazy initialisation before timing
+    backend.transcribe(paths[0])
+    
+    texts, seconds = [], []
+    for path in paths:
+        start = time.perf_counter()
+        texts.append(backend.transcribe(path).text)
+        seconds.append(time.perf_counter() - start)
+    queue.put({"load_seconds": load_seconds, "texts": texts, "seconds": seconds, "peak_rss_mb": peak_rss_mb()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir")
+    parser.add_argument("--backends", nargs="+", default=["openai-whisper", "faster-whisper"])
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--wer-tolerance", type=float, default=0.02,
+                        help="Maximum absolute WER increase over the first backend")
+    args = parser.parse_args()
+    
+    dataset = load_dataset(args.data_dir)
+    paths = [str(path) for path, _ in dataset]
+    references = [reference for _, reference in dataset]
+    total_audio = sum(audio_duration(path) for path in paths)
+    print(f"{len(paths)} files, {total_audio:.1f}s of audio, model {args.model}\n")
+    
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in args.backends:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_backend, args=(name, args.model, args.compute_type, paths, queue))
+        process.start()
+        results[name] = queue.get()
+        process.join()
+    
+    print(f"{'backend':<16}{'load s':>8}{'RTF':>8}{'p50 ms':>9}{'peak MB':>9}{'WER':>8}")
+    baseline_wer = None
+    failed = False
+    for name, result in results.items():
+        seconds = sorted(result["seconds"])
+        rtf = sum(seconds) / total_audio
+        scored = [(r, t) for r, t in zip(references, result["texts"]) if r is not None]
+        wer = word_error_rate(*zip(*scored)) if scored else float("nan")
+        print(f"{name:<16}{result['load_seconds']:>8.1f}{rtf:>8.3f}{seconds[len(seconds) // 2] * 1000:>9.0f}"
+              f"{result['peak_rss_mb']:>9.0f}{wer:>8.1%}")
+        if baseline_wer is None:
+            baseline_wer = wer
+        elif wer - baseline_wer > args.wer_tolerance:
+            print(f"  WER {wer:.1%} exceeds baseline {baseline_wer:.1%} by more than {args.wer_tolerance:.1%}")
+            failed = True
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
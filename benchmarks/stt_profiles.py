@@ -0,0 +1,59 @@
+"""Compare Whisper decode profiles on latency and word error rate.
+
+Usage:
+    python -m benchmarks.stt_profiles DATA_DIR [--backend faster-whisper]
+        [--model base.en] [--compute-type int8] [--profiles command dictation accurate]
+
+DATA_DIR holds 16kHz mono WAV files with optional ``.txt`` reference transcripts of
+the same name. Audio is decoded once up front, so only decoding by the
+model is timed. All profiles share one loaded model; each is warmed up on
+the first file before timing. Short command recordings are where the
+"command" profile should win: no language detection, no beam search, no
+temperature fallback and no timestamp tokens.
+"""
+import argparse
+import time
+
+from benchmarks.common import load_dataset, audio_duration, word_error_rate
+from src.voice.backends import create_backend
+from src.voice.codecs import load_audio
+from src.voice.profiles import PROFILES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir")
+    parser.add_argument("--backend", default="faster-whisper")
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data_dir)
+    references = [reference for _, reference in dataset]
+    audio = [load_audio(str(path))[0] for path, _ in dataset]
+    total_audio = sum(audio_duration(str(path)) for path, _ in dataset)
+    print(f"{len(audio)} files, {total_audio:.1f}s of audio, {args.backend} {args.model}\n")
+
+    backend = create_backend(args.backend, args.model, compute_type=args.compute_type)
+
+    print(f"{'profile':<12}{'mean ms':>9}{'p50 ms':>9}{'RTF':>8}{'WER':>8}")
+    for name in args.profiles:
+        options = PROFILES[name].options()
+        backend.transcribe(audio[0], **options)
+
+        texts, seconds = [], []
+        for samples in audio:
+            start = time.perf_counter()
+            texts.append(backend.transcribe(samples, **options).text)
+            seconds.append(time.perf_counter() - start)
+
+        ordered = sorted(seconds)
+        scored = [(r, t) for r, t in zip(references, texts) if r is not None]
+        wer = word_error_rate(*zip(*scored)) if scored else float("nan")
+        print(f"{name:<12}{sum(seconds) / len(seconds) * 1000:>9.0f}{ordered[len(ordered) // 2] * 1000:>9.0f}"
+              f"{sum(seconds) / total_audio:>8.3f}{wer:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from src.core.tracing import add_attributes
+
+# Load environment variables
+load_dotenv()
+
+
+class Overloaded(HTTPException):
+    """Raised when a stage's concurrency cap and wait queue are both full"""
+
+    def __init__(self, stage: str, retry_after: float):
+        self.stage = stage
+        self.retry_after = retry_after
+        super().__init__(
+            503,
+            f"Server busy ({stage}), retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+def client_id(scope, trusted_proxies: Iterable[str] = ()) -> str:
+    """Peer address of a request, or the ``X-Client-ID`` a trusted proxy sent."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if peer in trusted_proxies:
+        for name, value in scope.get("headers", []):
+            if name == b"x-client-id":
+                return value.decode("latin-1")
+    return peer
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``burst`` saved."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take a token if one is available.
+
+        Returns:
+            (admitted, seconds until a token is available)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """Per-client token buckets, forgetting the least recently seen clients."""
+
+    def __init__(self, rate_per_minute: float, burst: float, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def try_acquire(self, client: str) -> Tuple[bool, float]:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.try_acquire()
+
+
+class StageLimiter:
+    """Concurrency cap for one pipeline stage with a bounded wait queue.
+
+    Up to ``limit`` requests run the stage at once and up to ``max_queue``
+    more wait in FIFO order. Anything beyond that is rejected immediately
+    with an estimate of when capacity frees up, instead of piling up memory
+    and provider calls.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        self._waiters: deque = deque()
+        self._avg_seconds = 1.0  # EWMA of time spent in the stage
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def is_full(self) -> bool:
+        return self.active >= self.limit and self.waiting >= self.max_queue
+
+    def retry_after(self) -> float:
+        """Rough time until a queued request would get a slot."""
+        return self._avg_seconds * (self.waiting + 1) / self.limit
+
+    @asynccontextmanager
+    async def slot(self):
+        queued = time.monotonic()
+        if self.active >= self.limit or self._waiters:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.name, self.retry_after())
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # Slot was handed over just as we were cancelled; pass it on
+                    self._release()
+                raise
+        else:
+            self.active += 1
+
+        start = time.monotonic()
+        add_attributes(queue_wait_ms=round((start - queued) * 1000, 3))
+        try:
+            yield
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - start)
+            self._release()
+
+    def _release(self):
+        # Hand the slot straight to the next waiter so it cannot be overtaken
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def summary(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """Per-client rate limits plus per-stage concurrency caps."""
+
+    def __init__(self, rate_per_minute: float, burst: float, stage_limits: Dict[str, int], max_queue: int):
+        self.clients = ClientRateLimiter(rate_per_minute, burst)
+        self.stages = {name: StageLimiter(name, limit, max_queue) for name, limit in stage_limits.items()}
+        self.rate_limited = 0
+
+    def stage(self, name: str):
+        """Async context manager holding a slot of the named stage."""
+        return self.stages[name].slot()
+
+    def summary(self) -> Dict:
+        return {
+            "rate_limited": self.rate_limited,
+            "stages": {name: stage.summary() for name, stage in self.stages.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that rejects expensive requests before doing any work.
+
+    Requests to ``paths`` are checked against the client's token bucket
+    (429 when empty) and against the first pipeline stage's queue (503 when
+    full), so an overloaded server answers without reading the upload. Both
+    responses carry Retry-After.
+
+    Clients are told apart by peer address. ``X-Client-ID`` is only
+    believed from a trusted proxy, since any other caller could send a new
+    one with every request and never run out of tokens.
+
+    Args:
+        controller: Shared AdmissionController
+        paths: Map of POST path to the first stage that path will enter
+        trusted_proxies: Peer addresses whose ``X-Client-ID`` names the
+            client they forward for
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        paths: Dict[str, Optional[str]],
+        trusted_proxies: Iterable[str] = ()
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        admitted, wait = self.controller.clients.try_acquire(self._client_id(scope))
+        if not admitted:
+            self.controller.rate_limited += 1
+            await self._reject(send, 429, "Too many requests", wait)
+            return
+
+        stage_name = self.paths[scope["path"]]
+        stage = self.controller.stages.get(stage_name) if stage_name else None
+        if stage is not None and stage.is_full():
+            stage.rejected += 1
+            await self._reject(send, 503, f"Server busy ({stage.name}), retry later", stage.retry_after())
+            return
+
+        await self.app(scope, receive, send)
+
+    def _client_id(self, scope) -> str:
+        return client_id(scope, self.trusted_proxies)
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Proxies whose X-Client-ID is believed, for rate limits and idempotency keys
+TRUSTED_PROXIES = frozenset(p.strip() for p in os.getenv("CLAWD_TRUSTED_PROXIES", "").split(",") if p.strip())
+
+admission = AdmissionController(
+    rate_per_minute=float(os.getenv("CLAWD_RATE_PER_MINUTE", "30")),
+    burst=float(os.getenv("CLAWD_RATE_BURST", "10")),
+    stage_limits={
+        "transcription": int(os.getenv("CLAWD_MAX_TRANSCRIPTIONS", "4")),
+        "interpretation": int(os.getenv("CLAWD_MAX_INTERPRETATIONS", "8")),
+        "execution": int(os.getenv("CLAWD_MAX_EXECUTIONS", "4")),
+    },
+    max_queue=int(os.getenv("CLAWD_ADMISSION_QUEUE", "16"))
+)
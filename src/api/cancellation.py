@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from src.core.cancellation import CancellationStats, CancelScope, current_scope, reset_scope, set_scope
+from src.core.tracing import add_attributes
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"x-request-timeout"
+# Nginx's status for a request the client gave up on; nobody reads it
+CLIENT_CLOSED = 499
+STATUS = {"disconnect": CLIENT_CLOSED, "deadline": 504}
+DETAIL = {"disconnect": "Client disconnected", "deadline": "Request deadline exceeded"}
+
+
+class RequestCancelled(HTTPException):
+    """Raised at a stage boundary once the client left or the deadline passed"""
+
+    def __init__(self, reason: str, stage: str):
+        self.reason = reason
+        self.stage = stage
+        super().__init__(STATUS[reason], f"{DETAIL[reason]} before {stage}")
+
+
+def checkpoint(stage: str):
+    """Mark the start of a pipeline stage of the current request.
+
+    Raises:
+        RequestCancelled: If the request was cancelled; the stage is not run
+    """
+    scope = current_scope()
+    if scope is None:
+        return
+    if scope.cancelled:
+        # None of this stage ran, so it counts as skipped even if it could
+        # not have been interrupted
+        scope.cancelled_in = stage
+        raise RequestCancelled(scope.reason, stage)
+    scope.enter(stage)
+
+
+class CancellationMiddleware:
+    """ASGI middleware that stops work nobody will read.
+
+    Each request to ``paths`` runs in its own task under a CancelScope with
+    a deadline: the client's ``X-Request-Timeout`` in seconds, capped at
+    ``max_timeout``, or ``default_timeout``. The task is cancelled when the
+    client disconnects or the deadline passes, which abandons the Whisper
+    and Claude calls in flight. Local transcription stops at its next
+    window with faster-whisper and the next chunk of long recordings;
+    openai-whisper only checks before it starts decoding. Commands that already started executing finish and are
+    recorded, with unstarted compound steps skipped. Cancelled requests are
+    answered with 499 (disconnect) or 504 (deadline), both of which release
+    their idempotency key.
+
+    Args:
+        stats: Shared CancellationStats
+        paths: Map of POST path pattern (fnmatch) to the first pipeline stage
+            that path will enter
+        default_timeout: Deadline in seconds when the client sends none
+        max_timeout: Longest deadline a client may ask for
+    """
+
+    def __init__(
+        self,
+        app,
+        stats: CancellationStats,
+        paths: Dict[str, Optional[str]],
+        default_timeout: float = 120.0,
+        max_timeout: float = 600.0
+    ):
+        self.app = app
+        self.stats = stats
+        self.paths = paths
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+
+    def _match(self, path: str):
+        for pattern, stage in self.paths.items():
+            if fnmatchcase(path, pattern):
+                return True, stage
+        return False, None
+
+    def _timeout(self, scope) -> float:
+        for name, value in scope.get("headers", []):
+            if name == HEADER:
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    break
+                if timeout > 0:
+                    return min(timeout, self.max_timeout)
+        return self.default_timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        matched, first_stage = self._match(scope["path"])
+        if not matched:
+            await self.app(scope, receive, send)
+            return
+
+        cancel_scope = CancelScope(time.monotonic() + self._timeout(scope), first_stage)
+        # Holds at most one message, so uploads are still read at the app's pace
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        response = {"started": False, "finished": False}
+
+        async def send_tracking(message):
+            if message["type"] == "http.response.start":
+                response["started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                response["finished"] = True
+            await send(message)
+
+        async def watch_client():
+            # Servers report a disconnect on the receive channel, which the
+            # app stops reading once it has the body
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect" and not response["finished"]:
+                    cancel_scope.cancel("disconnect")
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        token = set_scope(cancel_scope)
+        try:
+            task = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+        finally:
+            reset_scope(token)
+        cancel_scope.task = task
+        watcher = asyncio.create_task(watch_client())
+        try:
+            done, _ = await asyncio.wait({task}, timeout=max(cancel_scope.remaining(), 0))
+            if not done:
+                cancel_scope.cancel("deadline")
+                # Executing commands are left to finish
+                await asyncio.wait({task})
+        finally:
+            watcher.cancel()
+            if not task.done():
+                task.cancel()
+            self.stats.record(cancel_scope)
+
+        if cancel_scope.reason is not None:
+            logger.warning(
+                "Request to %s cancelled (%s) in %s; skipped %s",
+                scope["path"], cancel_scope.reason, cancel_scope.cancelled_in or "the upload",
+                ", ".join(cancel_scope.stages_skipped()) or f"{cancel_scope.steps_skipped} steps"
+            )
+            add_attributes(cancelled=cancel_scope.reason, cancelled_in=cancel_scope.cancelled_in)
+        if task.cancelled():
+            if not response["started"]:
+                reason = cancel_scope.reason or "disconnect"
+                await self._send(send, STATUS[reason], DETAIL[reason])
+            return
+        task.result()
+
+    @staticmethod
+    async def _send(send, status: int, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.api.admission import client_id
+from src.core.tracing import add_attributes
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+@dataclass
+class _Entry:
+    created: float
+    fingerprint: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    response: Optional[StoredResponse] = None
+
+
+class KeyReused(Exception):
+    """Raised when an idempotency key is sent again with a different body"""
+
+
+class IdempotencyStore:
+    """Bounded map of idempotency keys to the response of their first request.
+
+    A key is claimed by the first request to use it. Later requests with the
+    same key either get the stored response or, while the first is still
+    running, wait for it. Only final answers are stored: if the first request
+    fails with a retryable status or raises, the key is released and the
+    next waiter runs the request itself. A key is bound to the fingerprint
+    of its first request's body once that body has been read; reusing it for
+    another body is an error.
+
+    Args:
+        max_keys: Keys kept; the oldest finished ones are forgotten first
+        ttl: Seconds a stored response is replayed
+        max_body_bytes: Larger responses are not stored
+    """
+
+    def __init__(self, max_keys: int = 1000, ttl: float = 600.0, max_body_bytes: int = 256 * 1024):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.max_body_bytes = max_body_bytes
+        self.replayed = 0
+        self.waited = 0
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+
+    async def claim(self, key: Tuple, fingerprint: Optional[str] = None) -> Optional[StoredResponse]:
+        """Claim ``key``, or wait for and return the response stored under it.
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Hash of the request body, or None if it is not read
+                yet; see set_fingerprint
+
+        Returns:
+            None if the caller now owns the key and must run the request and
+            then call complete or release
+
+        Raises:
+            KeyReused: If the key was claimed for a different body
+        """
+        waited = False
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created > self.ttl and entry.done.is_set():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._entries[key] = _Entry(time.monotonic(), fingerprint)
+                self._evict()
+                return None
+            if entry.fingerprint is not None and fingerprint is not None and entry.fingerprint != fingerprint:
+                raise KeyReused()
+            if entry.done.is_set():
+                if entry.response is not None:
+                    self.replayed += 1
+                    return entry.response
+                # Released entries are removed before done is set
+                continue
+            if not waited:
+                waited = True
+                self.waited += 1
+            await entry.done.wait()
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._entries
+
+    def set_fingerprint(self, key: Tuple, fingerprint: str):
+        """Bind a key claimed without a fingerprint to its request body."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.fingerprint = fingerprint
+
+    def complete(self, key: Tuple, response: StoredResponse):
+        """Store the owner's response and wake requests waiting on the key."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if len(response.body) > self.max_body_bytes:
+            self.release(key)
+            return
+        entry.response = response
+        entry.done.set()
+
+    def release(self, key: Tuple):
+        """Forget the key without a response, so a retry runs the request again."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    def _evict(self):
+        # In-flight keys are kept; admission control bounds how many there are
+        excess = len(self._entries) - self.max_keys
+        for key in [k for k, e in self._entries.items() if e.done.is_set()][:max(excess, 0)]:
+            del self._entries[key]
+
+    def summary(self) -> Dict:
+        return {
+            "keys": len(self._entries),
+            "max_keys": self.max_keys,
+            "replayed": self.replayed,
+            "waited": self.waited,
+        }
+
+
+class _BodyHasher:
+    """Fingerprint of a request's query string and body, fed chunk by chunk.
+
+    Clients pick a new multipart boundary for every send of the same upload,
+    so the boundary is left out.
+    """
+
+    def __init__(self, scope, headers: Dict[bytes, bytes]):
+        self._hash = hashlib.sha256(scope.get("query_string", b"") + b"?")
+        content_type = headers.get(b"content-type", b"")
+        self._boundary = b""
+        if b"boundary=" in content_type:
+            self._boundary = content_type.split(b"boundary=", 1)[1].split(b";", 1)[0].strip(b'"')
+        # Tail that may be the start of a boundary split across chunks
+        self._pending = b""
+
+    def update(self, chunk: bytes):
+        if not self._boundary:
+            self._hash.update(chunk)
+            return
+        data = (self._pending + chunk).replace(self._boundary, b"")
+        keep = min(len(self._boundary) - 1, len(data))
+        self._hash.update(data[:len(data) - keep])
+        self._pending = data[len(data) - keep:]
+
+    def hexdigest(self) -> str:
+        self._hash.update(self._pending)
+        self._pending = b""
+        return self._hash.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware replaying responses for repeated ``Idempotency-Key`` POSTs.
+
+    Clients send a unique key with each command. A resend with the same key,
+    whether from a network retry or a Streamlit rerun, gets the first
+    response, marked with ``Idempotent-Replayed: true``, instead of
+    transcribing, interpreting and executing the command again. Keys are
+    scoped to the client and path, and a key resent with a different body is
+    rejected with 422. Requests without the header are untouched.
+
+    The body of a new key is hashed as the app reads it, so admission control
+    further in can still reject it unread. Only a resend of a known key is
+    read here, to compare it with the first request before replaying.
+
+    Args:
+        store: Shared IdempotencyStore
+        paths: POST paths or path prefixes (ending in "/") that honour the header
+        trusted_proxies: Peer addresses whose ``X-Client-ID`` names the
+            client, as for AdmissionMiddleware
+    """
+
+    # Transient failures the client should be able to retry with the same key
+    RETRYABLE = {408, 425, 429, 499, 500, 502, 503, 504}
+
+    def __init__(self, app, store: IdempotencyStore, paths: List[str], trusted_proxies: Iterable[str] = ()):
+        self.app = app
+        self.store = store
+        self.paths = paths
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    def _applies(self, path: str) -> bool:
+        return any(path.startswith(p) if p.endswith("/") else path == p for p in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self._applies(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        raw_key = headers.get(HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            body = json.dumps({"detail": "Invalid Idempotency-Key"}).encode()
+            await self._send(send, StoredResponse(400, [], body))
+            return
+
+        key = (client_id(scope, self.trusted_proxies), scope["path"], raw_key)
+        hasher = _BodyHasher(scope, headers)
+        fingerprint = None
+        body_read = False
+        if key in self.store:
+            # A resend: read it to check it matches the request it repeats,
+            # then hand the body to the app unchanged if it has to run
+            body = bytearray()
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                body.extend(message.get("body", b""))
+                more_body = message.get("more_body", False)
+            hasher.update(bytes(body))
+            fingerprint = hasher.hexdigest()
+            body_read = True
+            received = False
+
+            async def app_receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {"type": "http.request", "body": bytes(body), "more_body": False}
+                return await receive()
+        else:
+            async def app_receive():
+                nonlocal body_read
+                message = await receive()
+                if message["type"] == "http.request":
+                    hasher.update(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        body_read = True
+                        self.store.set_fingerprint(key, hasher.hexdigest())
+                return message
+
+        try:
+            stored = await self.store.claim(key, fingerprint)
+        except KeyReused:
+            detail = json.dumps({"detail": "Idempotency-Key reused with a different request"}).encode()
+            await self._send(send, StoredResponse(422, [], detail))
+            return
+        if stored is not None:
+            logger.info("Replaying response for repeated request to %s", scope["path"])
+            add_attributes(idempotent_replay=True)
+            await self._send(send, stored, replayed=True)
+            return
+
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        response_body = bytearray()
+
+        async def capture(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, app_receive, capture)
+        except BaseException:
+            self.store.release(key)
+            raise
+        if status in self.RETRYABLE:
+            self.store.release(key)
+            return
+        while not body_read:
+            # The route answered without reading the body; it is read now,
+            # after the response, so the stored answer is bound to it too
+            if (await app_receive())["type"] != "http.request":
+                break
+        self.store.complete(key, StoredResponse(status, response_headers, bytes(response_body)))
+
+    @staticmethod
+    async def _send(send, response: StoredResponse, replayed: bool = False):
+        headers = [(k, v) for k, v in response.headers if k.lower() != b"content-length"]
+        if not headers:
+            headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(response.body)).encode()))
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
+
+
+idempotency_store = IdempotencyStore(
+    max_keys=int(os.getenv("CLAWD_IDEMPOTENCY_MAX_KEYS", "1000")),
+    ttl=float(os.getenv("CLAWD_IDEMPOTENCY_TTL_SECONDS", "600"))
+)
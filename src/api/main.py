@@ -1,6 +1,23 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes.voice import router as voice_router
+from fastapi.concurrency import run_in_threadpool
+from src.core.logging_config import setup_logging
+
+# Configure logging before the routes start their services
+setup_logging()
+
+from src.api.routes.voice import router as voice_router, whisper_handler
+from src.api.routes.history import router as history_router
+from src.api.routes.traces import router as traces_router
+from src.api.routes.debug import router as debug_router, loop_monitor
+from src.api.admission import TRUSTED_PROXIES, AdmissionMiddleware, admission
+from src.api.cancellation import CancellationMiddleware
+from src.api.idempotency import IdempotencyMiddleware, idempotency_store
+from src.api.tracing import TracingMiddleware
+from src.core import file_search
+from src.core.cancellation import cancellation_stats
+from src.core.tracing import tracer
 from datetime import datetime
 
 app = FastAPI(
@@ -18,8 +35,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Innermost, so the deadline covers the stage queues but not requests that
+# admission control rejects straight away
+app.add_middleware(
+    CancellationMiddleware,
+    stats=cancellation_stats,
+    paths={
+        "/voice/process-text": "interpretation",
+        "/voice/process-voice": "transcription",
+        "/voice/stream/*/finish": "transcription",
+    },
+    default_timeout=float(os.getenv("CLAWD_REQUEST_TIMEOUT_SECONDS", "120")),
+    max_timeout=float(os.getenv("CLAWD_MAX_REQUEST_TIMEOUT_SECONDS", "600"))
+)
+
+# Reject bursts of expensive requests up front instead of queueing them
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    paths={
+        "/voice/process-text": "interpretation",
+        "/voice/process-voice": "transcription",
+        "/voice/stream/start": "transcription",
+    },
+    trusted_proxies=TRUSTED_PROXIES
+)
+
+# Outside admission control, so a resent command neither spends a rate
+# limit token nor queues behind others before its stored response is replayed.
+# A new key's body is only read by the route, after admission let it in
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=idempotency_store,
+    paths=["/voice/process-text", "/voice/process-voice", "/voice/stream/"],
+    trusted_proxies=TRUSTED_PROXIES
+)
+
+# Added last so it is outermost and rejected requests are traced too
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Include the voice router
 app.include_router(voice_router, prefix="/voice", tags=["voice"])
+app.include_router(history_router, prefix="/history", tags=["history"])
+app.include_router(traces_router, prefix="/traces", tags=["traces"])
+app.include_router(debug_router, prefix="/debug", tags=["debug"])
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    # Log the stack of anything holding the event loop too long
+    if loop_monitor.threshold > 0:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await loop_monitor.stop()
+
+@app.on_event("shutdown")
+async def stop_search_workers():
+    # Waits for running scans, so off the event loop
+    await run_in_threadpool(file_search.shutdown)
+
+@app.on_event("shutdown")
+async def stop_chunk_workers():
+    # Local models of long-recording chunk workers
+    await run_in_threadpool(whisper_handler.chunker.shutdown)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import logging
+import os
+import secrets
+from dotenv import load_dotenv
+
+from src.core.profiling import LoopLagMonitor, profile
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+loop_monitor = LoopLagMonitor(threshold=float(os.getenv("CLAWD_LOOP_LAG_MS", "250")) / 1000)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only with the configured admin token.
+
+    The debug endpoints are disabled entirely when CLAWD_ADMIN_TOKEN is unset.
+    """
+    expected = os.getenv("CLAWD_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(404, "Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(403, "Admin token required")
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def profile_process(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100)
+):
+    """Sample all threads for ``seconds`` and return folded stacks for a flamegraph.
+
+    Render with ``flamegraph.pl profile.folded > profile.svg`` or open in speedscope.
+    """
+    logger.info("Profiling for %ss at %s ms intervals", seconds, interval_ms)
+    folded = await run_in_threadpool(profile, seconds, interval_ms / 1000)
+    if folded is None:
+        raise HTTPException(409, "A profile is already running")
+    return folded
+
+@router.get("/loop", dependencies=[Depends(require_admin)])
+async def loop_lag():
+    """Report event loop lag and the stacks of recent stalls."""
+    return loop_monitor.summary()
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import os
+from dotenv import load_dotenv
+
+from src.core.history import CommandHistory
+
+# Load environment variables
+load_dotenv()
+
+router = APIRouter()
+
+command_history = CommandHistory(
+    os.getenv("CLAWD_HISTORY_DB", str(Path.home() / ".clawd" / "history.db"))
+)
+
+@router.get("")
+async def list_history(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Return one page of command history, newest first."""
+    items, total = await run_in_threadpool(
+        command_history.query, page, page_size, action, status, since, until
+    )
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": (total + page_size - 1) // page_size
+    }
+
+@router.get("/{entry_id}")
+async def get_history_entry(entry_id: int):
+    """Return a single history entry."""
+    entry = await run_in_threadpool(command_history.get, entry_id)
+    if entry is None:
+        raise HTTPException(404, "History entry not found")
+    return entry
+
+@router.delete("")
+async def clear_history():
+    """Delete all command history."""
+    deleted = await run_in_threadpool(command_history.clear)
+    return {"deleted": deleted}
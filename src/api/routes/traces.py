@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from src.core.tracing import tracer
+
+router = APIRouter()
+
+class ClientSpan(BaseModel):
+    trace_id: str = Field(pattern=r"^[0-9a-f]{32}$")
+    span_id: str = Field(pattern=r"^[0-9a-f]{16}$")
+    parent_id: Optional[str] = Field(None, pattern=r"^[0-9a-f]{16}$")
+    name: str = Field(max_length=200)
+    start: float
+    end: float
+    status: str = "ok"
+    attributes: Dict[str, Any] = {}
+
+class ClientSpans(BaseModel):
+    spans: List[ClientSpan] = Field(max_length=500)
+
+@router.post("")
+async def submit_spans(batch: ClientSpans):
+    """Record spans measured by the frontend, e.g. audio capture and upload."""
+    tracer.export(
+        {
+            **span.model_dump(),
+            "service": "frontend",
+            "duration_ms": round((span.end - span.start) * 1000, 3),
+        }
+        for span in batch.spans
+    )
+    return {"accepted": len(batch.spans)}
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
 import tempfile
 import os
 from dotenv import load_dotenv
 import logging
 from pydantic import BaseModel
+from typing import Optional
 
 from src.voice.whisper_handler import WhisperSTT
-from src.core.agent import ComputerAgent
-from src.core.ai_services import AIServices, AIServiceError
+from src.voice.streaming import StreamRegistry, StreamError
+from src.voice.codecs import SUPPORTED_EXTENSIONS, api_suffix
+from src.voice.profiles import get_profile
+from src.core.agent import AGENT_SYSTEM_PROMPT, ComputerAgent, DEFAULT_INTENT_MODEL, INTENT_TOOL
+from src.core.ai_services import AIServices, AIServiceError, caches_prefix, prompt_cache_stats
+from src.core.cancellation import cancellation_stats
+from src.core.resilience import guard_summaries
+from src.core.tracing import tracer
+from src.core.recording import current_recording, record_command, recorder
+from src.api.routes.history import command_history
+from src.api.admission import admission
+from src.api.cancellation import checkpoint
+from src.api.idempotency import idempotency_store
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -19,44 +30,99 @@ load_dotenv()
 
 router = APIRouter()
 
+# "tool": one short Claude tool call returns the action to run.
+# "legacy": free-form Claude interpretation, regex parser picks the action.
+INTENT_MODE = os.getenv("CLAWD_INTENT_MODE", "tool")
+INTENT_MODEL = os.getenv("CLAWD_INTENT_MODEL", DEFAULT_INTENT_MODEL)
+RESPONSE_MODEL = os.getenv("CLAWD_RESPONSE_MODEL", "claude-3-sonnet-20240229")
+# The long system prompt is only sent to models that cache it; below a
+# model's caching minimum the short per-request instructions cost less
+TOOL_SYSTEM = AGENT_SYSTEM_PROMPT if caches_prefix(INTENT_MODEL, AGENT_SYSTEM_PROMPT, [INTENT_TOOL]) else None
+RESPONSE_SYSTEM = AGENT_SYSTEM_PROMPT if caches_prefix(RESPONSE_MODEL, AGENT_SYSTEM_PROMPT) else None
+
 try:
     whisper_handler = WhisperSTT(use_api=True)  # Use OpenAI's Whisper API
     computer_agent = ComputerAgent()
     ai_services = AIServices()
+    audio_streams = StreamRegistry()
     logger.info("Voice route services initialized successfully")
 except AIServiceError as e:
-    logger.error(f"Failed to initialize AI services: {str(e)}")
+    logger.error("Failed to initialize AI services: %s", e)
     raise
 except Exception as e:
-    logger.error(f"Unexpected error during initialization: {str(e)}")
+    logger.error("Unexpected error during initialization: %s", e)
     raise
 
 class TextCommand(BaseModel):
     command: str
 
+async def interpret_command(command_text: str, kind: str):
+    """Ask Claude what a command means.
+    
+    Returns:
+        (interpretation, intent); intent is the extracted action and params
+        in tool mode and None otherwise, in which case the agent falls back
+        to its regex parser
+
+    Raises:
+        RequestCancelled: If the request was cancelled before interpretation
+    """
+    checkpoint("interpretation")
+    try:
+        logger.info("Getting AI interpretation of command")
+        with tracer.span("interpretation", mode=INTENT_MODE):
+            async with admission.stage("interpretation"):
+                if INTENT_MODE == "tool":
+                    # With a cached system prompt only the command itself is
+                    # new input for each request
+                    intent = await ai_services.get_claude_tool_call(
+                        f"Choose the action for this {kind}: {command_text}",
+                        INTENT_TOOL,
+                        model=INTENT_MODEL,
+                        system=TOOL_SYSTEM,
+                        # Room for a few steps in compound commands
+                        max_tokens=300
+                    )
+                    interpretation = intent.get("summary") if intent else None
+                else:
+                    intent = None
+                    interpretation = await ai_services.get_claude_response(
+                        f"Explain this {kind}: {command_text}" if RESPONSE_SYSTEM else
+                        f"Interpret this {kind} and explain what the user wants to do: {command_text}",
+                        model=RESPONSE_MODEL,
+                        system=RESPONSE_SYSTEM
+                    )
+        
+        if not interpretation:
+            logger.warning("Failed to get AI interpretation, proceeding without it")
+        return interpretation, intent
+    except AIServiceError as e:
+        logger.error("AI service error during interpretation: %s", e)
+        return None, None
+
 @router.post("/process-text")
+@recorder.recorded("text")
 async def process_text_command(command_data: TextCommand):
     """Process a text-based command."""
     try:
-        logger.info(f"Processing text command: {command_data.command}")
+        logger.info("Processing text command (%d chars)", len(command_data.command))
+        logger.debug("Text command: %s", command_data.command)
         
         # Get AI interpretation of the command
-        try:
-            logger.info("Getting AI interpretation of command")
-            interpretation = await ai_services.get_claude_response(
-                f"Interpret this command and explain what the user wants to do: {command_data.command}"
-            )
-            
-            if not interpretation:
-                logger.warning("Failed to get AI interpretation, proceeding without it")
-        except AIServiceError as e:
-            logger.error(f"AI service error during interpretation: {str(e)}")
-            interpretation = None
+        interpretation, intent = await interpret_command(command_data.command, "command")
+        record_command(command_data.command, intent)
         
         # Execute the command
         try:
+            checkpoint("execution")
             logger.info("Executing command")
-            result = await computer_agent.execute_command(command_data.command)
+            with tracer.span("execution"):
+                async with admission.stage("execution"):
+                    result = await computer_agent.execute_command(command_data.command, intent=intent)
+            with tracer.span("history.record"):
+                await run_in_threadpool(
+                    command_history.record, "text", command_data.command, result, interpretation
+                )
             
             return {
                 "status": "success",
@@ -64,78 +130,173 @@ async def process_text_command(command_data: TextCommand):
                 "interpretation": interpretation,
                 "command_result": result
             }
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Command execution failed: {str(e)}")
+            logger.error("Command execution failed: %s", e)
             raise HTTPException(500, f"Command execution failed: {str(e)}")
             
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(500, f"Unexpected error: {str(e)}")
 
+@router.get("/stats")
+async def speech_to_text_stats():
+    """Report speech-to-text cascade and hedging metrics, admission, provider, idempotency, prompt cache and cancellation state."""
+    return {
+        **whisper_handler.stats(),
+        "admission": admission.summary(),
+        "providers": guard_summaries(),
+        "idempotency": idempotency_store.summary(),
+        "prompt_cache": prompt_cache_stats.summary(),
+        "cancellation": cancellation_stats.summary(),
+    }
+
 @router.post("/process-voice")
-async def process_voice_command(audio_file: UploadFile = File(...)):
+@recorder.recorded("voice")
+async def process_voice_command(
+    audio_file: UploadFile = File(...),
+    profile: Optional[str] = Query(None, description="Decode profile, e.g. command or dictation")
+):
     """Process voice command from audio file."""
-    if not audio_file.filename.endswith(('.mp3', '.wav', '.m4a')):
-        logger.warning(f"Unsupported file format: {audio_file.filename}")
+    check_profile(profile)
+    if not audio_file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        logger.warning("Unsupported file format: %s", audio_file.filename)
         raise HTTPException(400, "Unsupported file format")
     
-    logger.info(f"Processing voice command from file: {audio_file.filename}")
+    logger.info("Processing voice command from file: %s", audio_file.filename)
     
-    # Create temporary file to store uploaded audio
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+    # Create temporary file to store uploaded audio. Compressed uploads are
+    # kept as-is so the Whisper API receives the compressed form too.
+    with tempfile.NamedTemporaryFile(delete=False, suffix=api_suffix(audio_file.filename)) as temp_file:
         try:
             # Write uploaded file to temp file
             content = await audio_file.read()
             temp_file.write(content)
             temp_file.flush()
+            logger.info("Received %d bytes of %s audio", len(content), Path(audio_file.filename).suffix)
             
-            # Transcribe audio
-            logger.info("Starting audio transcription")
-            transcribed_text = await whisper_handler.transcribe(temp_file.name)
-            
-            if not transcribed_text:
-                logger.error("Transcription failed")
-                raise HTTPException(500, "Transcription failed")
-            
-            logger.info(f"Transcription successful: {transcribed_text}")
-            
-            # Get AI interpretation of the command
-            try:
-                logger.info("Getting AI interpretation of command")
-                interpretation = await ai_services.get_claude_response(
-                    f"Interpret this voice command and explain what the user wants to do: {transcribed_text}"
-                )
-                
-                if not interpretation:
-                    logger.warning("Failed to get AI interpretation, proceeding without it")
-            except AIServiceError as e:
-                logger.error(f"AI service error during interpretation: {str(e)}")
-                interpretation = None
-            
-            # Execute the command
-            try:
-                logger.info("Executing command")
-                result = await computer_agent.execute_command(transcribed_text)
-                
-                return {
-                    "status": "success",
-                    "transcribed_text": transcribed_text,
-                    "interpretation": interpretation,
-                    "command_result": result
-                }
-            except Exception as e:
-                logger.error(f"Command execution failed: {str(e)}")
-                raise HTTPException(500, f"Command execution failed: {str(e)}")
-            
-        except AIServiceError as e:
-            logger.error(f"AI service error: {str(e)}")
-            raise HTTPException(503, f"AI service error: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
-            raise HTTPException(500, f"Unexpected error: {str(e)}")
+            return await process_audio_path(temp_file.name, profile)
         finally:
             # Clean up temp file
             try:
                 os.unlink(temp_file.name)
             except Exception as e:
-                logger.error(f"Failed to clean up temp file: {str(e)}")
+                logger.error("Failed to clean up temp file: %s", e)
+
+@router.post("/stream/start")
+async def start_voice_stream(sample_rate: int = 16000, encoding: str = "pcm"):
+    """Open a streamed upload that accepts PCM or FLAC chunks while recording."""
+    try:
+        stream = audio_streams.open(sample_rate=sample_rate, encoding=encoding)
+    except StreamError as e:
+        raise HTTPException(400, str(e))
+    logger.info("Opened audio stream %s", stream.id)
+    return {"stream_id": stream.id}
+
+@router.post("/stream/{stream_id}/chunk")
+async def append_voice_stream(stream_id: str, seq: int, request: Request):
+    """Append a chunk of audio to an open stream."""
+    stream = audio_streams.get(stream_id)
+    if stream is None:
+        raise HTTPException(404, "Unknown audio stream")
+    
+    try:
+        # Decoding runs off the event loop
+        data = await request.body()
+        with tracer.span("stream.decode", seq=seq, bytes=len(data)):
+            await run_in_threadpool(stream.append, seq, data)
+    except StreamError as e:
+        raise HTTPException(409, str(e))
+    return {"stream_id": stream_id, "bytes_received": stream.bytes_received}
+
+@router.post("/stream/{stream_id}/finish")
+@recorder.recorded("stream")
+async def finish_voice_stream(
+    stream_id: str,
+    profile: Optional[str] = Query(None, description="Decode profile, e.g. command or dictation")
+):
+    """Close a streamed upload and process it as a voice command."""
+    check_profile(profile)
+    stream = audio_streams.pop(stream_id)
+    if stream is None:
+        raise HTTPException(404, "Unknown audio stream")
+    
+    logger.info(
+        "Processing streamed voice command %s (%d bytes received, %d bytes decoded)",
+        stream_id, stream.bytes_received, stream.pcm_bytes
+    )
+    try:
+        if stream.pcm_bytes == 0:
+            raise HTTPException(400, "Audio stream is empty")
+        return await process_audio_path(stream.finish(), profile)
+    finally:
+        stream.discard()
+
+def check_profile(profile: Optional[str]):
+    """Reject unknown decode profiles before any audio is handled."""
+    if profile is not None:
+        try:
+            get_profile(profile)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+async def process_audio_path(audio_path: str, profile: Optional[str] = None):
+    """Transcribe an audio file, interpret it and execute the command."""
+    try:
+        recording = current_recording()
+        if recording is not None:
+            await run_in_threadpool(recorder.add_audio, recording, audio_path)
+        
+        # Transcribe audio
+        checkpoint("transcription")
+        logger.info("Starting audio transcription")
+        with tracer.span("transcription"):
+            async with admission.stage("transcription"):
+                transcribed_text = await whisper_handler.transcribe(audio_path, profile=profile)
+        
+        if not transcribed_text:
+            logger.error("Transcription failed")
+            raise HTTPException(500, "Transcription failed")
+        
+        logger.info("Transcription successful (%d chars)", len(transcribed_text))
+        logger.debug("Transcription: %s", transcribed_text)
+        
+        # Get AI interpretation of the command
+        interpretation, intent = await interpret_command(transcribed_text, "voice command")
+        record_command(transcribed_text, intent)
+        
+        # Execute the command
+        try:
+            checkpoint("execution")
+            logger.info("Executing command")
+            with tracer.span("execution"):
+                async with admission.stage("execution"):
+                    result = await computer_agent.execute_command(transcribed_text, intent=intent)
+            with tracer.span("history.record"):
+                await run_in_threadpool(
+                    command_history.record, "voice", transcribed_text, result, interpretation
+                )
+            
+            return {
+                "status": "success",
+                "transcribed_text": transcribed_text,
+                "interpretation": interpretation,
+                "command_result": result
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Command execution failed: %s", e)
+            raise HTTPException(500, f"Command execution failed: {str(e)}")
+        
+    except HTTPException:
+        raise
+    except AIServiceError as e:
+        logger.error("AI service error: %s", e)
+        raise HTTPException(503, f"AI service error: {str(e)}")
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise HTTPException(500, f"Unexpected error: {str(e)}")
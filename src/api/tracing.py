@@ -0,0 +1,38 @@
+from src.core.tracing import TRACEPARENT, Tracer
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span for every HTTP request.
+
+    The span continues the caller's trace when the request carries a
+    ``traceparent`` header, and the response carries the server span's
+    ``traceparent`` back so the client can link to it.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == TRACEPARENT.encode():
+                traceparent = value.decode("latin-1")
+                break
+
+        with self.tracer.span(f"{scope['method']} {scope['path']}", traceparent=traceparent) as span:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                    if message["status"] >= 500:
+                        span.status = "error"
+                    headers = list(message.get("headers", []))
+                    headers.append((TRACEPARENT.encode(), span.traceparent.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -1,11 +1,114 @@
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 import re
 import webbrowser
 from urllib.parse import quote
 
+from .cancellation import current_scope
 from .system_actions import SystemActionHandler
 
+# Tool the model must call to report a command's intent in one short request
+INTENT_TOOL = {
+    "name": "run_command",
+    "description": "Run the computer control action the user asked for.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "action": {
+                "type": "string",
+                "enum": ["open_app", "search_files", "create_note", "web_search", "none"],
+                "description": "Action to run, or none if the command matches no action"
+            },
+            "params": {
+                "type": "string",
+                "description": "App name, file search term, note text or web search query"
+            },
+            "search_content": {
+                "type": "boolean",
+                "description": "For search_files: true to search inside files, false to match file names"
+            },
+            "steps": {
+                "type": "array",
+                "description": "Every action in spoken order when the command asks for more than one",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "action": {"type": "string", "enum": ["open_app", "search_files", "create_note", "web_search"]},
+                        "params": {"type": "string"},
+                        "search_content": {"type": "boolean"},
+                        "after_previous": {
+                            "type": "boolean",
+                            "description": "True if this step must wait for the one before it (\"then\")"
+                        }
+                    },
+                    "required": ["action", "params"]
+                }
+            },
+            "summary": {
+                "type": "string",
+                "description": "One short sentence saying what the user wants"
+            }
+        },
+        "required": ["action", "params", "summary"]
+    }
+}
+
+# Model for tool-mode interpretation. Sonnet caches prefixes from 1024
+# tokens, which this prompt plus INTENT_TOOL clear; Haiku needs 2048
+DEFAULT_INTENT_MODEL = "claude-3-5-sonnet-20240620"
+
+# Fixed instructions sent as the system prompt of interpretation requests.
+# It never changes between commands, so it is marked for provider prompt
+# caching and only the short command text is processed per request.
+# Keep it byte-for-byte stable: any edit invalidates the cache.
+AGENT_SYSTEM_PROMPT = """You are the command interpreter of CLAWD, a voice and text assistant that controls the user's own computer. Each request contains one command, typed or transcribed from speech; work out which of the actions below the user wants and with what parameters.
+
+Actions:
+
+open_app
+  Opens an installed application by name.
+  params: the common short name, lowercase, as typed into a launcher: "chrome", "code", "word", "terminal", "spotify". No ".exe", ".app", paths or versions.
+
+search_files
+  Searches the user's home directory for files.
+  params: the search term only, without words like "files", "documents" or "for".
+  search_content: false to match file names ("find my tax return pdf"); true to look inside text files ("which notes mention the dentist").
+
+create_note
+  Writes a plain text note into the user's CLAWD_Notes folder.
+  params: the note text without the instruction itself; "make a note saying call mom tomorrow" is "call mom tomorrow". Keep the user's wording, numbers and times.
+
+web_search
+  Opens a Google search in the default browser, for anything not on this computer.
+  params: the query, e.g. "weather in berlin" for "google the weather in berlin for me".
+
+none
+  The command asks for something no action can do, is empty or unintelligible, or is conversation. Never invent an action.
+
+Choosing between similar actions:
+  "find" and "search" are search_files when the user mentions files, documents, notes, folders, file types or "my" things on the computer, and web_search otherwise. "look up" and "google" are always web_search.
+  Only create a note when the user asks for a note, memo or reminder or to write something down. "write an email" is none: there is no email action.
+  "open" followed by a website ("open youtube") is web_search for that site unless an application of that name is meant.
+  Reminders with a time ("remind me to stretch at 3") are notes: create_note "stretch at 3". CLAWD has no alarms or calendar.
+
+Compound commands:
+  A command may ask for several actions, joined by "and", "then", "after that" or commas. List every action in spoken order. A step that must wait for the previous one ("then", "after that", or when it uses its result) depends on it; the others run at the same time.
+
+Transcription errors:
+  Spoken commands may contain homophones, missing punctuation or filler such as "um", "please", "hey clawd". Interpret the most plausible command: "open crome" is open_app "chrome", "right a note saying by milk" is create_note "buy milk". Do not correct note text or search terms beyond such obvious errors.
+
+Safety:
+  The actions only open applications, read files, write new notes and open web searches. If the user asks to delete, move, rename, send, buy, install or change settings, answer none and say that CLAWD cannot do that yet.
+
+Examples:
+  "search for documents containing the wifi password" -> search_files, params "wifi password", search_content true
+  "look up flights to lisbon and then make a note saying check flight prices" -> web_search "flights to lisbon", then create_note "check flight prices", depending on the search
+  "open slack, open zoom and google team calendar" -> open_app "slack", open_app "zoom" and web_search "team calendar", all independent
+  "delete my downloads folder" -> none, CLAWD cannot delete files
+
+When you explain a command in prose, say in one or two short sentences which actions will run with which parameters, then mention anything ambiguous."""
+
 class CommandParser:
     """Parse natural language commands into structured actions."""
     
@@ -16,6 +119,13 @@ class CommandParser:
         "web_search": r"(?:google|search|look up|find)\s+(?:for\s+)?(.+?)(?:\s+for\s+(?:me|us))?$"
     }
     
+    # Conjunctions that may join two commands; "then" makes the second wait
+    SEPARATOR = re.compile(r"\s*(?:,\s*)?\b(?:and\s+then|then|after\s+that|and)\b\s*|\s*[,;]\s*")
+    # A separator only splits when a new command starts right after it, so
+    # "a note saying bread and milk" stays one command. "start" is left out:
+    # "and start playing" is rarely a second app
+    COMMAND_START = re.compile(r"(?:open|launch|find|search|locate|create|make|write|google|look up)\b")
+    
     @classmethod
     def parse_command(cls, text: str) -> Optional[Dict[str, Any]]:
         """Parse natural language text into a structured command."""
@@ -23,12 +133,130 @@ class CommandParser:
         
         for action, pattern in cls.COMMAND_PATTERNS.items():
             if match := re.search(pattern, text):
-                return {
+                parsed = {
                     "action": action,
                     "params": match.group(1).strip()
                 }
+                if action == "search_files":
+                    # "documents containing X" searches text, "files with X" names
+                    parsed["content"] = " containing " in match.group(0)
+                return parsed
         
         return None
+    
+    @classmethod
+    def split_command(cls, text: str) -> List[Dict[str, Any]]:
+        """Split text joining several commands into its parts.
+        
+        Returns:
+            List of {"text", "after_previous", "sep"}; after_previous is True
+            when the part was introduced with "then" or "after that", and sep
+            is the separator text before the part
+        """
+        text = text.lower().strip()
+        parts = []
+        start = 0
+        after_previous = False
+        separator = ""
+        for sep in cls.SEPARATOR.finditer(text):
+            if sep.start() <= start or not cls.COMMAND_START.match(text, sep.end()):
+                continue
+            parts.append({"text": text[start:sep.start()], "after_previous": after_previous, "sep": separator})
+            after_previous = bool(re.search(r"then|after", sep.group(0)))
+            separator = sep.group(0)
+            start = sep.end()
+        parts.append({"text": text[start:], "after_previous": after_previous, "sep": separator})
+        return parts
+    
+    @classmethod
+    def parse_plan(cls, text: str) -> List[Dict[str, Any]]:
+        """Parse text into every command it contains, with dependencies.
+        
+        Returns:
+            List of parsed commands, each with an "id" and "depends_on" (ids
+            of steps that must finish first); empty if nothing was understood
+        """
+        parts = []
+        for part in cls.split_command(text):
+            if parts and not cls._starts_step(parts[-1]["text"], part):
+                # Not a command of its own; it belongs to the previous one
+                parts[-1]["text"] += part["sep"] + part["text"]
+            else:
+                parts.append(dict(part))
+        steps = []
+        for part in parts:
+            parsed = cls.parse_command(part["text"])
+            if parsed:
+                steps.append((parsed, part["after_previous"]))
+        return cls._number(steps)
+    
+    @classmethod
+    def _starts_step(cls, previous_text: str, part: Dict[str, Any]) -> bool:
+        parsed = cls.parse_command(part["text"])
+        if parsed is None:
+            return False
+        previous = cls.parse_command(previous_text)
+        if previous is not None and previous["action"] == "create_note":
+            # Note text runs on ("buy eggs, find a plumber") unless another
+            # note or an explicitly sequenced command follows
+            return part["after_previous"] or parsed["action"] == "create_note"
+        return True
+    
+    @staticmethod
+    def declined(intent: Optional[Dict[str, Any]]) -> bool:
+        """Whether the model answered "none": the command is unsupported or unsafe."""
+        return isinstance(intent, dict) and intent.get("action") == "none"
+    
+    @classmethod
+    def plan(cls, text: str, intent: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Plan from the model's intent, or from the text if the intent is missing or malformed.
+        
+        A declined intent gives an empty plan: the regex parser must not run
+        what the model refused.
+        """
+        plan = cls.plan_from_intent(intent)
+        if plan or cls.declined(intent):
+            return plan
+        return cls.parse_plan(text)
+    
+    @classmethod
+    def plan_from_intent(cls, intent: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate a model-extracted intent into the same shape as parse_plan."""
+        if not isinstance(intent, dict):
+            return []
+        steps = intent.get("steps")
+        if isinstance(steps, list) and len(steps) > 1:
+            parsed = [(cls.from_intent(step), isinstance(step, dict) and bool(step.get("after_previous")))
+                      for step in steps]
+            if all(step for step, _ in parsed):
+                return cls._number(parsed)
+        single = cls.from_intent(intent)
+        return cls._number([(single, False)]) if single else []
+    
+    @staticmethod
+    def _number(steps) -> List[Dict[str, Any]]:
+        plan = []
+        for i, (parsed, after_previous) in enumerate(steps):
+            depends_on = [plan[-1]["id"]] if after_previous and plan else []
+            plan.append({**parsed, "id": i, "depends_on": depends_on})
+        return plan
+    
+    @classmethod
+    def from_intent(cls, intent: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Validate a model-extracted intent into the same shape as parse_command."""
+        if not isinstance(intent, dict):
+            return None
+        action = intent.get("action")
+        params = intent.get("params")
+        if action not in cls.COMMAND_PATTERNS or not isinstance(params, str) or not params.strip():
+            return None
+        parsed = {
+            "action": action,
+            "params": params.strip()
+        }
+        if action == "search_files":
+            parsed["content"] = bool(intent.get("search_content"))
+        return parsed
 
 class ComputerAgent:
     """Main agent for handling computer control commands."""
@@ -37,22 +265,83 @@ class ComputerAgent:
         self.system = SystemActionHandler()
         self.parser = CommandParser()
     
-    async def execute_command(self, command_text: str) -> Dict[str, Any]:
-        """Execute a natural language command."""
+    async def execute_command(self, command_text: str, intent: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a natural language command.
+        
+        Text with several commands ("open firefox and create a note saying
+        standup at 10") runs every one of them; independent steps run
+        concurrently and steps introduced with "then" wait for the one
+        before. A single command returns its own result, several return a
+        "compound" result listing each step. Steps that have not started
+        when the request is cancelled are reported as "cancelled".
+        
+        Args:
+            command_text: The command as typed or transcribed
+            intent: Action and params already extracted by the model; the
+                regex parser is used when it is missing or invalid. An
+                intent of "none" is a refusal and nothing runs
+        """
         
         # Parse the command
-        parsed = self.parser.parse_command(command_text)
-        if not parsed:
+        plan = self.parser.plan(command_text, intent)
+        if not plan and self.parser.declined(intent):
+            return {
+                "status": "error",
+                "action": "none",
+                "message": intent.get("summary") or "CLAWD cannot do that",
+                "original_text": command_text
+            }
+        if not plan:
             return {
                 "status": "error",
                 "message": "Could not understand command",
                 "original_text": command_text
             }
+        if len(plan) == 1:
+            return await self._run_step(plan[0], command_text)
+        
+        tasks: Dict[int, asyncio.Task] = {}
         
-        # Execute the appropriate action
+        async def run(step):
+            for dep in step["depends_on"]:
+                previous = await tasks[dep]
+                if previous["status"] != "success":
+                    return {
+                        "status": "skipped",
+                        "action": step["action"],
+                        "message": f"Skipped {step['action']} because step {dep + 1} failed"
+                    }
+            # Steps not started yet are dropped once nobody waits for the result
+            scope = current_scope()
+            if scope is not None and scope.cancelled:
+                scope.steps_skipped += 1
+                return {
+                    "status": "cancelled",
+                    "action": step["action"],
+                    "message": f"Cancelled {step['action']}: request {scope.reason}"
+                }
+            return await self._run_step(step, command_text)
+        
+        for step in plan:
+            tasks[step["id"]] = asyncio.create_task(run(step))
+        results = await asyncio.gather(*tasks.values())
+        
+        succeeded = sum(result["status"] == "success" for result in results)
+        return {
+            "status": "success" if succeeded == len(results) else "partial" if succeeded else "error",
+            "action": "compound",
+            "steps": [
+                {**result, "step": step["id"] + 1, "depends_on": [dep + 1 for dep in step["depends_on"]]}
+                for step, result in zip(plan, results)
+            ],
+            "message": "; ".join(result["message"] for result in results)
+        }
+    
+    async def _run_step(self, parsed: Dict[str, Any], command_text: str) -> Dict[str, Any]:
+        """Run one parsed action. Blocking work runs in a thread so steps overlap."""
         try:
             if parsed["action"] == "open_app":
-                success = self.system.open_application(parsed["params"])
+                success = await asyncio.to_thread(self.system.open_application, parsed["params"])
                 return {
                     "status": "success" if success else "error",
                     "action": "open_app",
@@ -61,17 +350,19 @@ class ComputerAgent:
                 }
                 
             elif parsed["action"] == "search_files":
-                results = self.system.search_files(parsed["params"])
+                content = parsed.get("content", False)
+                results = await asyncio.to_thread(self.system.search_files, parsed["params"], content=content)
                 return {
                     "status": "success",
                     "action": "search_files",
                     "query": parsed["params"],
+                    "mode": "content" if content else "name",
                     "results": [str(p) for p in results],
-                    "message": f"Found {len(results)} files matching '{parsed['params']}'"
+                    "message": f"Found {len(results)} files {'containing' if content else 'matching'} '{parsed['params']}'"
                 }
                 
             elif parsed["action"] == "create_note":
-                note_path = self.system.create_note(parsed["params"])
+                note_path = await asyncio.to_thread(self.system.create_note, parsed["params"])
                 return {
                     "status": "success" if note_path else "error",
                     "action": "create_note",
@@ -82,7 +373,7 @@ class ComputerAgent:
             elif parsed["action"] == "web_search":
                 search_query = quote(parsed["params"])
                 search_url = f"https://www.google.com/search?q={search_query}"
-                webbrowser.open(search_url)
+                await asyncio.to_thread(webbrowser.open, search_url)
                 return {
                     "status": "success",
                     "action": "web_search",
@@ -103,4 +394,4 @@ class ComputerAgent:
             "status": "error",
             "message": "Unsupported command",
             "original_text": command_text
-        } 
\ No newline at end of file
+        } 
@@ -1,5 +1,8 @@
+import json
 import os
-from typing import Optional
+import time
+from collections import deque
+from typing import List, Optional
 import openai
 import anthropic
 from anthropic import AsyncAnthropic
@@ -7,8 +10,15 @@ from dotenv import load_dotenv
 import logging
 from typing import Dict, Any
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from src.core.resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    provider_guard,
+)
+from src.core.tracing import add_attributes, tracer
+
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -18,6 +28,115 @@ class AIServiceError(Exception):
     """Custom exception for AI service errors"""
     pass
 
+
+def _guard(name: str, transient_errors: tuple) -> ProviderGuard:
+    """Shared per-provider guard, so every AIServices instance backs off together."""
+    return provider_guard(
+        name,
+        transient_errors=transient_errors,
+        limiter=AdaptiveConcurrencyLimiter(
+            initial=int(os.getenv("CLAWD_PROVIDER_CONCURRENCY", "4")),
+            max_limit=int(os.getenv("CLAWD_PROVIDER_MAX_CONCURRENCY", "32"))
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("CLAWD_CIRCUIT_FAILURES", "5")),
+            reset_timeout=float(os.getenv("CLAWD_CIRCUIT_RESET_SECONDS", "30"))
+        )
+    )
+
+# Enables cache_control blocks on API versions and SDKs from before prompt
+# caching was generally available; ignored where it already is
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+
+def cached_system(text: str) -> List[Dict[str, Any]]:
+    """System prompt marked so the provider caches everything up to its end."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+# Shortest prefix the provider caches, in tokens; shorter prefixes are
+# processed in full on every request despite cache_control
+MIN_CACHEABLE_TOKENS = {"haiku": 2048}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+# Conservative for English prose; JSON tool schemas use more tokens per character
+CHARS_PER_TOKEN = 4
+
+
+def min_cacheable_tokens(model: str) -> int:
+    for family, tokens in MIN_CACHEABLE_TOKENS.items():
+        if family in model:
+            return tokens
+    return DEFAULT_MIN_CACHEABLE_TOKENS
+
+
+def prefix_tokens(system: str, tools: List[Dict[str, Any]] = ()) -> int:
+    """Rough token count of the cached prefix: tool definitions and system prompt."""
+    chars = len(system) + sum(len(json.dumps(tool)) for tool in tools)
+    return chars // CHARS_PER_TOKEN
+
+
+def caches_prefix(model: str, system: str, tools: List[Dict[str, Any]] = ()) -> bool:
+    """Whether ``model`` will cache a prefix of this system prompt and tools.
+
+    A long system prompt only pays off when it is cached; below the
+    minimum every request pays for all of it.
+    """
+    return prefix_tokens(system, tools) >= min_cacheable_tokens(model)
+
+
+class PromptCacheStats:
+    """Cached-token counts and time to first token of Claude requests.
+
+    Time to first token is kept separately for requests that read the
+    prompt from the cache and those that did not, so the saving shows
+    directly in /voice/stats.
+    """
+
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_creation_tokens = 0
+        self._ttft = {True: deque(maxlen=window), False: deque(maxlen=window)}
+
+    def record(self, usage: Any, ttft: Optional[float] = None) -> Dict[str, Any]:
+        """Add one response's usage; returns the counts as span attributes."""
+        counts = {
+            "input_tokens": getattr(usage, "input_tokens", None) or 0,
+            "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        }
+        hit = counts["cache_read_tokens"] > 0
+        self.requests += 1
+        self.cache_hits += hit
+        self.input_tokens += counts["input_tokens"]
+        self.cache_read_tokens += counts["cache_read_tokens"]
+        self.cache_creation_tokens += counts["cache_creation_tokens"]
+        if ttft is not None:
+            self._ttft[hit].append(ttft)
+            counts["ttft_ms"] = round(ttft * 1000, 1)
+        return counts
+
+    @staticmethod
+    def _median_ms(values) -> Optional[float]:
+        return round(sorted(values)[len(values) // 2] * 1000, 1) if values else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "input_tokens": self.input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_creation_tokens": self.cache_creation_tokens,
+            "ttft_ms_p50_cached": self._median_ms(self._ttft[True]),
+            "ttft_ms_p50_uncached": self._median_ms(self._ttft[False]),
+        }
+
+
+# Shared by every AIServices instance, like the provider guards
+prompt_cache_stats = PromptCacheStats()
+
 class AIServices:
     """Handler for AI service integrations (OpenAI and Anthropic)"""
     
@@ -34,18 +153,25 @@ class AIServices:
             logger.error("Anthropic API key not properly configured")
             raise AIServiceError("Anthropic API key not properly configured")
         
-        # Initialize OpenAI client
-        self.openai_client = openai.OpenAI(
-            api_key=self.openai_api_key
+        # Initialize OpenAI client (async version); retries are done by the
+        # provider guard so SDK retries would only multiply them
+        self.openai_client = openai.AsyncOpenAI(
+            api_key=self.openai_api_key,
+            max_retries=0
         )
         
         # Initialize Anthropic client (async version)
         self.claude_client = AsyncAnthropic(
-            api_key=self.anthropic_api_key
+            api_key=self.anthropic_api_key,
+            max_retries=0
         )
         
+        self.openai_guard = _guard("OpenAI", (openai.APIConnectionError,))
+        self.anthropic_guard = _guard("Anthropic", (anthropic.APIConnectionError,))
+        
         logger.info("AI Services initialized successfully")
     
+    @tracer.traced("openai.chat")
     async def get_gpt_response(self, prompt: str, model: str = "gpt-3.5-turbo", max_retries: int = 2) -> Optional[str]:
         """Get response from OpenAI's GPT models.
         
@@ -57,85 +183,208 @@ class AIServices:
         Returns:
             Generated response or None if request fails
         """
-        attempt = 0
-        while attempt <= max_retries:
-            try:
-                logger.info(f"Sending request to GPT (attempt {attempt + 1})")
-                response = await self.openai_client.chat.completions.create(
+        logger.info("Sending request to GPT")
+        add_attributes(model=model)
+        try:
+            response = await self.openai_guard.call(
+                lambda: self.openai_client.chat.completions.create(
                     model=model,
                     messages=[{"role": "user", "content": prompt}]
-                )
-                return response.choices[0].message.content
-            except openai.RateLimitError:
-                if attempt == max_retries:
-                    logger.error("Rate limit exceeded and max retries reached")
-                    raise AIServiceError("OpenAI rate limit exceeded")
-                logger.warning("Rate limit hit, retrying...")
-                attempt += 1
-            except Exception as e:
-                logger.error(f"GPT request error: {str(e)}")
-                return None
+                ),
+                max_retries=max_retries
+            )
+            return response.choices[0].message.content
+        except CircuitOpenError as e:
+            raise AIServiceError(f"OpenAI temporarily unavailable: {e}")
+        except openai.RateLimitError:
+            raise AIServiceError("OpenAI rate limit exceeded")
+        except Exception as e:
+            logger.error("GPT request error: %s", e)
+            return None
     
-    async def get_claude_response(self, prompt: str, model: str = "claude-3-sonnet-20240229", max_retries: int = 2) -> Optional[str]:
+    @tracer.traced("anthropic.messages")
+    async def get_claude_response(
+        self,
+        prompt: str,
+        model: str = "claude-3-sonnet-20240229",
+        max_retries: int = 2,
+        system: Optional[str] = None
+    ) -> Optional[str]:
         """Get response from Anthropic's Claude.
         
+        The response is streamed so time to first token can be measured. A
+        ``system`` prompt is marked for prompt caching: it must be identical
+        between calls, with everything that varies in ``prompt``.
+        
         Args:
             prompt: The input prompt
             model: The Claude model to use
             max_retries: Maximum number of retry attempts
+            system: Fixed instructions sent before the prompt
             
         Returns:
             Generated response or None if request fails
         """
-        attempt = 0
-        while attempt <= max_retries:
-            try:
-                logger.info(f"Sending request to Claude (attempt {attempt + 1})")
-                message = await self.claude_client.messages.create(
-                    model=model,
-                    max_tokens=1000,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                return message.content[0].text
-            except anthropic.RateLimitError:
-                if attempt == max_retries:
-                    logger.error("Rate limit exceeded and max retries reached")
-                    raise AIServiceError("Anthropic rate limit exceeded")
-                logger.warning("Rate limit hit, retrying...")
-                attempt += 1
-            except Exception as e:
-                logger.error(f"Claude request error: {str(e)}")
-                return None
+        logger.info("Sending request to Claude")
+        add_attributes(model=model)
+        
+        async def attempt():
+            start = time.perf_counter()
+            stream = await self.claude_client.messages.create(
+                model=model,
+                max_tokens=1000,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                stream=True,
+                **self._system_kwargs(system)
+            )
+            text, ttft, usage = [], None, None
+            async for event in stream:
+                if event.type == "message_start":
+                    usage = event.message.usage
+                elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    text.append(event.delta.text)
+            return "".join(text), ttft, usage
+        
+        try:
+            text, ttft, usage = await self.anthropic_guard.call(attempt, max_retries=max_retries)
+            self._record_usage(usage, ttft)
+            return text
+        except CircuitOpenError as e:
+            raise AIServiceError(f"Anthropic temporarily unavailable: {e}")
+        except anthropic.RateLimitError:
+            raise AIServiceError("Anthropic rate limit exceeded")
+        except Exception as e:
+            logger.error("Claude request error: %s", e)
+            return None
     
-    async def transcribe_audio_with_whisper_api(self, audio_file_path: str, max_retries: int = 2) -> Optional[str]:
+    @staticmethod
+    def _system_kwargs(system: Optional[str]) -> Dict[str, Any]:
+        if not system:
+            return {}
+        return {"system": cached_system(system), "extra_headers": {"anthropic-beta": PROMPT_CACHING_BETA}}
+    
+    @staticmethod
+    def _record_usage(usage: Any, ttft: Optional[float] = None):
+        counts = prompt_cache_stats.record(usage, ttft)
+        add_attributes(**counts)
+        logger.info(
+            "Claude usage: %d input tokens, %d read from cache, %d written to cache, TTFT %s ms",
+            counts["input_tokens"], counts["cache_read_tokens"], counts["cache_creation_tokens"],
+            counts.get("ttft_ms", "n/a")
+        )
+    
+    @tracer.traced("anthropic.tool_call")
+    async def get_claude_tool_call(
+        self,
+        prompt: str,
+        tool: Dict[str, Any],
+        model: str = "claude-3-haiku-20240307",
+        max_tokens: int = 150,
+        max_retries: int = 2,
+        system: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Make Claude answer by calling ``tool`` and return the tool input.
+
+        The tool is forced, so the reply is only the structured arguments and
+        fits in a small ``max_tokens`` budget.
+
+        Args:
+            prompt: The input prompt
+            tool: Tool definition with name, description and input_schema
+            model: The Claude model to use
+            max_tokens: Output token budget
+            max_retries: Maximum number of retry attempts
+            system: Fixed instructions, cached together with the tool definition
+
+        Returns:
+            The tool input dict or None if request fails
+        """
+        logger.info("Sending %s tool request to Claude", tool["name"])
+        add_attributes(model=model, tool=tool["name"])
+        
+        async def attempt():
+            # Streamed like get_claude_response, so time to first token is
+            # measured on this path too
+            start = time.perf_counter()
+            stream = await self.claude_client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                tools=[tool],
+                tool_choice={"type": "tool", "name": tool["name"]},
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                stream=True,
+                **self._system_kwargs(system)
+            )
+            called, arguments, ttft, usage, stop_reason = None, [], None, None, None
+            async for event in stream:
+                if event.type == "message_start":
+                    usage = event.message.usage
+                elif event.type == "content_block_start":
+                    if event.content_block.type == "tool_use" and called is None:
+                        called = (event.index, event.content_block.name)
+                elif event.type == "content_block_delta":
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    if called and event.index == called[0] and event.delta.type == "input_json_delta":
+                        arguments.append(event.delta.partial_json)
+                elif event.type == "message_delta":
+                    stop_reason = event.delta.stop_reason
+            return called, "".join(arguments), ttft, usage, stop_reason
+        
+        try:
+            called, arguments, ttft, usage, stop_reason = await self.anthropic_guard.call(
+                attempt, max_retries=max_retries
+            )
+            self._record_usage(usage, ttft)
+            if called is None or called[1] != tool["name"]:
+                logger.warning("Claude did not call %s (stop reason %s)", tool["name"], stop_reason)
+                return None
+            return json.loads(arguments) if arguments else {}
+        except CircuitOpenError as e:
+            raise AIServiceError(f"Anthropic temporarily unavailable: {e}")
+        except anthropic.RateLimitError:
+            raise AIServiceError("Anthropic rate limit exceeded")
+        except Exception as e:
+            logger.error("Claude tool request error: %s", e)
+            return None
+
+    @tracer.traced("openai.transcription")
+    async def transcribe_audio_with_whisper_api(self, audio_file_path: str, max_retries: int = 2, **options) -> Optional[str]:
         """Transcribe audio using OpenAI's Whisper API.
         
         Args:
             audio_file_path: Path to the audio file
             max_retries: Maximum number of retry attempts
+            **options: Extra API parameters, e.g. language and temperature
             
         Returns:
             Transcribed text or None if transcription fails
         """
-        attempt = 0
-        while attempt <= max_retries:
-            try:
-                logger.info(f"Sending request to Whisper API (attempt {attempt + 1})")
-                with open(audio_file_path, "rb") as audio_file:
-                    response = await self.openai_client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                return response.text
-            except openai.RateLimitError:
-                if attempt == max_retries:
-                    logger.error("Rate limit exceeded and max retries reached")
-                    raise AIServiceError("OpenAI rate limit exceeded")
-                logger.warning("Rate limit hit, retrying...")
-                attempt += 1
-            except Exception as e:
-                logger.error(f"Whisper API error: {str(e)}")
-                return None
+        async def attempt():
+            # Reopened per attempt so a retry uploads the whole file again
+            with open(audio_file_path, "rb") as audio_file:
+                return await self.openai_client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    **options
+                )
+
+        logger.info("Sending request to Whisper API")
+        try:
+            response = await self.openai_guard.call(attempt, max_retries=max_retries)
+            return response.text
+        except CircuitOpenError as e:
+            raise AIServiceError(f"OpenAI temporarily unavailable: {e}")
+        except openai.RateLimitError:
+            raise AIServiceError("OpenAI rate limit exceeded")
+        except Exception as e:
+            logger.error("Whisper API error: %s", e)
+            return None
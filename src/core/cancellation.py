@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Pipeline stages of a command, in order
+PIPELINE = ("transcription", "interpretation", "execution")
+# Once a command starts running it is finished and recorded, so the desktop
+# never ends up in a state history does not know about; unstarted steps of
+# compound commands are still skipped
+UNINTERRUPTIBLE = ("execution",)
+
+
+class CancelScope:
+    """Cancellation state shared by everything one request started.
+
+    A scope is cancelled when its client disconnects or its deadline
+    passes. Cancelling sets ``event``, which local transcription threads
+    poll, and cancels the request's task unless the request is already
+    executing its command. Work that checks the scope between its own steps
+    counts what it skipped on the scope.
+
+    Args:
+        deadline: time.monotonic() value the request must finish by, or None
+        first_stage: First pipeline stage of the request's route
+    """
+
+    def __init__(self, deadline: Optional[float] = None, first_stage: Optional[str] = None):
+        self.deadline = deadline
+        self.first_stage = first_stage
+        self.stage: Optional[str] = None
+        self.event = threading.Event()
+        self.reason: Optional[str] = None
+        self.cancelled_in: Optional[str] = None
+        self.steps_skipped = 0
+        self.retries_skipped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        if self.reason is None and self.deadline is not None and self.remaining() <= 0:
+            self.cancel("deadline")
+        return self.reason is not None
+
+    @property
+    def interruptible(self) -> bool:
+        return self.stage not in UNINTERRUPTIBLE
+
+    def cancel(self, reason: str):
+        """Cancel the request; ``reason`` is "disconnect" or "deadline"."""
+        if self.reason is not None:
+            return
+        self.reason = reason
+        self.cancelled_in = self.stage
+        self.event.set()
+        if self.task is not None and self.interruptible and self.task is not _current_task():
+            self.task.cancel()
+
+    def enter(self, stage: str):
+        self.stage = stage
+
+    def stages_skipped(self):
+        """The stage that was interrupted and every stage after it."""
+        if self.reason is None:
+            return ()
+        stage = self.cancelled_in or self.first_stage
+        if stage in UNINTERRUPTIBLE and stage == self.stage:
+            # It was already running and finished
+            return ()
+        if stage not in PIPELINE:
+            return ()
+        return PIPELINE[PIPELINE.index(stage):]
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+_current_scope: ContextVar[Optional[CancelScope]] = ContextVar("current_scope", default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+def set_scope(scope: Optional[CancelScope]):
+    """Make ``scope`` current; returns a token for ``reset_scope``."""
+    return _current_scope.set(scope)
+
+
+def reset_scope(token):
+    _current_scope.reset(token)
+
+
+def cancel_event() -> Optional[threading.Event]:
+    """Event set when the current request is cancelled, for worker threads."""
+    scope = _current_scope.get()
+    return scope.event if scope is not None else None
+
+
+class CancellationStats:
+    """Counts of cancelled requests and of the work cancelling saved."""
+
+    def __init__(self):
+        self.requests = 0
+        self.cancelled: Counter = Counter()
+        self.stages_skipped: Counter = Counter()
+        self.steps_skipped = 0
+        self.retries_skipped = 0
+
+    def record(self, scope: CancelScope):
+        self.requests += 1
+        if scope.reason is not None:
+            self.cancelled[scope.reason] += 1
+        self.stages_skipped.update(scope.stages_skipped())
+        self.steps_skipped += scope.steps_skipped
+        self.retries_skipped += scope.retries_skipped
+
+    def summary(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "cancelled": dict(self.cancelled),
+            "stages_skipped": dict(self.stages_skipped),
+            "steps_skipped": self.steps_skipped,
+            "retries_skipped": self.retries_skipped,
+        }
+
+
+cancellation_stats = CancellationStats()
@@ -0,0 +1,174 @@
+import logging
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAX_FILE_BYTES = int(float(os.getenv("CLAWD_SEARCH_MAX_FILE_MB", "10")) * 1024 * 1024)
+MAX_FILES = int(os.getenv("CLAWD_SEARCH_MAX_FILES", "20000"))
+SEARCH_WORKERS = int(os.getenv("CLAWD_SEARCH_WORKERS", "0")) or os.cpu_count() or 1
+
+# Directories that are never worth walking for user documents
+SKIP_DIRS = {"node_modules", "__pycache__", "venv", "site-packages", "Library", "AppData"}
+
+# Known binary formats, skipped without opening them
+BINARY_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".heic",
+    ".mp3", ".wav", ".flac", ".ogg", ".opus", ".m4a", ".mp4", ".mov", ".mkv", ".webm",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".iso", ".dmg",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".odt", ".exe", ".dll", ".so", ".dylib",
+    ".pyc", ".o", ".a", ".class", ".jar", ".db", ".sqlite", ".bin",
+}
+
+# Files scanned per worker task, so IPC cost is paid per batch not per file
+BATCH_SIZE = 64
+# Below this many candidates a process pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+# Occurrences counted per term per file; enough to rank
+MAX_COUNT = 100
+
+
+def walk_files(root: Path) -> Iterator[Path]:
+    """Yield files under ``root``, skipping hidden and dependency directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS]
+        for name in filenames:
+            yield Path(dirpath) / name
+
+
+def _pattern(term: str) -> "re.Pattern[bytes]":
+    """Case-insensitive pattern for ``term``; compiled patterns are cached by re."""
+    return re.compile(rb"(?i)" + re.escape(term.encode("utf-8")))
+
+
+def _count(mm: mmap.mmap, pattern: "re.Pattern[bytes]") -> int:
+    count = 0
+    for _ in pattern.finditer(mm):
+        count += 1
+        if count >= MAX_COUNT:
+            break
+    return count
+
+
+def scan_file(path: str, terms: List[str], max_bytes: int = MAX_FILE_BYTES) -> int:
+    """Score one file for ``terms`` without reading it into memory.
+
+    The first term is the whole query; any others are its words, all of
+    which must occur. Returns 0 for non-matching, binary, empty, oversized
+    or unreadable files.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > max_bytes:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # NUL bytes near the start mean a binary file
+                if mm.find(b"\0", 0, min(size, 8192)) != -1:
+                    return 0
+                counts = [_count(mm, _pattern(term)) for term in terms]
+    except (OSError, ValueError):
+        return 0
+
+    phrase, words = counts[0], counts[1:]
+    if words and not all(words):
+        return 0
+    return phrase * 10 + sum(words) if words else phrase
+
+
+def _scan_batch(paths: List[str], terms: List[str], max_bytes: int) -> List[Tuple[str, int]]:
+    hits = []
+    for path in paths:
+        score = scan_file(path, terms, max_bytes)
+        if score:
+            hits.append((path, score))
+    return hits
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Searches run in threads, so two may want the pool at once
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SEARCH_WORKERS)
+        return _pool
+
+
+def search_contents(
+    query: str,
+    files: Iterable[Path],
+    limit: int = 10,
+    max_files: int = MAX_FILES,
+    max_bytes: int = MAX_FILE_BYTES
+) -> List[Tuple[Path, int]]:
+    """Find text files containing ``query``, best matches first.
+
+    Candidates are scanned in batches across a process pool with mmap, so
+    large trees use every core and file contents are never copied into
+    Python. Files whose name also contains the query rank higher.
+
+    Args:
+        query: Phrase to look for; multi-word queries need every word
+        files: Files to consider, e.g. from walk_files
+        limit: Maximum number of results
+        max_files: Maximum number of files scanned
+        max_bytes: Larger files are skipped
+
+    Returns:
+        List of (path, score)
+    """
+    query = query.strip()
+    words = re.findall(r"\w+", query)
+    if not words:
+        return []
+    terms = [query] + (words if len(words) > 1 else [])
+
+    candidates = []
+    for path in files:
+        if path.suffix.lower() not in BINARY_SUFFIXES:
+            candidates.append(str(path))
+            if len(candidates) >= max_files:
+                logger.warning("Content search stopped after %d files", max_files)
+                break
+
+    batches = [candidates[i:i + BATCH_SIZE] for i in range(0, len(candidates), BATCH_SIZE)]
+    if len(candidates) < PARALLEL_THRESHOLD:
+        results = [_scan_batch(batch, terms, max_bytes) for batch in batches]
+    else:
+        pool = _get_pool()
+        results = pool.map(_scan_batch, batches, [terms] * len(batches), [max_bytes] * len(batches))
+
+    lowered = query.lower()
+    hits = []
+    for batch in results:
+        for path, score in batch:
+            path = Path(path)
+            if lowered in path.name.lower():
+                score += 50
+            hits.append((path, score))
+    hits.sort(key=lambda hit: (-hit[1], str(hit[0])))
+    logger.info("Content search scanned %d files, %d matched", len(candidates), len(hits))
+    return hits[:limit]
+
+
+def shutdown():
+    """Stop the worker processes; the next search starts new ones."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
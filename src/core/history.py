@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    text TEXT NOT NULL,
+    action TEXT,
+    status TEXT NOT NULL,
+    interpretation TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_created_at ON commands (created_at);
+CREATE INDEX IF NOT EXISTS idx_commands_action_created_at ON commands (action, created_at);
+CREATE INDEX IF NOT EXISTS idx_commands_status_created_at ON commands (status, created_at);
+"""
+
+
+class CommandHistory:
+    """Persistent, indexed store of executed commands backed by SQLite."""
+
+    def __init__(self, db_path: str | Path = ":memory:"):
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared across the API's worker threads
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def record(
+        self,
+        source: str,
+        text: str,
+        result: Dict[str, Any],
+        interpretation: Optional[str] = None
+    ) -> int:
+        """Store a command and its result.
+
+        Args:
+            source: Where the command came from, "text" or "voice"
+            text: Typed command or transcription
+            result: Result returned by ComputerAgent.execute_command
+            interpretation: Optional AI interpretation of the command
+
+        Returns:
+            ID of the new entry
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO commands (created_at, source, text, action, status, interpretation, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    source,
+                    text,
+                    result.get("action"),
+                    result.get("status", "unknown"),
+                    interpretation,
+                    json.dumps(result),
+                )
+            )
+            return cursor.lastrowid
+
+    def query(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        action: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of entries, newest first, and the total match count."""
+        clauses, params = [], []
+        if action:
+            clauses.append("action = ?")
+            params.append(action)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since.timestamp())
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM commands {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM commands {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+        return [self._to_dict(row) for row in rows], total
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM commands WHERE id = ?", (entry_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def clear(self) -> int:
+        """Delete all entries and return how many were removed."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM commands").rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["created_at"] = datetime.fromtimestamp(entry["created_at"], tz=timezone.utc).isoformat()
+        entry["result"] = json.loads(entry["result"])
+        return entry
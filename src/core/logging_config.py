@@ -0,0 +1,126 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from src.core.tracing import current_span
+
+# Load environment variables
+load_dotenv()
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields and the active trace."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sample_every":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass only every Nth record from a call site that asks for sampling.
+
+    High-frequency call sites, such as per-frame audio logs, pass
+    ``extra={"sample_every": N}``; the first record and then every Nth one
+    get through, tagged with ``sampled=N``. Other records are untouched.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample_every", None)
+        if not every or every <= 1:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts[site]
+            self._counts[site] = count + 1
+        if count % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler formats every record before queueing it, which puts
+    the string work back on the calling thread. Records here are passed
+    through as-is, with only the trace context captured, since it lives in
+    the caller's context variables.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """Route all logging through a queue drained by a background thread.
+
+    Safe to call more than once; only the first call configures logging.
+
+    Args:
+        level: Root log level, defaults to CLAWD_LOG_LEVEL or INFO
+        fmt: "json" or "text", defaults to CLAWD_LOG_FORMAT or json
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv("CLAWD_LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.getenv("CLAWD_LOG_FORMAT", "json")
+    formatter = JSONFormatter() if fmt == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if os.getenv("CLAWD_LOG_FILE"):
+        handlers.append(logging.FileHandler(os.path.expanduser(os.getenv("CLAWD_LOG_FILE"))))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    if "site-packages" in path:
+        path = path.split("site-packages", 1)[1].lstrip(os.sep)
+    elif path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    # ";" separates frames in the folded format
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of all threads.
+
+    A background thread reads every other thread's current frame at a fixed
+    interval, so the profiled code runs unmodified and the overhead stays
+    small enough for production. Results are in the folded stack format
+    read by flamegraph.pl, speedscope and inferno.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+
+    def run(self, seconds: float) -> str:
+        """Sample for ``seconds`` in the calling thread and return folded stacks."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self._stacks[";".join([names.get(ident, str(ident)), *reversed(stack)])] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return self.folded()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+
+class LoopLagMonitor:
+    """Detect callbacks that hold the event loop and capture what they were doing.
+
+    A heartbeat task on the loop updates a timestamp every ``interval``. A
+    watchdog thread checks it; once the loop has not run for longer than
+    ``threshold`` it dumps the loop thread's stack, which shows the blocking
+    callback while it is still running.
+
+    Args:
+        threshold: Seconds the loop may be held before a stall is recorded
+        interval: Heartbeat and watchdog period in seconds
+        max_stalls: Number of recent stalls kept
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.05, max_stalls: int = 20):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: deque = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop; call from a coroutine on it."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Event loop lag monitor started (%.0f ms threshold)", self.threshold * 1000)
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._beat = now
+
+    def _watch(self):
+        stall: Optional[Dict] = None
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._beat
+            if blocked <= self.threshold:
+                stall = None
+                continue
+            if stall is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+                stall = {"started": time.time() - blocked, "blocked_ms": 0.0, "stack": stack}
+                self.stalls.append(stall)
+                self.stall_count += 1
+                logger.warning("Event loop blocked for more than %.0f ms in:\n%s", blocked * 1000, stack)
+            stall["blocked_ms"] = round(blocked * 1000, 1)
+
+    def summary(self) -> Dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stall_count,
+            "recent": list(self.stalls),
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+def profile(seconds: float, interval: float = 0.005) -> Optional[str]:
+    """Profile the whole process; returns None if a profile is already running."""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        return SamplingProfiler(interval).run(seconds)
+    finally:
+        _profile_lock.release()
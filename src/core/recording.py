@@ -0,0 +1,174 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from src.core.agent import CommandParser
+from src.core.tracing import JSONLExporter, Span, collect_spans
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Span attributes worth keeping for replay; everything else stays in traces
+KEPT_ATTRIBUTES = (
+    "stt_path", "stt_profile", "decoder", "audio_seconds", "queue_wait_ms", "model",
+    "ttft_ms", "input_tokens", "cache_read_tokens", "attempts",
+)
+
+
+class Recording:
+    """What one request did, in the compact form written to the replay file.
+
+    Command text, note contents and search terms are never stored, only
+    their lengths, so recordings can be shared without leaking what users
+    said. Audio is stored as a hash unless the recorder keeps audio files.
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.time()
+        self.data: Dict[str, Any] = {"route": route, "ts": round(self.started, 3)}
+        self.spans: Dict[str, Dict[str, Any]] = {}
+
+    def add_span(self, span: Span):
+        entry = self.spans.setdefault(span.name, {"ms": 0.0})
+        entry["ms"] = round(entry["ms"] + span.duration_ms, 3)
+        if span.status != "ok":
+            entry["status"] = span.status
+        for key in KEPT_ATTRIBUTES:
+            if key in span.attributes and span.attributes[key] is not None:
+                entry[key] = span.attributes[key]
+
+    def set_command(self, text: str, intent: Optional[Dict[str, Any]] = None):
+        """Record the command's length and the actions it maps to."""
+        plan = CommandParser.plan(text, intent)
+        self.data["chars"] = len(text)
+        self.data["intent"] = "tool" if intent else "parser"
+        self.data["actions"] = [
+            {"action": step["action"], "chars": len(step["params"]), "depends_on": step["depends_on"],
+             **({"content": step["content"]} if "content" in step else {})}
+            for step in plan
+        ]
+
+    def to_dict(self, status: int) -> Dict[str, Any]:
+        return {
+            **self.data,
+            "status": status,
+            "total_ms": round((time.time() - self.started) * 1000, 3),
+            "spans": self.spans,
+        }
+
+
+_current_recording: ContextVar[Optional[Recording]] = ContextVar("current_recording", default=None)
+
+
+def current_recording() -> Optional[Recording]:
+    return _current_recording.get()
+
+
+def record_command(text: str, intent: Optional[Dict[str, Any]] = None):
+    """Add the command to the request being recorded; a no-op otherwise."""
+    recording = _current_recording.get()
+    if recording is not None:
+        recording.set_command(text, intent)
+
+
+class RequestRecorder:
+    """Opt-in recorder of production requests for performance replay.
+
+    Each sampled request is appended to ``path`` as one JSON line holding
+    the route, command length, audio format, size, duration and hash, the
+    selected actions, and the duration and key attributes of every span in
+    the request: stages, provider calls and system actions. Lines are
+    written from a background thread, like trace spans.
+
+    Args:
+        path: Replay file, or None to disable recording
+        sample_rate: Fraction of requests recorded
+        audio_dir: Directory to keep uploaded audio in, named by hash; only
+            hashes are recorded when None
+    """
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 1.0, audio_dir: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.audio_dir = Path(audio_dir).expanduser() if audio_dir else None
+        self._writer = JSONLExporter(path) if path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    @contextmanager
+    def record(self, route: str) -> Iterator[Optional[Recording]]:
+        """Record the request handled in the block; yields None when not sampled."""
+        if self._writer is None or random.random() >= self.sample_rate:
+            yield None
+            return
+        recording = Recording(route)
+        status = 200
+        token = _current_recording.set(recording)
+        try:
+            with collect_spans(recording.add_span):
+                yield recording
+        except BaseException as e:
+            status = getattr(e, "status_code", 500)
+            raise
+        finally:
+            _current_recording.reset(token)
+            self._writer.export([recording.to_dict(status)])
+
+    def recorded(self, route: str):
+        """Decorator recording every call of an async route handler."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.record(route):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add_audio(self, recording: Optional[Recording], path: str):
+        """Describe an uploaded audio file, keeping a copy if configured. Blocking."""
+        if recording is None:
+            return
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        suffix = Path(path).suffix.lower()
+        audio = {"format": suffix.lstrip("."), "bytes": os.path.getsize(path), "sha256": digest.hexdigest()}
+        if self.audio_dir is not None:
+            self.audio_dir.mkdir(parents=True, exist_ok=True)
+            kept = self.audio_dir / f"{audio['sha256']}{suffix}"
+            if not kept.exists():
+                shutil.copyfile(path, kept)
+        recording.data["audio"] = audio
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+
+def load_recordings(path: str) -> List[Dict[str, Any]]:
+    """Read a replay file written by RequestRecorder."""
+    with open(Path(path).expanduser(), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+recorder = RequestRecorder(
+    os.getenv("CLAWD_RECORD_FILE"),
+    sample_rate=float(os.getenv("CLAWD_RECORD_SAMPLE", "1.0")),
+    audio_dir=os.getenv("CLAWD_RECORD_AUDIO_DIR")
+)
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from src.core.cancellation import current_scope
+from src.core.tracing import add_attributes
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} circuit open, retry in {retry_after:.1f}s")
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent calls to one provider.
+
+    Each success grows the limit by roughly one per window of calls; a 429
+    halves it, and latency well above the observed baseline shrinks it
+    gently. Callers beyond the current limit wait for a free slot, so a
+    provider brown-out reduces load instead of multiplying it.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.5
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.inflight = 0
+        self.baseline_latency: Optional[float] = None
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.inflight < max(int(self.limit), self.min_limit))
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.inflight -= 1
+                self._condition.notify_all()
+
+    def on_success(self, latency: float):
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        if latency > self.baseline_latency * self.latency_tolerance:
+            self.limit = max(float(self.min_limit), self.limit * 0.9)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        # Follows improvements immediately and degradations slowly
+        self.baseline_latency = min(latency, 0.95 * self.baseline_latency + 0.05 * latency)
+
+    def on_overload(self):
+        self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+
+
+class CircuitBreaker:
+    """Fail fast after repeated provider failures, then probe for recovery.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately for ``reset_timeout`` seconds. It then goes
+    half-open and lets ``half_open_probes`` calls through; a success closes
+    it, a failure opens it again, and a cancelled probe frees its slot for
+    the next call.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+    def before_call(self, provider: str):
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(provider, remaining)
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("%s circuit half-open, sending probe", provider)
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                raise CircuitOpenError(provider, 1.0)
+            self._probes += 1
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_cancelled(self):
+        """Return the probe slot of a call cancelled before it had an outcome."""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read retry-after-ms or retry-after from an SDK error's HTTP response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderGuard:
+    """Adaptive concurrency, retries with backoff and a circuit breaker for one provider.
+
+    Args:
+        name: Provider name used in logs and errors
+        transient_errors: Exception types worth retrying besides 429 and 5xx
+            responses, e.g. connection errors
+        base_delay: First backoff step in seconds
+        max_delay: Backoff cap in seconds
+    """
+
+    def __init__(
+        self,
+        name: str,
+        transient_errors: Tuple[Type[BaseException], ...] = (),
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0
+    ):
+        self.name = name
+        self.transient_errors = transient_errors
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def classify(self, error: Exception) -> str:
+        """Return "rate_limit", "transient" or "fatal"."""
+        status = getattr(error, "status_code", None)
+        if status == 429:
+            return "rate_limit"
+        if (status is not None and status >= 500) or isinstance(error, self.transient_errors):
+            return "transient"
+        return "fatal"
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server asked."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.base_delay)
+        return delay
+
+    async def call(self, fn: Callable[[], Awaitable[T]], max_retries: int = 2) -> T:
+        """Call ``fn`` under the guard, retrying rate limits and transient errors.
+
+        Raises:
+            CircuitOpenError: The breaker is open; the provider was not called
+            Exception: The last error once retries are exhausted or the
+                request's deadline would pass before the next attempt, or
+                any non-retryable error straight away
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call(self.name)
+            try:
+                async with self.limiter.slot():
+                    start = time.monotonic()
+                    try:
+                        result = await fn()
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        kind = self.classify(e)
+                        error = e
+                    else:
+                        self.limiter.on_success(time.monotonic() - start)
+                        self.breaker.record_success()
+                        add_attributes(attempts=attempt + 1)
+                        return result
+            except asyncio.CancelledError:
+                # A hedging loser or an abandoned request says nothing about
+                # the provider; a half-open probe must not stay claimed
+                self.breaker.record_cancelled()
+                raise
+
+            add_attributes(attempts=attempt + 1, last_error=kind)
+            if kind == "fatal":
+                # The provider answered; the request itself was bad
+                self.breaker.record_success()
+                raise error
+            if kind == "rate_limit":
+                self.limiter.on_overload()
+            self.breaker.record_failure()
+
+            if attempt >= max_retries:
+                logger.error("%s %s error, giving up after %d attempts: %s", self.name, kind, attempt + 1, error)
+                raise error
+            delay = self.backoff(attempt, retry_after_seconds(error))
+            scope = current_scope()
+            if scope is not None and scope.deadline is not None and delay >= scope.remaining():
+                # The retry could not answer before the request is cancelled
+                scope.retries_skipped += 1
+                logger.error("%s %s error, no time left to retry before the request deadline: %s",
+                             self.name, kind, error)
+                raise error
+            logger.warning(
+                "%s %s error (attempt %d), retrying in %.2fs with concurrency limit %d",
+                self.name, kind, attempt + 1, delay, int(self.limiter.limit)
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def summary(self) -> Dict:
+        return {
+            "concurrency_limit": int(self.limiter.limit),
+            "inflight": self.limiter.inflight,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+_guards: Dict[str, ProviderGuard] = {}
+
+
+def provider_guard(name: str, **kwargs) -> ProviderGuard:
+    """Return the process-wide guard for ``name``, creating it on first use."""
+    if name not in _guards:
+        _guards[name] = ProviderGuard(name, **kwargs)
+    return _guards[name]
+
+
+def guard_summaries() -> Dict[str, Dict]:
+    return {name: guard.summary() for name, guard in _guards.items()}
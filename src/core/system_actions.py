@@ -1,13 +1,21 @@
+import itertools
 import os
+import logging
 import subprocess
 import platform
 from pathlib import Path
 from typing import List, Optional
 
+from .file_search import search_contents, walk_files
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
 class SystemActionHandler:
     def __init__(self):
         self.os_type = platform.system().lower()
     
+    @tracer.traced("system.open_application")
     def open_application(self, app_name: str) -> bool:
         """Open an application by name."""
         try:
@@ -19,37 +27,60 @@ class SystemActionHandler:
                 subprocess.Popen([app_name])
             return True
         except Exception as e:
-            print(f"Error opening application {app_name}: {e}")
+            logger.error("Error opening application %s: %s", app_name, e)
             return False
     
-    def search_files(self, query: str, path: Optional[Path] = None) -> List[Path]:
-        """Search for files matching the query."""
+    @tracer.traced("system.search_files")
+    def search_files(self, query: str, path: Optional[Path] = None, content: bool = False) -> List[Path]:
+        """Search for files whose name, or with ``content`` whose text, matches the query."""
         if path is None:
             path = Path.home()
         
         results = []
         try:
-            for item in path.rglob(f"*{query}*"):
-                if item.is_file():
+            if content:
+                return [item for item, _ in search_contents(query, walk_files(path), limit=10)]
+            
+            query = query.lower()
+            for item in walk_files(path):
+                if query in item.name.lower():
                     results.append(item)
+                    if len(results) == 10:  # Limit results to 10 files
+                        break
         except Exception as e:
-            print(f"Error searching files: {e}")
+            logger.error("Error searching files: %s", e)
         
-        return results[:10]  # Limit results to 10 files
+        return results
     
+    @tracer.traced("system.create_note")
     def create_note(self, content: str, filename: Optional[str] = None) -> Optional[Path]:
-        """Create a text note."""
+        """Create a text note.
+
+        Without a filename the note is named after the current time, with a
+        counter added when several notes are created in the same second, as
+        the steps of a compound command are; an existing note is never
+        overwritten.
+        """
         try:
             notes_dir = Path.home() / "Documents" / "CLAWD_Notes"
             notes_dir.mkdir(parents=True, exist_ok=True)
             
-            if not filename:
-                from datetime import datetime
-                filename = f"note_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            if filename:
+                file_path = notes_dir / filename
+                file_path.write_text(content)
+                return file_path
             
-            file_path = notes_dir / filename
-            file_path.write_text(content)
-            return file_path
+            from datetime import datetime
+            stem = f"note_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            for n in itertools.count(1):
+                file_path = notes_dir / (f"{stem}.txt" if n == 1 else f"{stem}_{n}.txt")
+                try:
+                    # Exclusive create, so concurrent steps cannot pick the same name
+                    with open(file_path, "x") as f:
+                        f.write(content)
+                    return file_path
+                except FileExistsError:
+                    continue
         except Exception as e:
-            print(f"Error creating note: {e}")
+            logger.error("Error creating note: %s", e)
             return None 
\ No newline at end of file
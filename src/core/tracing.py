@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return (trace_id, parent span_id) from a traceparent header, if valid."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    service: str = "api"
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def add_attributes(**attributes):
+    """Attach attributes to the active span; a no-op outside any span."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+_span_collectors: ContextVar[Tuple[Callable[[Span], None], ...]] = ContextVar("span_collectors", default=())
+
+
+@contextmanager
+def collect_spans(callback: Callable[[Span], None]):
+    """Also pass every span finished in this context to ``callback``.
+
+    Works whether or not an exporter is configured, and follows the context
+    into tasks and worker threads started from the block.
+    """
+    token = _span_collectors.set(_span_collectors.get() + (callback,))
+    try:
+        yield
+    finally:
+        _span_collectors.reset(token)
+
+
+class SpanExporter(ABC):
+    """Writes finished spans from a background thread so requests never wait on I/O."""
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: Iterable[Dict[str, Any]]):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        for span in spans:
+            self._queue.put(span)
+
+    def flush(self):
+        """Block until everything exported so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error("Failed to export %d spans: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @abstractmethod
+    def _write(self, batch: List[Dict[str, Any]]):
+        """Write one batch of spans; called from the export thread."""
+
+
+class JSONLExporter(SpanExporter):
+    """Append one JSON object per span to a local file.
+
+    Args:
+        path: File to append to
+        max_bytes: Once the file reaches this size it is renamed to
+            ``<path>.1``, replacing the previous one, and a new file is
+            started; unbounded when None
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+
+    def _write(self, batch):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.max_bytes is not None and self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+            self.path.replace(rotated_path(self.path))
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in batch:
+                f.write(json.dumps(span) + "\n")
+
+
+class OTLPExporter(SpanExporter):
+    """Post spans as OTLP/HTTP JSON, e.g. to a local OpenTelemetry collector or Jaeger."""
+
+    def __init__(self, endpoint: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.session = requests.Session()
+
+    def _write(self, batch):
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for span in batch:
+            by_service.setdefault(span["service"], []).append(span)
+        payload = {"resourceSpans": [
+            {
+                "resource": {"attributes": [_otlp_attribute("service.name", f"clawd-{service}")]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }
+            for service, spans in by_service.items()
+        ]}
+        self.session.post(self.url, json=payload, timeout=5).raise_for_status()
+
+
+def rotated_path(path) -> Path:
+    path = Path(path).expanduser()
+    return path.with_name(path.name + ".1")
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span["trace_id"],
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": 1,
+        "startTimeUnixNano": str(int(span["start"] * 1e9)),
+        "endTimeUnixNano": str(int((span["end"] or span["start"]) * 1e9)),
+        "attributes": [_otlp_attribute(k, v) for k, v in span["attributes"].items()],
+        "status": {"code": 2 if span["status"] == "error" else 1},
+    }
+    if span["parent_id"]:
+        encoded["parentSpanId"] = span["parent_id"]
+    return encoded
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter.
+
+    Args:
+        exporter: Destination for finished spans, or None to disable tracing
+        service: Service name recorded on every span
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, service: str = "api"):
+        self.exporter = exporter
+        self.service = service
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Run the block in a child of the active span, or of ``traceparent``.
+
+        A new trace is started when there is neither.
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = parse_traceparent(traceparent) or (new_trace_id(), None)
+
+        span = Span(name, trace_id, new_span_id(), parent_id, service=self.service, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time()
+            for collect in _span_collectors.get():
+                collect(span)
+            if self.exporter is not None:
+                self.exporter.export([span.to_dict()])
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator running a function, sync or async, inside a span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def export(self, spans: Iterable[Dict[str, Any]]):
+        """Export spans recorded elsewhere, e.g. submitted by the frontend."""
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+
+TRACE_FILE = os.getenv("CLAWD_TRACE_FILE", str(Path.home() / ".clawd" / "traces.jsonl"))
+# At most twice this is kept on disk: the current file and one rotated file
+TRACE_FILE_MAX_BYTES = int(os.getenv("CLAWD_TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+def create_exporter(kind: str) -> Optional[SpanExporter]:
+    if kind == "jsonl":
+        return JSONLExporter(TRACE_FILE, max_bytes=TRACE_FILE_MAX_BYTES)
+    if kind == "otlp":
+        return OTLPExporter(os.getenv("CLAWD_OTLP_ENDPOINT", "http://localhost:4318"))
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown trace exporter: {kind}")
+
+
+tracer = Tracer(create_exporter(os.getenv("CLAWD_TRACE_EXPORTER", "jsonl")))
+
+
+def load_trace(path: str, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read the spans of one trace from a JSONL file; the latest trace if no ID is given.
+
+    The rotated file is read too, so a trace written across a rotation is whole.
+    """
+    rotated = rotated_path(path)
+    parts = [rotated] if rotated.exists() else []
+    spans = []
+    for part in parts + [Path(path).expanduser()]:
+        with open(part, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    spans.append(json.loads(line))
+    if trace_id is None:
+        if not spans:
+            return []
+        trace_id = max(spans, key=lambda s: s["start"])["trace_id"]
+    return [span for span in spans if span["trace_id"].startswith(trace_id)]
+
+
+def render_waterfall(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """Render spans as an indented tree with a time bar per span."""
+    if not spans:
+        return "No spans found"
+    start = min(span["start"] for span in spans)
+    end = max(span["end"] or span["start"] for span in spans)
+    total = max(end - start, 1e-9)
+
+    ids = {span["span_id"] for span in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        # Spans whose parent was not exported are shown at the top level
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children.setdefault(parent, []).append(span)
+
+    lines = [f"trace {spans[0]['trace_id']}  {total * 1000:.1f} ms"]
+
+    def walk(parent: Optional[str], depth: int):
+        for span in sorted(children.get(parent, []), key=lambda s: s["start"]):
+            offset = int((span["start"] - start) / total * width)
+            length = max(int(span["duration_ms"] / 1000 / total * width), 1)
+            bar = " " * offset + "█" * min(length, width - offset)
+            label = "  " * depth + f"{span['service']}:{span['name']}"
+            flag = " !" if span["status"] == "error" else ""
+            lines.append(f"{label:<40.40} {bar:<{width}} {span['duration_ms']:>9.1f} ms{flag}")
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Print the waterfall of a recorded trace")
+    parser.add_argument("trace_id", nargs="?", help="Trace ID or prefix")
+    parser.add_argument("--last", action="store_true", help="Show the most recent trace")
+    parser.add_argument("--file", default=TRACE_FILE, help="JSONL trace file")
+    parser.add_argument("--width", type=int, default=50, help="Width of the time bars")
+    args = parser.parse_args(argv)
+    if not args.trace_id and not args.last:
+        parser.error("give a trace ID or --last")
+
+    try:
+        spans = load_trace(args.file, None if args.last else args.trace_id)
+    except FileNotFoundError:
+        print(f"No trace file at {args.file}", file=sys.stderr)
+        return 1
+    print(render_waterfall(spans, width=args.width))
+    return 0 if spans else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
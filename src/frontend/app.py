@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
 import json
+import hashlib
+import uuid
 from pathlib import Path
 import tempfile
 import os
@@ -8,12 +10,27 @@ from streamlit_webrtc import webrtc_streamer, MediaStreamConstraints, RTCConfigu
 import av
 import numpy as np
 import wave
-from datetime import datetime
-from typing import Optional
-from collections import deque
+import queue
+import threading
 import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any
 import logging
 
+import sys
+
+if __package__ is None or not __package__.startswith("src."):
+    # Launched via `streamlit run src/frontend/app.py`; make `src` importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.frontend.audio import (
+    SampleBuffer, RingBuffer, VoiceActivityDetector, window_stats, encode_audio, ENCODINGS
+)
+from src.frontend.tracing import ClientTrace
+from src.voice.profiles import PROFILES
+from src.core.logging_config import setup_logging
+
 # Configure the app
 st.set_page_config(
     page_title="CLAWD Agent",
@@ -24,27 +41,240 @@ st.set_page_config(
 # Constants
 API_BASE_URL = "http://localhost:8000"
 SAMPLE_RATE = 16000
+UPLOAD_FORMAT = os.getenv("CLAWD_UPLOAD_FORMAT", "opus")  # "opus" or "flac"
+COMMAND_RETRIES = 2  # resends after a connection error; safe with an Idempotency-Key
+COMMAND_TIMEOUT = 90  # seconds; sent as the server's deadline for each command
+# Commands already executing finish past the deadline, so wait longer than
+# it for the server's 504 or its late result
+COMMAND_READ_TIMEOUT = COMMAND_TIMEOUT + 30
 
-logging.basicConfig(level=logging.DEBUG)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+def get_http_session() -> requests.Session:
+    """Return the keep-alive HTTP session shared by this Streamlit session."""
+    if 'http_session' not in st.session_state:
+        st.session_state.http_session = requests.Session()
+    return st.session_state.http_session
+
+def command_key(name: str, payload: bytes) -> str:
+    """Idempotency key for a command, reused until the command gets an answer.
+
+    A rerun that sends the same payload again before the first attempt was
+    answered reuses the key, so the server runs the command only once.
+    """
+    pending = st.session_state.setdefault("pending_commands", {})
+    fingerprint = hashlib.sha256(payload).hexdigest()
+    if name not in pending or pending[name][0] != fingerprint:
+        pending[name] = (fingerprint, uuid.uuid4().hex)
+    return pending[name][1]
+
+def command_answered(name: str):
+    st.session_state.setdefault("pending_commands", {}).pop(name, None)
+
+def post_command(
+    session: requests.Session,
+    url: str,
+    key: str,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs
+) -> requests.Response:
+    """POST a command with an Idempotency-Key, resending it on connection errors."""
+    headers = {**(headers or {}), "Idempotency-Key": key, "X-Request-Timeout": str(COMMAND_TIMEOUT)}
+    for attempt in range(COMMAND_RETRIES + 1):
+        try:
+            return session.post(url, headers=headers, timeout=COMMAND_READ_TIMEOUT, **kwargs)
+        except requests.ConnectionError as e:
+            if attempt == COMMAND_RETRIES:
+                raise
+            logger.warning("Resending command after connection error: %s", e)
+            time.sleep(0.5 * (attempt + 1))
+
+def trace_span(trace: Optional[ClientTrace], name: str, **attributes):
+    """Time a step of the command; yields the headers to send with its request."""
+    return trace.span(name, **attributes) if trace else nullcontext({})
+
+def finish_trace(trace: Optional[ClientTrace]):
+    """Submit the frontend's spans and show the trace ID for the waterfall CLI."""
+    if trace:
+        trace.finish(get_http_session(), API_BASE_URL)
+        st.caption(f"Trace `{trace.trace_id}` (waterfall: `python -m src.core.tracing {trace.trace_id}`)")
+
+class ChunkUploader:
+    """Stream recorded PCM to the API from a background thread.
+
+    The WebRTC callback only enqueues samples; a worker thread batches them
+    into chunks, FLAC-encodes each one and posts them so the server can
+    decode and assemble the audio while recording continues.
+    """
+    
+    def __init__(
+        self,
+        session: requests.Session,
+        chunk_seconds: float = 0.5,
+        trace: Optional[ClientTrace] = None
+    ):
+        self.session = session
+        self.trace = trace
+        self.chunk_bytes = int(SAMPLE_RATE * chunk_seconds) * 2
+        self.pcm_bytes = 0  # bytes before encoding
+        self.bytes_sent = 0  # bytes over the wire
+        self.stream_id: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.finish_sent = False  # once True the command may have run
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+
+    def start(self):
+        with trace_span(self.trace, "stream.start") as headers:
+            response = self.session.post(
+                f"{API_BASE_URL}/voice/stream/start",
+                params={"sample_rate": SAMPLE_RATE, "encoding": "flac"},
+                headers=headers
+            )
+        response.raise_for_status()
+        self.stream_id = response.json()["stream_id"]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, samples: np.ndarray):
+        """Queue samples for upload without blocking the audio thread."""
+        self._queue.put(samples.astype(np.int16).tobytes())
+
+    def _post_chunk(self, pcm: bytes):
+        data = encode_audio(np.frombuffer(pcm, dtype=np.int16), "flac")
+        with trace_span(self.trace, "stream.chunk", seq=self._seq, bytes=len(data)) as headers:
+            response = self.session.post(
+                f"{API_BASE_URL}/voice/stream/{self.stream_id}/chunk",
+                params={"seq": self._seq},
+                data=data,
+                headers={"Content-Type": "application/octet-stream", **headers}
+            )
+        response.raise_for_status()
+        self._seq += 1
+        self.pcm_bytes += len(pcm)
+        self.bytes_sent += len(data)
+
+    def _run(self):
+        pending = bytearray()
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self.error:
+                continue
+            pending.extend(data)
+            if len(pending) >= self.chunk_bytes:
+                try:
+                    self._post_chunk(bytes(pending))
+                except Exception as e:
+                    logger.error("Error streaming audio chunk: %s", e)
+                    self.error = e
+                pending.clear()
+        if pending and not self.error:
+            try:
+                self._post_chunk(bytes(pending))
+            except Exception as e:
+                logger.error("Error streaming audio chunk: %s", e)
+                self.error = e
+
+    @property
+    def key(self) -> str:
+        """Idempotency key of the streamed command, reused by its fallback."""
+        return f"stream-{self.stream_id}"
+
+    def abort(self):
+        """Stop the worker without processing; the server expires the stream."""
+        self._queue.put(None)
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush remaining audio and ask the server to process the stream."""
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join()
+        if self.error:
+            raise self.error
+        self.finish_sent = True
+        with trace_span(self.trace, "stream.finish") as headers:
+            response = post_command(
+                self.session,
+                f"{API_BASE_URL}/voice/stream/{self.stream_id}/finish",
+                key=self.key,
+                headers=headers
+            )
+        response.raise_for_status()
+        logger.info(
+            "Streamed %d bytes for %d bytes of PCM (%.0f%%)",
+            self.bytes_sent, self.pcm_bytes, 100 * self.bytes_sent / max(self.pcm_bytes, 1)
+        )
+        return response.json()
+
 class AudioRecorder:
     def __init__(self):
-        self.audio_chunks = []
+        self.samples = SampleBuffer()
         self.recording = False
         self.recorded_file: Optional[str] = None
-        # Add buffer for visualization
-        self.audio_buffer = deque(maxlen=1000)  # Store ~1 second of audio at 16kHz
-        self.last_update = time.time()
+        self.uploader: Optional[ChunkUploader] = None
+        self.trace: Optional[ClientTrace] = None
+        self._capture_start = 0.0
+        # Hands-free mode: capture starts on speech and stops after silence
+        self.vad: Optional[VoiceActivityDetector] = None
+        self.auto_stopped = False
+        self._offset = 0  # absolute index of samples[0]
+        self._sent = 0  # absolute index of the next sample to upload
+        # Visualization buffers: ~10 seconds of 10ms windows
+        self.audio_buffer = RingBuffer(maxlen=1000)  # RMS per window
+        self.envelope = RingBuffer(maxlen=1000, width=2)  # (min, max) per window
 
-    def start_recording(self):
-        self.audio_chunks = []
+    def start_recording(
+        self,
+        uploader: Optional[ChunkUploader] = None,
+        vad: Optional[VoiceActivityDetector] = None,
+        trace: Optional[ClientTrace] = None
+    ):
+        self.samples.clear()
+        self.uploader = uploader
+        self.trace = trace
+        self._capture_start = time.time()
+        self.vad = vad
+        if vad:
+            vad.reset()
+        self.auto_stopped = False
+        self._offset = 0
+        self._sent = 0
         self.recording = True
         self.recorded_file = None
         self.audio_buffer.clear()
+        self.envelope.clear()
+
+    def _speech_bounds(self) -> tuple:
+        """Absolute [start, end) of the audio worth keeping."""
+        end = self._offset + len(self.samples)
+        if not self.vad:
+            return self._offset, end
+        if not self.vad.triggered:
+            return end, end
+        pad = self.vad.padding_samples
+        return (
+            max(self.vad.speech_start - pad, self._offset),
+            min(self.vad.speech_end + pad, end)
+        )
+
+    def trimmed(self) -> np.ndarray:
+        """Recorded samples with leading and trailing silence removed."""
+        start, end = self._speech_bounds()
+        return self.samples.view()[start - self._offset:end - self._offset]
 
     def stop_recording(self) -> Optional[str]:
-        if not self.audio_chunks:
+        self.recording = False
+        audio = self.trimmed()
+        if self.trace:
+            self.trace.add_span(
+                "capture", self._capture_start, time.time(),
+                audio_seconds=round(len(audio) / SAMPLE_RATE, 2), hands_free=self.vad is not None
+            )
+        if len(audio) == 0:
             return None
 
         # Create temporary WAV file
@@ -53,92 +283,221 @@ class AudioRecorder:
             wf.setnchannels(1)
             wf.setsampwidth(2)
             wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(b''.join(self.audio_chunks))
+            wf.writeframes(audio.tobytes())
 
         self.recorded_file = temp_file.name
-        self.recording = False
         self.audio_buffer.clear()
+        self.envelope.clear()
         return temp_file.name
 
+    def encode(self, fmt: str = UPLOAD_FORMAT) -> bytes:
+        """Return the trimmed recording compressed for upload."""
+        return encode_audio(self.trimmed(), fmt)
+
     def process_audio(self, frame):
-        logger.debug(f"Processing audio frame: {frame}")
+        logger.debug("Processing audio frame: %s", frame, extra={"sample_every": 100})
         if self.recording:
             try:
                 sound = frame.to_ndarray(format="s16")
-                logger.debug(f"Sound array shape: {sound.shape}")
+                logger.debug("Sound array shape: %s", sound.shape, extra={"sample_every": 100})
                 sound = sound.reshape(-1)  # Convert to mono
                 
-                # Add to recording chunks
-                self.audio_chunks.append(sound.tobytes())
+                # Add to recording buffer
+                self.samples.extend(sound)
+                if self.vad:
+                    self.vad.update(sound)
+                    if not self.vad.triggered:
+                        # Until speech starts only the pre-roll is kept
+                        self._offset += self.samples.keep_last(self.vad.preroll_samples)
+                
+                if self.uploader:
+                    # Upload up to the end of speech; trailing silence is held
+                    # back and dropped if the recording ends there
+                    start, end = self._speech_bounds()
+                    start = max(start, self._sent)
+                    if end > start:
+                        self.uploader.send(self.samples.view()[start - self._offset:end - self._offset])
+                        self._sent = end
                 
-                # Update visualization buffer (downsample if needed)
-                current_time = time.time()
-                if current_time - self.last_update > 0.05:  # Update every 50ms
-                    # Calculate RMS amplitude for visualization
-                    chunk_size = 160  # 10ms at 16kHz
-                    for i in range(0, len(sound), chunk_size):
-                        chunk = sound[i:i + chunk_size]
-                        if len(chunk) == chunk_size:  # Only process full chunks
-                            rms = np.sqrt(np.mean(chunk.astype(np.float32)**2))
-                            self.audio_buffer.append(rms)
-                    self.last_update = current_time
+                if self.vad and self.vad.ended:
+                    logger.info("Silence detected, stopping recording")
+                    self.recording = False
+                    self.auto_stopped = True
+                
+                # Update visualization buffers
+                rms, envelope = window_stats(sound)
+                self.audio_buffer.extend(rms)
+                self.envelope.extend(envelope)
                     
             except Exception as e:
-                logger.error(f"Error processing audio frame: {e}")
+                logger.error("Error processing audio frame: %s", e, extra={"sample_every": 50})
         return frame
 
-def save_uploaded_file(uploaded_file):
-    """Save uploaded file to temp directory and return path."""
-    try:
-        suffix = Path(uploaded_file.name).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            return tmp_file.name
-    except Exception as e:
-        st.error(f"Error saving file: {e}")
-        return None
+def show_voice_result(result: Dict[str, Any]):
+    """Display the response of a processed voice command."""
+    # Display results
+    st.success("Audio processed successfully!")
+    st.markdown("#### Transcribed Command:")
+    st.write(result["transcribed_text"])
+    
+    st.markdown("#### Command Result:")
+    st.json(result["command_result"])
 
-def process_audio_file(file_path: str):
-    logger.debug(f"Processing file: {file_path}")
+def process_audio_bytes(
+    filename: str,
+    data: bytes,
+    trace: Optional[ClientTrace] = None,
+    profile: Optional[str] = None,
+    key: Optional[str] = None
+):
+    logger.debug("Processing audio: %s", filename)
     try:
-        with open(file_path, 'rb') as f:
-            files = {'audio_file': f}
-            logger.debug("Sending request to API...")
-            response = requests.post(
+        logger.debug("Sending request to API...")
+        with trace_span(trace, "process-voice", bytes=len(data)) as headers:
+            response = post_command(
+                get_http_session(),
                 f"{API_BASE_URL}/voice/process-voice",
-                files=files
+                key=key or command_key("process-voice", data + (profile or "").encode()),
+                files={'audio_file': (filename, data)},
+                params={"profile": profile} if profile else None,
+                headers=headers
             )
-            logger.debug(f"API Response: {response.status_code}")
+        command_answered("process-voice")
+        logger.debug("API Response: %s", response.status_code)
             
         if response.status_code == 200:
-            result = response.json()
-            
-            # Add to logs
-            st.session_state.logs.append({
-                "type": "transcription",
-                "text": result["transcribed_text"],
-                "result": result["command_result"]
-            })
-            
-            # Display results
-            st.success("Audio processed successfully!")
-            st.markdown("#### Transcribed Command:")
-            st.write(result["transcribed_text"])
-            
-            st.markdown("#### Command Result:")
-            st.json(result["command_result"])
+            show_voice_result(response.json())
         else:
             st.error(f"Error: {response.status_code} - {response.text}")
     except Exception as e:
         st.error(f"Error processing request: {e}")
 
+def process_recording(recorder: AudioRecorder, key: Optional[str] = None):
+    """Compress the finished recording and upload it in one request."""
+    pcm_bytes = len(recorder.samples) * 2
+    with trace_span(recorder.trace, "encode", format=UPLOAD_FORMAT):
+        data = recorder.encode(UPLOAD_FORMAT)
+    logger.info("Encoded %d bytes of PCM to %d bytes of %s", pcm_bytes, len(data), UPLOAD_FORMAT)
+    st.caption(f"Uploaded {len(data) / 1024:.1f} KB ({UPLOAD_FORMAT}, {len(data) / max(pcm_bytes, 1):.0%} of WAV)")
+    process_audio_bytes(f"recording.{ENCODINGS[UPLOAD_FORMAT][2]}", data, recorder.trace, key=key)
+
+def finish_recording(recorder: AudioRecorder):
+    """Stop the recorder and process what it captured."""
+    uploader = recorder.uploader
+    recorder.uploader = None
+    recorded_file = recorder.stop_recording()
+    if not recorded_file:
+        if uploader:
+            uploader.abort()
+        st.warning("No speech was recorded.")
+        return
+    
+    st.success("Recording saved!")
+    st.audio(recorded_file)
+    
+    with st.spinner("Processing recording..."):
+        try:
+            if uploader:
+                show_voice_result(uploader.finish())
+                st.caption(
+                    f"Streamed {uploader.bytes_sent / 1024:.1f} KB "
+                    f"(FLAC, {uploader.bytes_sent / max(uploader.pcm_bytes, 1):.0%} of WAV)"
+                )
+            else:
+                process_recording(recorder)
+        except Exception as e:
+            if uploader is None or uploader.finish_sent:
+                # The server may have run the command; uploading again could
+                # run it twice
+                st.error(f"Error processing request: {e}")
+            else:
+                logger.warning("Streamed upload failed, retrying as single upload: %s", e)
+                process_recording(recorder, key=uploader.key)
+        finally:
+            # Clean up the temporary file
+            os.unlink(recorded_file)
+    finish_trace(recorder.trace)
+
+HISTORY_PAGE_SIZE = 10
+HISTORY_ACTIONS = ["All", "open_app", "search_files", "create_note", "web_search", "compound", "none"]
+HISTORY_STATUSES = ["All", "success", "partial", "error", "skipped", "cancelled"]
+HISTORY_PERIODS = {
+    "Any time": None,
+    "Last hour": timedelta(hours=1),
+    "Last 24 hours": timedelta(days=1),
+    "Last 7 days": timedelta(days=7),
+}
+
+def fetch_history(page: int, action: str, status: str, period: str) -> Optional[Dict[str, Any]]:
+    """Fetch one page of command history from the API."""
+    params = {"page": page, "page_size": HISTORY_PAGE_SIZE}
+    if action != "All":
+        params["action"] = action
+    if status != "All":
+        params["status"] = status
+    if HISTORY_PERIODS[period]:
+        params["since"] = (datetime.now(timezone.utc) - HISTORY_PERIODS[period]).isoformat()
+    
+    try:
+        response = get_http_session().get(f"{API_BASE_URL}/history", params=params)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        st.error(f"Error loading history: {e}")
+        return None
+
+def render_history():
+    """Render the visible page of server-side command history."""
+    st.markdown("### 📝 Command History")
+    
+    filter_cols = st.columns(3)
+    action = filter_cols[0].selectbox("Action", HISTORY_ACTIONS)
+    status = filter_cols[1].selectbox("Status", HISTORY_STATUSES)
+    period = filter_cols[2].selectbox("Time", list(HISTORY_PERIODS))
+    
+    # Go back to the first page whenever the filters change
+    filters = (action, status, period)
+    if st.session_state.get("history_filters") != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_page = 1
+    
+    if st.button("🔄 Clear History"):
+        try:
+            get_http_session().delete(f"{API_BASE_URL}/history").raise_for_status()
+            st.session_state.history_page = 1
+        except Exception as e:
+            st.error(f"Error clearing history: {e}")
+    
+    history = fetch_history(st.session_state.history_page, action, status, period)
+    if not history:
+        return
+    if not history["items"]:
+        st.info("No commands yet.")
+        return
+    
+    for i, entry in enumerate(history["items"]):
+        with st.expander(f"Command {entry['id']} · {entry['created_at'][:19].replace('T', ' ')}", expanded=i == 0):
+            st.markdown("**Transcribed Text:**" if entry["source"] == "voice" else "**Command:**")
+            st.write(entry["text"])
+            st.markdown("**Result:**")
+            st.json(entry["result"])
+    
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("◀", disabled=history["page"] <= 1):
+        st.session_state.history_page -= 1
+        st.rerun()
+    page_col.caption(f"Page {history['page']} of {history['pages']} · {history['total']} commands")
+    if next_col.button("▶", disabled=history["page"] >= history["pages"]):
+        st.session_state.history_page += 1
+        st.rerun()
+
 def main():
     st.title("🎙️ CLAWD Agent")
     st.subheader("Local Computer Use Agent with Whisper Integration")
 
     # Initialize session state
-    if 'logs' not in st.session_state:
-        st.session_state.logs = []
+    if 'history_page' not in st.session_state:
+        st.session_state.history_page = 1
     if 'recorder' not in st.session_state:
         st.session_state.recorder = AudioRecorder()
 
@@ -156,23 +515,22 @@ def main():
             command = st.text_input("Enter command:", placeholder="e.g., 'open notepad' or 'create a note saying hello world'")
             
             if st.button("🚀 Execute Command"):
+                trace = ClientTrace("text_command")
                 with st.spinner("Processing command..."):
                     try:
-                        response = requests.post(
-                            f"{API_BASE_URL}/voice/process-text",
-                            json={"command": command}
-                        )
+                        with trace.span("process-text") as headers:
+                            response = post_command(
+                                get_http_session(),
+                                f"{API_BASE_URL}/voice/process-text",
+                                key=command_key("process-text", command.encode()),
+                                json={"command": command},
+                                headers=headers
+                            )
+                        command_answered("process-text")
                         
                         if response.status_code == 200:
                             result = response.json()
                             
-                            # Add to logs
-                            st.session_state.logs.append({
-                                "type": "text_command",
-                                "text": command,
-                                "result": result
-                            })
-                            
                             # Display results
                             st.success("Command processed successfully!")
                             
@@ -186,6 +544,7 @@ def main():
                             st.error(f"Error: {response.status_code} - {response.text}")
                     except Exception as e:
                         st.error(f"Error processing command: {e}")
+                finish_trace(trace)
         
         with tab2:
             st.markdown("### 🎤 Voice Command Input")
@@ -206,26 +565,40 @@ def main():
                         video=False
                     ),
                     video_processor_factory=None,
+                    audio_frame_callback=st.session_state.recorder.process_audio,
+                )
+                logger.debug("WebRTC context: %s", webrtc_ctx)
+                
+                hands_free = st.checkbox(
+                    "Hands-free",
+                    help="Start capturing when speech is detected and stop after a pause"
+                )
+                silence_seconds = st.slider(
+                    "Pause before auto-stop (s)", 0.5, 3.0, 1.2, 0.1,
+                    disabled=not hands_free
                 )
-                logger.debug(f"WebRTC context: {webrtc_ctx}")
                 
                 # Recording controls
                 if webrtc_ctx.state.playing:
                     if st.button("🔴 Start Recording"):
-                        st.session_state.recorder.start_recording()
-                        st.info("Recording... Press 'Stop Recording' when done.")
+                        # Stream audio to the server while recording continues
+                        trace = ClientTrace("voice_command")
+                        uploader = ChunkUploader(get_http_session(), trace=trace)
+                        try:
+                            uploader.start()
+                        except Exception as e:
+                            logger.warning("Audio streaming unavailable, will upload on stop: %s", e)
+                            uploader = None
+                        vad = VoiceActivityDetector(silence_ms=int(silence_seconds * 1000)) if hands_free else None
+                        st.session_state.recorder.start_recording(uploader, vad, trace)
+                        if hands_free:
+                            st.info("Listening... Recording starts when you speak and stops after a pause.")
+                        else:
+                            st.info("Recording... Press 'Stop Recording' when done.")
                     
                     if st.button("⏹️ Stop Recording"):
                         if st.session_state.recorder.recording:
-                            recorded_file = st.session_state.recorder.stop_recording()
-                            if recorded_file:
-                                st.success("Recording saved!")
-                                st.audio(recorded_file)
-                                
-                                if st.button("🔍 Process Recording"):
-                                    process_audio_file(recorded_file)
-                                    # Clean up the temporary file
-                                    os.unlink(recorded_file)
+                            finish_recording(st.session_state.recorder)
             
             with viz_col:
                 # Waveform visualization
@@ -234,10 +607,9 @@ def main():
                     waveform_placeholder = st.empty()
                     
                     # Update the waveform visualization
-                    if len(st.session_state.recorder.audio_buffer) > 0:
-                        chart_data = np.array(list(st.session_state.recorder.audio_buffer))
-                        # Normalize the data
-                        chart_data = chart_data / (np.max(np.abs(chart_data)) + 1e-6)
+                    if len(st.session_state.recorder.envelope) > 0:
+                        # Min/max envelope is precomputed per frame; just scale it
+                        chart_data = st.session_state.recorder.envelope.to_array() / 32768.0
                         
                         # Display the waveform
                         waveform_placeholder.line_chart(
@@ -252,44 +624,46 @@ def main():
                 if webrtc_ctx.state.playing and st.session_state.recorder.recording:
                     volume_placeholder = st.empty()
                     if len(st.session_state.recorder.audio_buffer) > 0:
-                        current_volume = np.mean(list(st.session_state.recorder.audio_buffer)[-10:])
+                        current_volume = float(np.mean(st.session_state.recorder.audio_buffer.last(10)))
                         normalized_volume = min(1.0, current_volume / 32768.0)  # 16-bit audio
                         volume_placeholder.progress(normalized_volume)
         
+            # Hands-free mode: wait for the detector to end the recording
+            recorder = st.session_state.recorder
+            if webrtc_ctx.state.playing and recorder.recording and recorder.vad:
+                status_placeholder = st.empty()
+                while recorder.recording and webrtc_ctx.state.playing:
+                    status_placeholder.caption("🗣️ Speech detected..." if recorder.vad.triggered else "👂 Waiting for speech...")
+                    time.sleep(0.1)
+                status_placeholder.empty()
+                if recorder.auto_stopped:
+                    finish_recording(recorder)
+        
         with tab3:
             st.markdown("##### Upload an audio file")
             uploaded_file = st.file_uploader(
                 "Choose an audio file",
-                type=["wav", "mp3", "m4a"],
-                help="Supported formats: WAV, MP3, M4A"
+                type=["wav", "mp3", "m4a", "flac", "ogg", "opus", "webm"],
+                help="Supported formats: WAV, MP3, M4A, FLAC, OGG/Opus, WebM"
+            )
+            profile = st.selectbox(
+                "Decode profile",
+                list(PROFILES),
+                help="command: fastest, for short commands; dictation: longer speech; accurate: any language, beam search"
             )
 
             if uploaded_file:
                 st.audio(uploaded_file)
                 
                 if st.button("🔍 Process Upload"):
+                    trace = ClientTrace("upload_command")
                     with st.spinner("Processing audio..."):
-                        temp_path = save_uploaded_file(uploaded_file)
-                        if temp_path:
-                            try:
-                                process_audio_file(temp_path)
-                            finally:
-                                if os.path.exists(temp_path):
-                                    os.unlink(temp_path)
+                        process_audio_bytes(uploaded_file.name, uploaded_file.getvalue(), trace, profile)
+                    finish_trace(trace)
 
     # Command History
     with col2:
-        st.markdown("### 📝 Command History")
-        
-        if st.button("🔄 Clear History"):
-            st.session_state.logs = []
-        
-        for i, log in enumerate(reversed(st.session_state.logs)):
-            with st.expander(f"Command {len(st.session_state.logs) - i}", expanded=i == 0):
-                st.markdown("**Transcribed Text:**")
-                st.write(log["text"])
-                st.markdown("**Result:**")
-                st.json(log["result"])
+        render_history()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,271 @@
+import io
+import av
+import numpy as np
+from typing import Optional, Tuple
+
+SAMPLE_RATE = 16000
+RMS_WINDOW = 160  # 10ms at 16kHz
+
+# Upload format -> (container, codec, file extension)
+ENCODINGS = {
+    "flac": ("flac", "flac", "flac"),
+    "opus": ("ogg", "libopus", "ogg"),
+}
+OPUS_BITRATE = 24000  # plenty for 16kHz speech
+
+
+class SampleBuffer:
+    """Preallocated PCM sample buffer that doubles its capacity when full.
+
+    Appending a frame is a single slice copy, and reading the recording back
+    is a view over the filled part of the array, so there is no list of
+    chunks to join when recording stops.
+    """
+
+    def __init__(self, capacity: int = SAMPLE_RATE * 10, dtype=np.int16):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def extend(self, samples: np.ndarray):
+        """Append samples, growing the underlying array geometrically."""
+        n = len(samples)
+        needed = self._size + n
+        if needed > len(self._data):
+            new_capacity = max(needed, 2 * len(self._data))
+            grown = np.zeros(new_capacity, dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = samples
+        self._size = needed
+
+    def view(self) -> np.ndarray:
+        """Return the recorded samples without copying."""
+        return self._data[:self._size]
+
+    def keep_last(self, n: int) -> int:
+        """Drop all but the newest ``n`` samples.
+
+        Returns:
+            Number of samples dropped from the front
+        """
+        dropped = max(self._size - n, 0)
+        if dropped:
+            self._data[:n] = self._data[dropped:self._size]
+            self._size = n
+        return dropped
+
+    def clear(self):
+        self._size = 0
+
+
+class RingBuffer:
+    """Fixed-size NumPy ring buffer, a drop-in for ``deque(maxlen=...)``.
+
+    Args:
+        maxlen: Number of rows kept before the oldest are overwritten
+        width: Values per row, or None for a flat buffer of scalars
+    """
+
+    def __init__(self, maxlen: int, width: Optional[int] = None, dtype=np.float32):
+        self.maxlen = maxlen
+        shape = (maxlen,) if width is None else (maxlen, width)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._head = 0  # next write position
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.maxlen
+        self._size = min(self._size + 1, self.maxlen)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        n = len(values)
+        if n == 0:
+            return
+        if n >= self.maxlen:
+            # Only the newest maxlen rows survive
+            self._data[:] = values[-self.maxlen:]
+            self._head = 0
+            self._size = self.maxlen
+            return
+        end = self._head + n
+        if end <= self.maxlen:
+            self._data[self._head:end] = values
+        else:
+            split = self.maxlen - self._head
+            self._data[self._head:] = values[:split]
+            self._data[:n - split] = values[split:]
+        self._head = end % self.maxlen
+        self._size = min(self._size + n, self.maxlen)
+
+    def to_array(self) -> np.ndarray:
+        """Return the contents ordered oldest to newest."""
+        if self._size < self.maxlen:
+            return self._data[:self._size].copy()
+        return np.concatenate((self._data[self._head:], self._data[:self._head]))
+
+    def last(self, n: int) -> np.ndarray:
+        """Return the newest ``n`` rows, oldest first."""
+        n = min(n, self._size)
+        idx = (self._head - n + np.arange(n)) % self.maxlen
+        return self._data[idx]
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+
+def window_stats(samples: np.ndarray, window: int = RMS_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute per-window RMS and (min, max) envelope in one reshape-and-reduce.
+
+    Trailing samples that do not fill a whole window are ignored.
+
+    Returns:
+        Tuple of RMS values with shape (n,) and envelope with shape (n, 2)
+    """
+    n = len(samples) // window
+    if n == 0:
+        return np.empty(0, dtype=np.float32), np.empty((0, 2), dtype=np.float32)
+    blocks = samples[:n * window].reshape(n, window).astype(np.float32)
+    rms = np.sqrt(np.mean(np.square(blocks), axis=1))
+    envelope = np.stack((blocks.min(axis=1), blocks.max(axis=1)), axis=1)
+    return rms, envelope
+
+
+class VoiceActivityDetector:
+    """Lightweight energy and zero-crossing voice activity detector.
+
+    Incoming audio is split into 10ms windows. A window counts as speech if
+    its RMS clears the threshold, or if it clears half the threshold with a
+    high zero-crossing rate (unvoiced consonants such as "s" and "f"). The
+    threshold tracks the background noise floor.
+
+    Sample positions are absolute, counted from the last ``reset()``.
+
+    Args:
+        silence_ms: Silence after speech that ends the utterance
+        min_speech_ms: Consecutive speech needed before capture starts
+        padding_ms: Audio kept before the first and after the last speech
+        energy_threshold: Minimum RMS (16-bit scale) treated as speech
+        zcr_threshold: Zero crossings per sample that mark unvoiced speech
+        noise_ratio: How far above the noise floor speech must be
+    """
+
+    def __init__(
+        self,
+        silence_ms: int = 1200,
+        min_speech_ms: int = 100,
+        padding_ms: int = 200,
+        energy_threshold: float = 300.0,
+        zcr_threshold: float = 0.25,
+        noise_ratio: float = 3.0,
+        window: int = RMS_WINDOW,
+        sample_rate: int = SAMPLE_RATE
+    ):
+        window_ms = 1000 * window / sample_rate
+        self.window = window
+        self.silence_windows = max(int(silence_ms / window_ms), 1)
+        self.min_speech_windows = max(int(min_speech_ms / window_ms), 1)
+        self.padding_samples = int(padding_ms * sample_rate / 1000)
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.noise_ratio = noise_ratio
+        self.reset()
+
+    @property
+    def preroll_samples(self) -> int:
+        """Audio to retain before triggering so padding survives the trigger delay."""
+        return self.padding_samples + (self.min_speech_windows + 1) * self.window
+
+    def reset(self):
+        self.noise_floor = self.energy_threshold / self.noise_ratio
+        self.triggered = False  # speech has started
+        self.ended = False  # speech was followed by enough silence
+        self.speech_start: Optional[int] = None  # first speech sample
+        self.speech_end: Optional[int] = None  # one past the last speech sample
+        self._windows = 0  # windows processed so far
+        self._run = 0  # current run of consecutive speech windows
+        self._remainder = np.empty(0, dtype=np.int16)
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """Return a speech flag for each full window of ``samples``."""
+        n = len(samples) // self.window
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        blocks = samples[:n * self.window].reshape(n, self.window).astype(np.float32)
+        rms = np.sqrt(np.mean(np.square(blocks), axis=1))
+        zcr = np.mean(np.diff(np.signbit(blocks), axis=1), axis=1)
+        
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+        speech = (rms > threshold) | ((rms > threshold / 2) & (zcr > self.zcr_threshold))
+        
+        if not speech.all():
+            # Follow the background level slowly so a single click does not move it
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(np.mean(rms[~speech]))
+        return speech
+
+    def update(self, samples: np.ndarray):
+        """Feed the next samples and advance the speech state."""
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        speech = self.classify(samples)
+        used = len(speech) * self.window
+        self._remainder = samples[used:].copy()
+        
+        for is_speech in speech:
+            position = self._windows * self.window
+            self._windows += 1
+            if self.ended:
+                continue
+            if is_speech:
+                self._run += 1
+                if not self.triggered and self._run >= self.min_speech_windows:
+                    self.triggered = True
+                    self.speech_start = position - (self._run - 1) * self.window
+                if self.triggered:
+                    self.speech_end = position + self.window
+            else:
+                self._run = 0
+                if self.triggered and self._windows * self.window - self.speech_end >= self.silence_windows * self.window:
+                    self.ended = True
+
+
+def encode_audio(samples: np.ndarray, fmt: str = "flac", sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encode 16-bit mono PCM to a compressed upload format.
+
+    Args:
+        samples: int16 samples
+        fmt: Key of ``ENCODINGS``, "flac" (lossless) or "opus" (lossy, smaller)
+        sample_rate: Sample rate of ``samples``
+
+    Returns:
+        Encoded bytes, ready to upload with extension ``ENCODINGS[fmt][2]``
+    """
+    container_format, codec, _ = ENCODINGS[fmt]
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format=container_format) as container:
+        stream = container.add_stream(codec, rate=sample_rate, layout="mono")
+        if fmt == "opus":
+            stream.bit_rate = OPUS_BITRATE
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(samples, dtype=np.int16).reshape(1, -1),
+            format="s16",
+            layout="mono"
+        )
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
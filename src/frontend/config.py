@@ -11,7 +11,7 @@ API_PORT = os.getenv("CLAWD_API_PORT", "8000")
 API_BASE_URL = f"http://{API_HOST}:{API_PORT}"
 
 # File Upload Configuration
-ALLOWED_AUDIO_FORMATS = ["wav", "mp3", "m4a"]
+ALLOWED_AUDIO_FORMATS = ["wav", "mp3", "m4a", "flac", "ogg", "opus", "webm"]
 MAX_UPLOAD_SIZE_MB = 10
 
 # Paths
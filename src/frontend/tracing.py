@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class ClientTrace:
+    """Trace of one command as seen by the frontend.
+
+    Every API request made for the command carries a ``traceparent`` header
+    with this trace's ID, so the server's spans join the same trace. The
+    frontend's own spans, such as audio capture and upload, are posted to
+    the API's ``/traces`` endpoint when the command is done.
+    """
+
+    def __init__(self, name: str = "command"):
+        self.trace_id = os.urandom(16).hex()
+        self.root_id = os.urandom(8).hex()
+        self.name = name
+        self.start = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def headers(self, parent_id: Optional[str] = None) -> Dict[str, str]:
+        return {"traceparent": f"00-{self.trace_id}-{parent_id or self.root_id}-01"}
+
+    def add_span(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        status: str = "ok",
+        span_id: Optional[str] = None,
+        **attributes
+    ) -> str:
+        """Record a span measured elsewhere, as a child of the trace's root."""
+        span_id = span_id or os.urandom(8).hex()
+        with self._lock:
+            self.spans.append({
+                "trace_id": self.trace_id,
+                "span_id": span_id,
+                "parent_id": self.root_id,
+                "name": name,
+                "start": start,
+                "end": end,
+                "status": status,
+                "attributes": attributes,
+            })
+        return span_id
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the block; yields headers that make server spans its children."""
+        span_id = os.urandom(8).hex()
+        start = time.time()
+        status = "ok"
+        try:
+            yield {"traceparent": f"00-{self.trace_id}-{span_id}-01"}
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.add_span(name, start, time.time(), status, span_id=span_id, **attributes)
+
+    def finish(self, session: requests.Session, api_base_url: str):
+        """Close the root span and send the frontend's spans to the API."""
+        with self._lock:
+            spans = self.spans + [{
+                "trace_id": self.trace_id,
+                "span_id": self.root_id,
+                "parent_id": None,
+                "name": self.name,
+                "start": self.start,
+                "end": time.time(),
+                "status": "ok",
+                "attributes": {},
+            }]
+            self.spans = []
+        try:
+            session.post(f"{api_base_url}/traces", json={"spans": spans}, timeout=2)
+        except Exception as e:
+            logger.warning("Could not submit trace %s: %s", self.trace_id, e)
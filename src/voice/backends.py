@@ -0,0 +1,131 @@
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+
+AudioInput = str | np.ndarray  # file path, or float32 mono samples at 16kHz
+
+
+class TranscriptionCancelled(Exception):
+    """Raised when a local transcription is abandoned through its cancel event"""
+    pass
+
+
+@dataclass
+class Transcription:
+    """Text and confidence signals from a local transcription."""
+    text: str
+    avg_logprob: Optional[float] = None
+    no_speech_prob: Optional[float] = None
+    compression_ratio: Optional[float] = None
+    language: Optional[str] = None
+
+
+def summarize_segments(text: str, segments: List[Dict[str, Any]], language: Optional[str] = None) -> Transcription:
+    """Collapse per-segment decoder statistics into one Transcription.
+
+    Log probability and no-speech probability are averaged weighted by
+    segment duration; the compression ratio takes the worst segment, since a
+    single repetitive segment is enough to signal a hallucination.
+    """
+    if not segments:
+        return Transcription(text=text.strip(), language=language)
+    weights = np.array([max(s["end"] - s["start"], 1e-3) for s in segments])
+    return Transcription(
+        text=text.strip(),
+        avg_logprob=float(np.average([s["avg_logprob"] for s in segments], weights=weights)),
+        no_speech_prob=float(np.average([s["no_speech_prob"] for s in segments], weights=weights)),
+        compression_ratio=float(max(s["compression_ratio"] for s in segments)),
+        language=language
+    )
+
+
+class STTBackend(ABC):
+    """Interface for local speech-to-text engines used by WhisperSTT."""
+
+    name: str
+
+    @abstractmethod
+    def transcribe(self, audio: AudioInput, cancel_event: Optional[threading.Event] = None, **options) -> Transcription:
+        """Transcribe audio synchronously. Called from a worker thread.
+
+        Backends check ``cancel_event`` wherever they can stop early and raise
+        TranscriptionCancelled once it is set.
+        """
+
+
+class OpenAIWhisperBackend(STTBackend):
+    """Reference PyTorch implementation from the openai-whisper package."""
+
+    name = "openai-whisper"
+
+    def __init__(self, model_name: str = "base.en", device: Optional[str] = None, **kwargs):
+        import whisper
+        self.model = whisper.load_model(model_name, device=device)
+
+    def transcribe(self, audio: AudioInput, cancel_event: Optional[threading.Event] = None, **options) -> Transcription:
+        # model.transcribe cannot be interrupted, so only check before starting
+        if cancel_event is not None and cancel_event.is_set():
+            raise TranscriptionCancelled()
+        if options.get("beam_size") == 1:
+            # A single beam is plain greedy decoding, which skips the beam search machinery
+            options["beam_size"] = None
+        result = self.model.transcribe(audio, **options)
+        return summarize_segments(result["text"], result.get("segments", []), result.get("language"))
+
+
+class FasterWhisperBackend(STTBackend):
+    """CTranslate2 implementation from faster-whisper, int8 quantized by default.
+
+    Typically several times faster than fp32 PyTorch on CPU with a fraction of
+    the memory, at a small accuracy cost (see benchmarks/stt_backends.py).
+    """
+
+    name = "faster-whisper"
+
+    def __init__(
+        self,
+        model_name: str = "base.en",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        **kwargs
+    ):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("The faster-whisper backend requires `pip install faster-whisper`") from e
+        self.model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def transcribe(self, audio: AudioInput, cancel_event: Optional[threading.Event] = None, **options) -> Transcription:
+        segments, info = self.model.transcribe(audio, **options)
+        texts, stats = [], []
+        # Segments are generated lazily; decoding happens in this loop, so
+        # cancellation takes effect at the next 30s window
+        for segment in segments:
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranscriptionCancelled()
+            texts.append(segment.text)
+            stats.append({
+                "start": segment.start,
+                "end": segment.end,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob,
+                "compression_ratio": segment.compression_ratio,
+            })
+        return summarize_segments("".join(texts), stats, info.language)
+
+
+BACKENDS: Dict[str, Type[STTBackend]] = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_backend(name: str, model_name: str, **kwargs) -> STTBackend:
+    """Instantiate a backend by name, e.g. "openai-whisper" or "faster-whisper"."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_name=model_name, **kwargs)
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from src.core.agent import CommandParser
+from src.voice.backends import AudioInput, STTBackend, Transcription, TranscriptionCancelled
+
+logger = logging.getLogger(__name__)
+
+# Same signals Whisper uses for temperature fallback
+DEFAULT_THRESHOLDS = {
+    "avg_logprob": -1.0,  # escalate below
+    "no_speech_prob": 0.6,  # escalate above
+    "compression_ratio": 2.4,  # escalate above
+}
+
+
+class CascadeStats:
+    """Running escalation counts and latency savings of a ModelCascade.
+
+    Savings are estimated per request as the fast model's time multiplied by
+    how much slower the accurate model has been on escalated requests, so the
+    estimate tracks audio length without having to run both models.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.escalations = 0
+        self.reasons: Counter = Counter()
+        self.slowdown: Optional[float] = None  # accurate / fast latency, EWMA
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, fast_seconds: float, accurate_seconds: Optional[float] = None, reason: Optional[str] = None):
+        with self._lock:
+            self.requests += 1
+            if accurate_seconds is None:
+                if self.slowdown is not None:
+                    self.saved_seconds += fast_seconds * (self.slowdown - 1)
+                return
+            self.escalations += 1
+            self.reasons[reason] += 1
+            ratio = accurate_seconds / max(fast_seconds, 1e-6)
+            self.slowdown = ratio if self.slowdown is None else 0.8 * self.slowdown + 0.2 * ratio
+            # The fast pass was wasted work on this request
+            self.saved_seconds -= fast_seconds
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.requests if self.requests else 0.0
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": self.escalation_rate,
+                "reasons": dict(self.reasons),
+                "estimated_saved_seconds": self.saved_seconds if self.slowdown is not None else None,
+            }
+
+
+class ModelCascade(STTBackend):
+    """Transcribe with a small model and escalate to a larger one on low confidence.
+
+    Escalation happens when the fast result's decoder statistics cross the
+    thresholds, or when CommandParser finds no intent in the text.
+
+    Args:
+        fast: Small backend tried first, e.g. "tiny.en"
+        accurate: Larger backend used when the fast result is not trusted
+        thresholds: Overrides for DEFAULT_THRESHOLDS
+    """
+
+    name = "cascade"
+
+    def __init__(self, fast: STTBackend, accurate: STTBackend, thresholds: Optional[Dict[str, float]] = None):
+        self.fast = fast
+        self.accurate = accurate
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.stats = CascadeStats()
+
+    @property
+    def model(self):
+        return self.accurate.model
+
+    def escalation_reason(self, result: Transcription) -> Optional[str]:
+        """Return why ``result`` should be escalated, or None to accept it."""
+        if result.avg_logprob is not None and result.avg_logprob < self.thresholds["avg_logprob"]:
+            return "avg_logprob"
+        if result.no_speech_prob is not None and result.no_speech_prob > self.thresholds["no_speech_prob"]:
+            return "no_speech_prob"
+        if result.compression_ratio is not None and result.compression_ratio > self.thresholds["compression_ratio"]:
+            return "compression_ratio"
+        if CommandParser.parse_command(result.text) is None:
+            return "no_intent"
+        return None
+
+    def transcribe(self, audio: AudioInput, cancel_event: Optional[threading.Event] = None, **options) -> Transcription:
+        start = time.perf_counter()
+        result = self.fast.transcribe(audio, cancel_event=cancel_event, **options)
+        fast_seconds = time.perf_counter() - start
+
+        reason = self.escalation_reason(result)
+        if reason is None:
+            self.stats.record(fast_seconds)
+            self._log("accepted fast result in %.2fs", fast_seconds)
+            return result
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise TranscriptionCancelled()
+        start = time.perf_counter()
+        result = self.accurate.transcribe(audio, cancel_event=cancel_event, **options)
+        accurate_seconds = time.perf_counter() - start
+        self.stats.record(fast_seconds, accurate_seconds, reason)
+        self._log("escalated (%s), fast %.2fs + accurate %.2fs", reason, fast_seconds, accurate_seconds)
+        return result
+
+    def _log(self, message: str, *args):
+        # Runs on every transcription, so skip the summary when nobody reads it
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        summary = self.stats.summary()
+        saved = summary["estimated_saved_seconds"]
+        logger.info(
+            "Cascade " + message + "; escalated %d/%d (%.0f%%), estimated latency saved %s",
+            *args,
+            summary["escalations"],
+            summary["requests"],
+            summary["escalation_rate"] * 100,
+            f"{saved:.1f}s" if saved is not None else "n/a (no escalations yet)"
+        )
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.voice.backends import STTBackend, TranscriptionCancelled, create_backend
+from src.voice.codecs import decode_to_pcm
+from src.voice.profiles import DecodeProfile
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def split_on_silence(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = 30.0,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 5.0,
+    window_seconds: float = 0.1
+) -> List[Tuple[int, int]]:
+    """Split audio into overlapping chunks that end in the quietest nearby spot.
+
+    Each cut is placed at the lowest-energy window within the last
+    ``search_seconds`` before the target chunk length, so words are rarely
+    split. The next chunk starts ``overlap_seconds`` before the cut so that a
+    word straddling it is heard whole by at least one chunk.
+
+    Returns:
+        List of (start, end) sample indices
+    """
+    total = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    if total <= chunk:
+        return [(0, total)]
+
+    window = max(int(window_seconds * sample_rate), 1)
+    n = total // window
+    energy = np.sqrt(np.mean(np.square(samples[:n * window].reshape(n, window).astype(np.float32)), axis=1))
+    overlap = int(overlap_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+
+    bounds = []
+    start = 0
+    while total - start > chunk:
+        target = start + chunk
+        lo = max(target - search, start + overlap + window) // window
+        hi = target // window
+        if hi > lo:
+            # Latest minimum, so chunks stay as long as possible on ties
+            quietest = hi - 1 - int(np.argmin(energy[lo:hi][::-1]))
+            cut = quietest * window + window // 2
+        else:
+            cut = target
+        bounds.append((start, cut))
+        start = cut - overlap
+    bounds.append((start, total))
+    return bounds
+
+
+def _words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", "", text.lower()).split()
+
+
+def stitch(texts: List[str], max_overlap_words: int = 12) -> str:
+    """Join chunk transcripts in order, dropping words repeated across an overlap.
+
+    The longest run of words that ends one chunk and starts the next
+    (ignoring case and punctuation) is kept only once.
+    """
+    result: List[str] = []
+    for text in texts:
+        words = text.split()
+        if result and words:
+            tail = _words(" ".join(result[-max_overlap_words:]))
+            head = _words(" ".join(words[:max_overlap_words]))
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    words = words[size:]
+                    break
+        result.extend(words)
+    return " ".join(result)
+
+
+# Local worker processes keep one loaded model each
+_worker_backend: Optional[STTBackend] = None
+
+
+def _init_worker(backend_name: str, model_name: str, compute_type: str):
+    global _worker_backend
+    _worker_backend = create_backend(backend_name, model_name, compute_type=compute_type)
+
+
+def _transcribe_in_worker(samples: np.ndarray, options: Dict[str, Any]) -> str:
+    return _worker_backend.transcribe(samples.astype(np.float32) / 32768.0, **options).text
+
+
+class ChunkedTranscriber:
+    """Transcribe long recordings as overlapping chunks in parallel.
+
+    Chunks go to the Whisper API as concurrent requests when
+    ``api_transcribe`` is given, otherwise to a pool of local worker
+    processes, each with its own model. Latency then follows chunk length
+    rather than total duration, and no single request hits the API's upload
+    size limit.
+
+    Args:
+        api_transcribe: Coroutine function taking an audio file path
+        local_backend: (backend name, model name, compute type) for workers
+        min_seconds: Recordings shorter than this are not chunked
+        chunk_seconds: Target chunk length
+        overlap_seconds: Audio shared between neighbouring chunks
+        concurrency: Concurrent API requests, or local worker processes
+    """
+
+    def __init__(
+        self,
+        api_transcribe: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+        local_backend: Optional[Tuple[str, str, str]] = None,
+        min_seconds: float = 45.0,
+        chunk_seconds: float = 30.0,
+        overlap_seconds: float = 1.0,
+        concurrency: int = 4
+    ):
+        if api_transcribe is None and local_backend is None:
+            raise ValueError("ChunkedTranscriber needs an API or a local backend")
+        self.api_transcribe = api_transcribe
+        self.local_backend = local_backend
+        self.min_seconds = min_seconds
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.concurrency = concurrency
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def should_chunk(self, duration: float) -> bool:
+        return duration >= self.min_seconds
+
+    async def transcribe_samples(
+        self,
+        samples: np.ndarray,
+        profile: Optional[DecodeProfile] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Optional[str]:
+        """Transcribe 16kHz int16 samples; returns None if any chunk fails.
+
+        At most ``concurrency`` chunks run at once, and each one checks
+        ``cancel_event`` before it starts. Chunks already running finish.
+
+        Args:
+            samples: Audio to transcribe
+            profile: Decode options applied to every chunk; the backend's
+                defaults when None
+            cancel_event: Set when the request is cancelled
+
+        Raises:
+            TranscriptionCancelled: If ``cancel_event`` was set before every
+                chunk had started
+        """
+        bounds = split_on_silence(
+            samples,
+            chunk_seconds=self.chunk_seconds,
+            overlap_seconds=self.overlap_seconds
+        )
+        logger.info("Transcribing %.1fs of audio as %d chunks", len(samples) / SAMPLE_RATE, len(bounds))
+        chunks = [samples[start:end] for start, end in bounds]
+
+        if self.api_transcribe is not None:
+            api_options = profile.api_options() if profile else {}
+
+            def start(chunk):
+                return self._transcribe_api_chunk(chunk, api_options)
+        else:
+            options = profile.options() if profile else {}
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+
+            def start(chunk):
+                return loop.run_in_executor(pool, _transcribe_in_worker, chunk, options)
+
+        # Chunks wait here rather than in the pool's queue, so a cancelled
+        # request starts no more of them
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(chunk):
+            async with semaphore:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TranscriptionCancelled()
+                return await start(chunk)
+
+        texts = await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+        if any(text is None for text in texts):
+            logger.error("Chunked transcription failed for at least one chunk")
+            return None
+        return stitch([text.strip() for text in texts])
+
+    async def transcribe(
+        self,
+        audio_path: str,
+        profile: Optional[DecodeProfile] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Optional[str]:
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        samples = await asyncio.to_thread(decode_to_pcm, data, SAMPLE_RATE)
+        return await self.transcribe_samples(samples, profile, cancel_event)
+
+    async def _transcribe_api_chunk(self, samples: np.ndarray, options: Dict[str, Any]) -> Optional[str]:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(samples.tobytes())
+            return await self.api_transcribe(path, **options)
+        finally:
+            os.unlink(path)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                initializer=_init_worker,
+                initargs=self.local_backend
+            )
+        return self._pool
+
+    def shutdown(self):
+        """Stop the local worker processes; the next chunked request starts new ones."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
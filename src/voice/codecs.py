@@ -0,0 +1,149 @@
+import io
+import logging
+import wave
+from pathlib import Path
+from typing import Optional, Tuple
+
+import av
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Formats accepted on upload
+SUPPORTED_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg', '.opus', '.webm')
+
+# The Whisper API detects the codec from the file name and does not list
+# ".opus", but accepts the same Ogg/Opus bytes as ".ogg"
+_API_EXTENSIONS = {'.opus': '.ogg'}
+
+
+def api_suffix(filename: str) -> str:
+    """Return the file suffix to use when forwarding an upload to the Whisper API."""
+    suffix = Path(filename).suffix.lower()
+    return _API_EXTENSIONS.get(suffix, suffix)
+
+
+def decode_to_pcm(data: bytes, sample_rate: int = 16000, fmt: Optional[str] = None) -> np.ndarray:
+    """Decode compressed audio in-process to 16-bit mono PCM.
+
+    Args:
+        data: Encoded audio bytes in any container FFmpeg understands
+        sample_rate: Output sample rate
+        fmt: Container format hint, e.g. "flac" or "ogg"
+
+    Returns:
+        int16 array of samples
+    """
+    return _decode(io.BytesIO(data), sample_rate, fmt)
+
+
+def _decode(source, sample_rate: int, fmt: Optional[str] = None) -> np.ndarray:
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    chunks = []
+    with av.open(source, format=fmt) as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+    for out in resampler.resample(None):
+        chunks.append(out.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.empty(0, dtype=np.int16)
+    return np.concatenate(chunks)
+
+
+# Integer PCM sample widths read directly; 8-bit WAV is unsigned
+_WAV_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def read_wav(path: str, sample_rate: int = 16000) -> Optional[np.ndarray]:
+    """Read an integer PCM WAV file at ``sample_rate`` with NumPy alone.
+
+    Returns:
+        float32 mono samples in [-1, 1], or None if the file needs a real
+        decoder (other sample rates, float or 24-bit samples, or not a
+        plain PCM WAV)
+    """
+    try:
+        with wave.open(path, 'rb') as wf:
+            dtype = _WAV_DTYPES.get(wf.getsampwidth())
+            if dtype is None or wf.getframerate() != sample_rate:
+                return None
+            channels = wf.getnchannels()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    samples = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+    if dtype is np.uint8:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(np.iinfo(dtype).max) + 1
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def load_audio(path: str, sample_rate: int = 16000) -> Tuple[str | np.ndarray, str]:
+    """Decode an audio file for local Whisper without starting a subprocess.
+
+    Plain WAV is read with NumPy, anything else with PyAV's in-process
+    FFmpeg libraries. Both models accept the resulting array, which saves
+    the ``ffmpeg`` fork/exec and pipe they otherwise pay on every file.
+
+    Returns:
+        (audio, decoder): float32 mono samples and "numpy" or "av", or the
+        unchanged path and "ffmpeg" if in-process decoding failed, leaving
+        the model to run its own ffmpeg subprocess
+    """
+    try:
+        if Path(path).suffix.lower() == ".wav":
+            samples = read_wav(path, sample_rate)
+            if samples is not None:
+                return samples, "numpy"
+        return _decode(path, sample_rate).astype(np.float32) / 32768.0, "av"
+    except Exception as e:
+        logger.warning("In-process decoding of %s failed, falling back to ffmpeg: %s", path, e)
+        return path, "ffmpeg"
+
+
+class FlacWriter:
+    """Encode 16-bit mono PCM to a FLAC file as it arrives.
+
+    Has the ``writeframes``/``close`` subset of ``wave.Wave_write``, so a
+    stream can be written as FLAC or WAV by the same code.
+    """
+
+    def __init__(self, path: str, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self._container = av.open(path, mode="w", format="flac")
+        self._stream = self._container.add_stream("flac", rate=sample_rate, layout="mono")
+        self._samples = 0
+
+    def writeframes(self, pcm: bytes):
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if not len(samples):
+            return
+        frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = self.sample_rate
+        frame.pts = self._samples
+        self._samples += len(samples)
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+
+    def close(self):
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Return the duration of an audio file in seconds from its header, if known."""
+    try:
+        with av.open(path) as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base is not None:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from src.voice.backends import STTBackend, TranscriptionCancelled
+from src.voice.codecs import load_audio
+from src.voice.profiles import DecodeProfile
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of API latencies used to pick the hedge delay.
+
+    Args:
+        percentile: Latency percentile after which the backup is started
+        window: Number of recent latencies kept
+        initial_delay: Delay used until ``min_samples`` latencies are known
+        min_samples: Observations needed before trusting the percentile
+        min_delay: Lower bound so a run of fast responses cannot make every
+            request hedge
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        window: int = 200,
+        initial_delay: float = 3.0,
+        min_samples: int = 20,
+        min_delay: float = 0.5
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def delay(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.initial_delay
+        return max(float(np.percentile(self._samples, self.percentile)), self.min_delay)
+
+
+class HedgedTranscriber:
+    """Race the Whisper API against a local backend once the API runs late.
+
+    The API request starts immediately. If it has not answered within the
+    tracker's percentile delay, or fails before then, the local backend is
+    started on the same audio; the first non-empty result wins and the other
+    attempt is cancelled.
+
+    Args:
+        api_transcribe: Coroutine function taking an audio path
+        local: Local backend used as the hedge
+        tracker: Source of the hedge delay
+    """
+
+    def __init__(
+        self,
+        api_transcribe: Callable[[str], Awaitable[Optional[str]]],
+        local: STTBackend,
+        tracker: Optional[LatencyTracker] = None
+    ):
+        self.api_transcribe = api_transcribe
+        self.local = local
+        self.tracker = tracker or LatencyTracker()
+        self.wins: Counter = Counter()
+        self.hedged = 0
+        self.requests = 0
+
+    async def _api(self, audio_path: str, options: Dict) -> Optional[str]:
+        start = time.perf_counter()
+        try:
+            text = await self.api_transcribe(audio_path, **options)
+        except asyncio.CancelledError:
+            # Cancelled calls record a lower bound, which keeps the
+            # percentile from drifting down as slow calls lose races
+            self.tracker.record(time.perf_counter() - start)
+            raise
+        # Failures often return at once and would pull the delay down,
+        # hedging every request while the API is erroring
+        if text:
+            self.tracker.record(time.perf_counter() - start)
+        return text
+
+    async def _local(self, audio_path: str, cancel_event: threading.Event, options: Dict) -> Optional[str]:
+        try:
+            audio, _ = await asyncio.to_thread(load_audio, audio_path)
+            result = await asyncio.to_thread(self.local.transcribe, audio, cancel_event=cancel_event, **options)
+        except TranscriptionCancelled:
+            return None
+        return result.text
+
+    async def transcribe(self, audio_path: str, profile: Optional[DecodeProfile] = None) -> Optional[str]:
+        self.requests += 1
+        api_options = profile.api_options() if profile else {}
+        local_options = profile.options() if profile else {}
+        delay = self.tracker.delay()
+        cancel_event = threading.Event()
+        tasks = {asyncio.create_task(self._api(audio_path, api_options)): "api"}
+        try:
+            done, pending = await asyncio.wait(set(tasks), timeout=delay)
+            for task in done:
+                text = self._result(task)
+                if text:
+                    self._finish("api", hedged=False)
+                    return text
+                logger.warning("Whisper API failed, falling back to local transcription")
+            if pending:
+                logger.info("Whisper API slower than %.2fs, hedging with local model", delay)
+            
+            self.hedged += 1
+            local_task = asyncio.create_task(self._local(audio_path, cancel_event, local_options))
+            tasks[local_task] = "local"
+            pending.add(local_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    text = self._result(task)
+                    if text:
+                        self._finish(tasks[task], hedged=True)
+                        return text
+            return None
+        finally:
+            # Losers are cancelled; the local thread stops at its next check
+            cancel_event.set()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def _result(task: asyncio.Task) -> Optional[str]:
+        if task.cancelled():
+            return None
+        if task.exception() is not None:
+            logger.error("Transcription attempt failed: %s", task.exception())
+            return None
+        return task.result()
+
+    def _finish(self, winner: str, hedged: bool):
+        self.wins[winner] += 1
+        logger.info(
+            "Transcription won by %s%s; hedged %d/%d, wins %s",
+            winner, " (hedged)" if hedged else "", self.hedged, self.requests, dict(self.wins)
+        )
+
+    def summary(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "wins": dict(self.wins),
+            "hedge_delay_seconds": self.tracker.delay(),
+        }
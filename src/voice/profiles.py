@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class DecodeProfile:
+    """Whisper decoding options traded off between latency and accuracy.
+
+    The option names are shared by openai-whisper and faster-whisper, so a
+    profile's ``options()`` can be passed to either backend's transcribe.
+
+    Attributes:
+        name: Profile name used in requests
+        language: Fixed language, or None to detect it (an extra model pass)
+        beam_size: Beams for beam search; 1 decodes greedily
+        best_of: Candidates sampled at each non-zero fallback temperature
+        temperature: Fallback temperatures, retried in order when the
+            output looks like a hallucination
+        without_timestamps: Skip predicting segment timestamp tokens
+        condition_on_previous_text: Feed each window the previous window's
+            text; helps long dictation, only costs time on short commands
+    """
+    name: str
+    language: Optional[str] = "en"
+    beam_size: int = 1
+    best_of: int = 1
+    temperature: Tuple[float, ...] = (0.0,)
+    without_timestamps: bool = True
+    condition_on_previous_text: bool = False
+
+    def options(self) -> Dict[str, Any]:
+        """Keyword arguments for a local backend's transcribe."""
+        return {
+            "language": self.language,
+            "beam_size": self.beam_size,
+            "best_of": self.best_of,
+            "temperature": self.temperature,
+            "without_timestamps": self.without_timestamps,
+            "condition_on_previous_text": self.condition_on_previous_text,
+        }
+
+    def api_options(self) -> Dict[str, Any]:
+        """The subset the Whisper API accepts; it always decodes server-side."""
+        options = {"temperature": self.temperature[0]}
+        if self.language:
+            options["language"] = self.language
+        return options
+
+
+PROFILES: Dict[str, DecodeProfile] = {
+    profile.name: profile for profile in (
+        # Short English commands: one greedy pass, nothing else
+        DecodeProfile("command"),
+        # Longer English speech: context between windows, light fallback
+        DecodeProfile(
+            "dictation",
+            best_of=2,
+            temperature=(0.0, 0.2, 0.4),
+            without_timestamps=False,
+            condition_on_previous_text=True,
+        ),
+        # The libraries' defaults plus beam search: any language, full fallback
+        DecodeProfile(
+            "accurate",
+            language=None,
+            beam_size=5,
+            best_of=5,
+            temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+            without_timestamps=False,
+            condition_on_previous_text=True,
+        ),
+    )
+}
+
+
+def get_profile(name: Optional[str], default: str = "command") -> DecodeProfile:
+    """Look up a profile by name; None gives ``default``.
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    name = name or default
+    if name not in PROFILES:
+        raise ValueError(f"Unknown decode profile '{name}'. Available: {', '.join(PROFILES)}")
+    return PROFILES[name]
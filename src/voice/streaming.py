@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from typing import Dict, Optional
+
+from src.voice.codecs import FlacWriter, decode_to_pcm
+
+STREAM_ENCODINGS = ("pcm", "flac")
+
+
+class StreamError(Exception):
+    """Raised when a streamed upload is used out of order or is too large"""
+    pass
+
+
+class StreamingUpload:
+    """Incrementally assemble audio chunks into a single audio file.
+
+    Chunks are decoded and written to disk as they arrive, so by the time
+    the client finishes recording only transcription is left to do. PCM
+    streams are assembled into a 16-bit mono WAV file. FLAC streams are
+    re-encoded into one FLAC file, so the Whisper API receives the same
+    lossless compressed upload as ``/process-voice`` instead of a WAV
+    several times its size.
+
+    Args:
+        sample_rate: Sample rate of the assembled audio
+        max_seconds: Maximum duration accepted before chunks are rejected
+        encoding: "pcm" for raw little-endian 16-bit samples, or "flac" for
+            chunks that are each a self-contained FLAC stream
+    """
+
+    def __init__(self, sample_rate: int = 16000, max_seconds: int = 600, encoding: str = "pcm"):
+        if encoding not in STREAM_ENCODINGS:
+            raise StreamError(f"Unsupported stream encoding: {encoding}")
+        self.id = uuid.uuid4().hex
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        self.max_bytes = max_seconds * sample_rate * 2
+        self.bytes_received = 0  # bytes over the wire
+        self.pcm_bytes = 0  # decoded bytes written to the file
+        self.next_seq = 0
+        self.last_activity = time.monotonic()
+        self._lock = threading.Lock()
+
+        fd, self.path = tempfile.mkstemp(suffix=f".{'flac' if encoding == 'flac' else 'wav'}")
+        os.close(fd)
+        if encoding == "flac":
+            self._writer = FlacWriter(self.path, sample_rate)
+        else:
+            self._writer = wave.open(self.path, "wb")
+            self._writer.setnchannels(1)
+            self._writer.setsampwidth(2)
+            self._writer.setframerate(sample_rate)
+
+    def append(self, seq: int, data: bytes):
+        """Append a chunk of audio.
+
+        Args:
+            seq: Zero-based chunk sequence number, used to reject reordering
+            data: Chunk bytes in the stream's encoding
+        """
+        if self.encoding == "flac":
+            try:
+                pcm = decode_to_pcm(data, self.sample_rate, fmt="flac").tobytes()
+            except Exception as e:
+                raise StreamError(f"Could not decode chunk: {e}")
+        else:
+            pcm = data
+        
+        with self._lock:
+            if self._writer is None:
+                raise StreamError("Stream already finished")
+            if seq != self.next_seq:
+                raise StreamError(f"Expected chunk {self.next_seq}, got {seq}")
+            if self.pcm_bytes + len(pcm) > self.max_bytes:
+                raise StreamError("Stream exceeds maximum duration")
+            self._writer.writeframes(pcm)
+            self.bytes_received += len(data)
+            self.pcm_bytes += len(pcm)
+            self.next_seq += 1
+            self.last_activity = time.monotonic()
+
+    def finish(self) -> str:
+        """Close the assembled file and return its path."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            return self.path
+
+    def discard(self):
+        """Close and delete the backing file."""
+        self.finish()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class StreamRegistry:
+    """Track open streamed uploads and expire abandoned ones."""
+
+    def __init__(self, idle_timeout: float = 300.0):
+        self.idle_timeout = idle_timeout
+        self._streams: Dict[str, StreamingUpload] = {}
+        self._lock = threading.Lock()
+
+    def open(self, sample_rate: int = 16000, encoding: str = "pcm") -> StreamingUpload:
+        self.expire()
+        stream = StreamingUpload(sample_rate=sample_rate, encoding=encoding)
+        with self._lock:
+            self._streams[stream.id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> Optional[StreamingUpload]:
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def pop(self, stream_id: str) -> Optional[StreamingUpload]:
+        with self._lock:
+            return self._streams.pop(stream_id, None)
+
+    def expire(self):
+        """Discard streams that have not received data within the idle timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            stale = [sid for sid, s in self._streams.items() if s.last_activity < cutoff]
+            expired = [self._streams.pop(sid) for sid in stale]
+        for stream in expired:
+            stream.discard()
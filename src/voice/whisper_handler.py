@@ -1,42 +1,154 @@
-import whisper
+import asyncio
+import logging
 from pathlib import Path
 from typing import Optional
 import os
 from dotenv import load_dotenv
 from src.core.ai_services import AIServices
+from src.core.cancellation import cancel_event
+from src.core.tracing import add_attributes
+from src.voice.backends import STTBackend, create_backend
+from src.voice.cascade import ModelCascade
+from src.voice.hedging import HedgedTranscriber, LatencyTracker
+from src.voice.chunking import ChunkedTranscriber
+from src.voice.codecs import load_audio, probe_duration
+from src.voice.profiles import get_profile
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
 class WhisperSTT:
-    def __init__(self, model_name: str = "base.en", use_api: bool = False):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        use_api: bool = False,
+        backend: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        cascade_model: Optional[str] = None,
+        hedge_percentile: Optional[float] = None,
+        chunk_min_seconds: Optional[float] = None,
+        chunk_workers: Optional[int] = None,
+        profile: Optional[str] = None
+    ):
         """Initialize Whisper STT handler.
-        
+
         Args:
-            model_name (str): Name of the Whisper model to use (for local model)
+            model_name (str): Name of the Whisper model to use (for local model).
+                Defaults to CLAWD_STT_MODEL or "base.en"
             use_api (bool): Whether to use OpenAI's Whisper API instead of local model
+            backend (str): Local engine, "openai-whisper" or "faster-whisper".
+                Defaults to CLAWD_STT_BACKEND or "openai-whisper"
+            compute_type (str): Quantization for faster-whisper, e.g. "int8" or
+                "float32". Defaults to CLAWD_STT_COMPUTE_TYPE or "int8"
+            cascade_model (str): Small model to try first, escalating to
+                ``model_name`` only on low confidence or no recognised intent.
+                Defaults to CLAWD_STT_CASCADE_MODEL; unset disables the cascade
+            hedge_percentile (float): With ``use_api``, start the local model
+                when the API has not answered within this percentile of its
+                recent latency, and keep whichever finishes first. Defaults to
+                CLAWD_STT_HEDGE_PERCENTILE; unset disables hedging
+            chunk_min_seconds (float): Recordings at least this long are split
+                at silences and transcribed in parallel. Defaults to
+                CLAWD_STT_CHUNK_MIN_SECONDS or 45
+            chunk_workers (int): Concurrent API requests, or local worker
+                processes, for chunked transcription. Defaults to
+                CLAWD_STT_CHUNK_WORKERS, or 4 for the API and 2 locally
+            profile (str): Decode profile used when a request names none, see
+                src.voice.profiles. Defaults to CLAWD_STT_PROFILE or "command"
         """
         self.use_api = use_api
+        self.model_name = model_name or os.getenv("CLAWD_STT_MODEL", "base.en")
+        self.backend: Optional[STTBackend] = None
+        self.hedger: Optional[HedgedTranscriber] = None
+        self.default_profile = get_profile(profile or os.getenv("CLAWD_STT_PROFILE", "command")).name
+        
+        if hedge_percentile is None and os.getenv("CLAWD_STT_HEDGE_PERCENTILE"):
+            hedge_percentile = float(os.getenv("CLAWD_STT_HEDGE_PERCENTILE"))
+        
+        backend_name = backend or os.getenv("CLAWD_STT_BACKEND", "openai-whisper")
+        compute_type = compute_type or os.getenv("CLAWD_STT_COMPUTE_TYPE", "int8")
         if use_api:
             self.ai_services = AIServices()
-        else:
-            self.model = whisper.load_model(model_name)
-    
-    async def transcribe(self, audio_path: str | Path) -> Optional[str]:
-        """Transcribe audio file to text.
+        if not use_api or hedge_percentile is not None:
+            self.backend = create_backend(backend_name, self.model_name, compute_type=compute_type)
+            
+            cascade_model = cascade_model or os.getenv("CLAWD_STT_CASCADE_MODEL")
+            if cascade_model:
+                fast = create_backend(backend_name, cascade_model, compute_type=compute_type)
+                self.backend = ModelCascade(fast, self.backend)
+        if use_api and hedge_percentile is not None:
+            self.hedger = HedgedTranscriber(
+                self.ai_services.transcribe_audio_with_whisper_api,
+                self.backend,
+                LatencyTracker(percentile=hedge_percentile)
+            )
         
+        if chunk_workers is None:
+            chunk_workers = int(os.getenv("CLAWD_STT_CHUNK_WORKERS", "4" if use_api else "2"))
+        self.chunker = ChunkedTranscriber(
+            api_transcribe=self.ai_services.transcribe_audio_with_whisper_api if use_api else None,
+            local_backend=None if use_api else (backend_name, self.model_name, compute_type),
+            min_seconds=chunk_min_seconds or float(os.getenv("CLAWD_STT_CHUNK_MIN_SECONDS", "45")),
+            concurrency=chunk_workers
+        )
+
+    @property
+    def model(self):
+        """Underlying model object of the local backend."""
+        return self.backend.model if self.backend else None
+
+    def stats(self) -> dict:
+        """Cascade escalation and hedging win counts, where enabled."""
+        return {
+            "cascade": self.backend.stats.summary() if isinstance(self.backend, ModelCascade) else None,
+            "hedging": self.hedger.summary() if self.hedger else None,
+        }
+
+    async def transcribe(self, audio_path: str | Path, profile: Optional[str] = None) -> Optional[str]:
+        """Transcribe audio file to text.
+
         Args:
             audio_path: Path to the audio file
-            
+            profile: Decode profile name, e.g. "command" or "dictation";
+                the handler's default when None
+
         Returns:
             Transcribed text or None if transcription fails
+
+        Raises:
+            ValueError: If the profile is unknown
         """
+        decode = get_profile(profile, self.default_profile)
+        add_attributes(stt_profile=decode.name)
         try:
-            if self.use_api:
-                return await self.ai_services.transcribe_audio_with_whisper_api(str(audio_path))
+            duration = await asyncio.to_thread(probe_duration, str(audio_path))
+            add_attributes(audio_seconds=duration)
+            if duration is not None and self.chunker.should_chunk(duration):
+                add_attributes(stt_path="chunked")
+                return await self.chunker.transcribe(str(audio_path), decode, cancel_event())
+            
+            if self.hedger:
+                add_attributes(stt_path="hedged")
+                return await self.hedger.transcribe(str(audio_path), decode)
+            elif self.use_api:
+                add_attributes(stt_path="api")
+                return await self.ai_services.transcribe_audio_with_whisper_api(
+                    str(audio_path), **decode.api_options()
+                )
             else:
-                result = self.model.transcribe(str(audio_path))
-                return result["text"].strip()
+                add_attributes(stt_path=f"local:{self.backend.name}")
+                # Decoding in-process spares the model an ffmpeg subprocess
+                audio, decoder = await asyncio.to_thread(load_audio, str(audio_path))
+                add_attributes(decoder=decoder)
+                # Local inference is CPU-bound; keep it off the event loop. The
+                # thread outlives a cancelled request; backends that can stop
+                # early poll the request's cancel event
+                result = await asyncio.to_thread(
+                    self.backend.transcribe, audio, cancel_event=cancel_event(), **decode.options()
+                )
+                return result.text
         except Exception as e:
-            print(f"Transcription error: {e}")
-            return None 
\ No newline at end of file
+            logger.error("Transcription error: %s", e)
+            return None
@@ -0,0 +1,5 @@
+import os
+
+# Set before the app modules are imported, so the test suite never appends
+# spans to the user's ~/.clawd/traces.jsonl
+os.environ["CLAWD_TRACE_EXPORTER"] = "none"
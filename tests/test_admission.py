@@ -0,0 +1,131 @@
+import pytest
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.admission import (
+    AdmissionController, AdmissionMiddleware, ClientRateLimiter, Overloaded, StageLimiter, TokenBucket
+)
+
+class TestTokenBucket:
+    def test_burst_then_reject(self):
+        bucket = TokenBucket(rate=1.0, burst=2)
+        assert bucket.try_acquire()[0]
+        assert bucket.try_acquire()[0]
+        admitted, wait = bucket.try_acquire()
+        assert not admitted
+        assert 0 < wait <= 1.0
+
+    def test_clients_are_independent(self):
+        limiter = ClientRateLimiter(rate_per_minute=1, burst=1)
+        assert limiter.try_acquire("a")[0]
+        assert not limiter.try_acquire("a")[0]
+        assert limiter.try_acquire("b")[0]
+
+    def test_forgets_old_clients(self):
+        limiter = ClientRateLimiter(rate_per_minute=1, burst=1, max_clients=2)
+        for client in ("a", "b", "c"):
+            limiter.try_acquire(client)
+        assert len(limiter._buckets) == 2
+
+class TestStageLimiter:
+    @pytest.mark.asyncio
+    async def test_queue_then_reject(self):
+        stage = StageLimiter("transcription", limit=1, max_queue=1)
+        release = asyncio.Event()
+        order = []
+        
+        async def work(name):
+            async with stage.slot():
+                order.append(name)
+                await release.wait()
+        
+        first = asyncio.create_task(work("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(work("second"))
+        await asyncio.sleep(0)
+        assert stage.active == 1 and stage.waiting == 1
+        assert stage.is_full()
+        
+        with pytest.raises(Overloaded) as excinfo:
+            async with stage.slot():
+                pass
+        assert excinfo.value.status_code == 503
+        assert int(excinfo.value.headers["Retry-After"]) >= 1
+        assert stage.rejected == 1
+        
+        release.set()
+        await asyncio.gather(first, second)
+        assert order == ["first", "second"]
+        assert stage.active == 0 and stage.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        stage = StageLimiter("execution", limit=1, max_queue=2)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with stage.slot():
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert stage.waiting == 0
+        
+        release.set()
+        await holder
+        assert stage.active == 0
+
+def make_client(rate_per_minute=60, burst=2, max_queue=1, trusted_proxies=()):
+    controller = AdmissionController(rate_per_minute, burst, {"transcription": 1}, max_queue)
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=controller,
+        paths={"/work": "transcription"},
+        trusted_proxies=trusted_proxies
+    )
+    
+    @app.post("/work")
+    async def work():
+        return {"ok": True}
+    
+    @app.post("/cheap")
+    async def cheap():
+        return {"ok": True}
+    
+    return TestClient(app), controller
+
+class TestAdmissionMiddleware:
+    def test_rate_limit_returns_429(self):
+        client, controller = make_client(burst=2)
+        assert client.post("/work").status_code == 200
+        assert client.post("/work").status_code == 200
+        response = client.post("/work")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert controller.rate_limited == 1
+        
+        # Other paths are unaffected, and a made-up client ID gets no new bucket
+        assert client.post("/cheap").status_code == 200
+        assert client.post("/work", headers={"X-Client-ID": "other"}).status_code == 429
+
+    def test_client_id_trusted_from_proxy(self):
+        # TestClient connects from "testclient"
+        client, _ = make_client(burst=1, trusted_proxies=["testclient"])
+        assert client.post("/work", headers={"X-Client-ID": "a"}).status_code == 200
+        assert client.post("/work", headers={"X-Client-ID": "a"}).status_code == 429
+        assert client.post("/work", headers={"X-Client-ID": "b"}).status_code == 200
+
+    def test_full_stage_returns_503(self):
+        client, controller = make_client()
+        stage = controller.stages["transcription"]
+        stage.active = 1
+        stage._waiters.append(object())  # a queued request
+        response = client.post("/work")
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
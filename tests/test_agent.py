@@ -1,10 +1,17 @@
 import pytest
+from pathlib import Path
 from src.core.agent import CommandParser, ComputerAgent
 
 @pytest.fixture
 def agent():
     return ComputerAgent()
 
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    """Notes go to a temporary home instead of ~/Documents/CLAWD_Notes."""
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    return tmp_path
+
 class TestCommandParser:
     def test_open_app_command(self):
         test_cases = [
@@ -78,9 +85,158 @@ class TestComputerAgent:
         assert isinstance(result["results"], list)
 
     @pytest.mark.asyncio
-    async def test_execute_create_note(self, agent):
+    async def test_execute_create_note(self, agent, home):
         test_content = "test note content"
         result = await agent.execute_command(f"create note saying {test_content}")
         assert result["status"] == "success"
         assert result["action"] == "create_note"
-        assert result["note_path"] is not None 
\ No newline at end of file
+        assert result["note_path"] is not None
+        assert Path(result["note_path"]).parent == home / "Documents" / "CLAWD_Notes"
+
+    @pytest.mark.asyncio
+    async def test_execute_with_intent(self, agent, home):
+        intent = {"action": "create_note", "params": "Buy Milk", "summary": "Make a note"}
+        result = await agent.execute_command("please jot this down: Buy Milk", intent=intent)
+        assert result["status"] == "success"
+        assert result["action"] == "create_note"
+
+    @pytest.mark.asyncio
+    async def test_invalid_intent_falls_back_to_parser(self, agent):
+        intent = {"action": "rm", "params": "", "summary": "Unclear"}
+        result = await agent.execute_command("search for files with test", intent=intent)
+        assert result["action"] == "search_files"
+
+    @pytest.mark.asyncio
+    async def test_declined_intent_not_run(self, agent, monkeypatch):
+        monkeypatch.setattr(agent.system, "open_application", lambda name: pytest.fail("ran a declined command"))
+        intent = {"action": "none", "params": "", "summary": "CLAWD cannot install software"}
+        result = await agent.execute_command("open the installer and install everything", intent=intent)
+        assert result["status"] == "error"
+        assert result["action"] == "none"
+        assert result["message"] == "CLAWD cannot install software"
+
+class TestIntent:
+    def test_from_intent(self):
+        parsed = CommandParser.from_intent({"action": "open_app", "params": " Chrome ", "summary": "Open Chrome"})
+        assert parsed == {"action": "open_app", "params": "Chrome"}
+
+    def test_from_intent_rejects_invalid(self):
+        assert CommandParser.from_intent(None) is None
+        assert CommandParser.from_intent({"action": "none", "params": "x"}) is None
+        assert CommandParser.from_intent({"action": "format_disk", "params": "c"}) is None
+        assert CommandParser.from_intent({"action": "open_app"}) is None
+
+    def test_search_mode(self):
+        assert CommandParser.parse_command("find documents containing budget")["content"] is True
+        assert CommandParser.parse_command("search for files with report")["content"] is False
+        intent = {"action": "search_files", "params": "budget", "search_content": True, "summary": "Search"}
+        assert CommandParser.from_intent(intent)["content"] is True
+
+class TestCompoundCommands:
+    def test_parse_plan_splits_independent_commands(self):
+        plan = CommandParser.parse_plan("open firefox and create a note saying standup at 10")
+        assert [(s["action"], s["params"], s["depends_on"]) for s in plan] == [
+            ("open_app", "firefox", []),
+            ("create_note", "standup at 10", []),
+        ]
+
+    def test_then_adds_dependency(self):
+        plan = CommandParser.parse_plan("open chrome, open slack and then google weather")
+        assert [s["action"] for s in plan] == ["open_app", "open_app", "web_search"]
+        assert [s["depends_on"] for s in plan] == [[], [], [1]]
+
+    def test_and_inside_params_is_kept(self):
+        plan = CommandParser.parse_plan("create a note saying bread and milk")
+        assert len(plan) == 1
+        assert plan[0]["params"] == "bread and milk"
+
+    @pytest.mark.parametrize("text, params", [
+        ("make a note saying call mom and make dinner", "call mom and make dinner"),
+        ("create a note saying buy eggs, find a plumber", "buy eggs, find a plumber"),
+    ])
+    def test_note_text_not_split(self, text, params):
+        plan = CommandParser.parse_plan(text)
+        assert [(s["action"], s["params"]) for s in plan] == [("create_note", params)]
+
+    def test_unparseable_part_joins_previous(self):
+        plan = CommandParser.parse_plan("open spotify and start playing")
+        assert [(s["action"], s["params"]) for s in plan] == [("open_app", "spotify and start playing")]
+
+    def test_note_followed_by_sequenced_command(self):
+        plan = CommandParser.parse_plan("make a note saying check prices and then open firefox")
+        assert [(s["action"], s["params"], s["depends_on"]) for s in plan] == [
+            ("create_note", "check prices", []),
+            ("open_app", "firefox", [0]),
+        ]
+
+    def test_plan_from_intent_steps(self):
+        intent = {
+            "action": "open_app", "params": "firefox", "summary": "Open Firefox and note standup",
+            "steps": [
+                {"action": "open_app", "params": "firefox"},
+                {"action": "create_note", "params": "standup at 10", "after_previous": True},
+            ],
+        }
+        plan = CommandParser.plan_from_intent(intent)
+        assert [(s["action"], s["depends_on"]) for s in plan] == [("open_app", []), ("create_note", [0])]
+
+    def test_plan_from_intent_invalid_step_uses_top_level(self):
+        intent = {"action": "open_app", "params": "firefox", "steps": [{"action": "open_app", "params": "firefox"}, {"action": "rm"}]}
+        assert [s["action"] for s in CommandParser.plan_from_intent(intent)] == ["open_app"]
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self, agent, monkeypatch):
+        import time
+        monkeypatch.setattr(agent.system, "open_application", lambda name: time.sleep(0.2) or True)
+        monkeypatch.setattr(agent.system, "search_files", lambda query, content=False: time.sleep(0.2) or [])
+        started = time.monotonic()
+        result = await agent.execute_command("open firefox and search for files with report")
+        assert time.monotonic() - started < 0.35
+        assert result["action"] == "compound"
+        assert result["status"] == "success"
+        assert [s["action"] for s in result["steps"]] == ["open_app", "search_files"]
+
+    @pytest.mark.asyncio
+    async def test_dependent_step_skipped_after_failure(self, agent, monkeypatch):
+        monkeypatch.setattr(agent.system, "open_application", lambda name: False)
+        monkeypatch.setattr(agent.system, "search_files", lambda query, content=False: [])
+        result = await agent.execute_command("open firefox then search for files with report")
+        assert result["status"] == "error"
+        assert [s["status"] for s in result["steps"]] == ["error", "skipped"]
+        assert result["steps"][1]["depends_on"] == [1]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_notes_do_not_overwrite(self, agent, home):
+        result = await agent.execute_command("create a note saying alpha and make a note saying beta")
+        paths = [Path(s["note_path"]) for s in result["steps"]]
+        assert len(set(paths)) == 2
+        assert sorted(p.read_text() for p in paths) == ["alpha", "beta"]
+
+    @pytest.mark.asyncio
+    async def test_partial_success(self, agent, monkeypatch):
+        monkeypatch.setattr(agent.system, "open_application", lambda name: False)
+        monkeypatch.setattr(agent.system, "search_files", lambda query, content=False: [])
+        result = await agent.execute_command("open firefox and search for files with report")
+        assert result["status"] == "partial"
+        assert "Failed to open firefox" in result["message"]
+
+    @pytest.mark.asyncio
+    async def test_unstarted_steps_cancelled(self, agent, monkeypatch):
+        from src.core.cancellation import CancelScope, reset_scope, set_scope
+        scope = CancelScope()
+
+        def open_application(name):
+            # The client leaves while the first step runs
+            scope.cancel("disconnect")
+            return True
+
+        monkeypatch.setattr(agent.system, "open_application", open_application)
+        monkeypatch.setattr(agent.system, "search_files", lambda query, content=False: [])
+        token = set_scope(scope)
+        try:
+            result = await agent.execute_command("open firefox then search for files with report")
+        finally:
+            reset_scope(token)
+        assert [s["status"] for s in result["steps"]] == ["success", "cancelled"]
+        assert result["status"] == "partial"
+        assert scope.steps_skipped == 1
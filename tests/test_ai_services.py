@@ -0,0 +1,158 @@
+import pytest
+import json
+from types import SimpleNamespace
+from src.core import ai_services
+from src.core.agent import AGENT_SYSTEM_PROMPT, DEFAULT_INTENT_MODEL, INTENT_TOOL
+from src.core.ai_services import AIServices, PromptCacheStats, caches_prefix, min_cacheable_tokens, prefix_tokens
+
+class FakeMessages:
+    """Streams content blocks the way the Messages API does."""
+    def __init__(self, content, stop_reason="tool_use", cache_read=0):
+        self.content = content
+        self.stop_reason = stop_reason
+        self.usage = SimpleNamespace(input_tokens=12, cache_read_input_tokens=cache_read, cache_creation_input_tokens=0)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        assert kwargs["stream"] is True
+
+        async def events():
+            yield SimpleNamespace(type="message_start", message=SimpleNamespace(usage=self.usage))
+            for index, block in enumerate(self.content):
+                if block.type == "tool_use":
+                    yield SimpleNamespace(type="content_block_start", index=index,
+                                          content_block=SimpleNamespace(type="tool_use", name=block.name))
+                    arguments = json.dumps(block.input)
+                    for part in (arguments[:5], arguments[5:]):
+                        yield SimpleNamespace(type="content_block_delta", index=index,
+                                              delta=SimpleNamespace(type="input_json_delta", partial_json=part))
+                else:
+                    yield SimpleNamespace(type="content_block_start", index=index,
+                                          content_block=SimpleNamespace(type="text"))
+                    yield SimpleNamespace(type="content_block_delta", index=index,
+                                          delta=SimpleNamespace(type="text_delta", text=block.text))
+            yield SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason=self.stop_reason))
+            yield SimpleNamespace(type="message_stop")
+        return events()
+
+class StreamingMessages:
+    """Streams text deltas after a message_start carrying cache usage."""
+    def __init__(self, chunks, cache_read=0, cache_creation=0):
+        self.chunks = chunks
+        self.usage = SimpleNamespace(
+            input_tokens=12, cache_read_input_tokens=cache_read, cache_creation_input_tokens=cache_creation
+        )
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        assert kwargs["stream"] is True
+
+        async def events():
+            yield SimpleNamespace(type="message_start", message=SimpleNamespace(usage=self.usage))
+            for chunk in self.chunks:
+                yield SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text=chunk))
+            yield SimpleNamespace(type="message_stop")
+        return events()
+
+@pytest.fixture
+def services(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-openai-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-anthropic-key")
+    return AIServices()
+
+@pytest.fixture
+def cache_stats(monkeypatch):
+    stats = PromptCacheStats()
+    monkeypatch.setattr(ai_services, "prompt_cache_stats", stats)
+    return stats
+
+def tool_use(name, arguments):
+    return SimpleNamespace(type="tool_use", name=name, input=arguments)
+
+class TestClaudeToolCall:
+    @pytest.mark.asyncio
+    async def test_returns_tool_input(self, services):
+        arguments = {"action": "web_search", "params": "weather", "summary": "Look up the weather"}
+        messages = FakeMessages([tool_use("run_command", arguments)])
+        services.claude_client = SimpleNamespace(messages=messages)
+
+        assert await services.get_claude_tool_call("google the weather", INTENT_TOOL) == arguments
+        request = messages.calls[0]
+        assert request["max_tokens"] <= 200
+        assert request["tool_choice"] == {"type": "tool", "name": "run_command"}
+        assert request["tools"] == [INTENT_TOOL]
+
+    @pytest.mark.asyncio
+    async def test_records_time_to_first_token(self, services, cache_stats):
+        messages = FakeMessages([tool_use("run_command", {"action": "none", "params": "x"})], cache_read=900)
+        services.claude_client = SimpleNamespace(messages=messages)
+        await services.get_claude_tool_call("hmm", INTENT_TOOL)
+        summary = cache_stats.summary()
+        assert summary["cache_read_tokens"] == 900
+        assert summary["ttft_ms_p50_cached"] is not None
+
+    @pytest.mark.asyncio
+    async def test_missing_tool_call(self, services):
+        text = SimpleNamespace(type="text", text="I am not sure")
+        services.claude_client = SimpleNamespace(messages=FakeMessages([text], stop_reason="end_turn"))
+        assert await services.get_claude_tool_call("hmm", INTENT_TOOL) is None
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_cached_with_tool(self, services, cache_stats):
+        messages = FakeMessages([tool_use("run_command", {"action": "none", "params": "x"})])
+        services.claude_client = SimpleNamespace(messages=messages)
+        await services.get_claude_tool_call("hmm", INTENT_TOOL, system=AGENT_SYSTEM_PROMPT)
+        request = messages.calls[0]
+        assert request["system"] == [
+            {"type": "text", "text": AGENT_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+        ]
+        assert cache_stats.requests == 1
+
+class TestClaudeResponse:
+    @pytest.mark.asyncio
+    async def test_streams_text_and_records_cache_usage(self, services, cache_stats):
+        messages = StreamingMessages(["Opens ", "Chrome."], cache_read=1200)
+        services.claude_client = SimpleNamespace(messages=messages)
+        text = await services.get_claude_response("Explain this command: open chrome", system=AGENT_SYSTEM_PROMPT)
+        assert text == "Opens Chrome."
+        request = messages.calls[0]
+        assert request["system"][0]["text"] == AGENT_SYSTEM_PROMPT
+        assert request["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert request["messages"] == [{"role": "user", "content": "Explain this command: open chrome"}]
+        summary = cache_stats.summary()
+        assert summary["cache_hits"] == 1
+        assert summary["cache_read_tokens"] == 1200
+        assert summary["ttft_ms_p50_cached"] is not None
+        assert summary["ttft_ms_p50_uncached"] is None
+
+    @pytest.mark.asyncio
+    async def test_without_system_prompt(self, services, cache_stats):
+        messages = StreamingMessages(["hi"], cache_creation=0)
+        services.claude_client = SimpleNamespace(messages=messages)
+        assert await services.get_claude_response("hello") == "hi"
+        assert "system" not in messages.calls[0]
+        assert cache_stats.summary()["cache_hits"] == 0
+
+
+@pytest.mark.parametrize("model, minimum", [
+    ("claude-3-haiku-20240307", 2048),
+    ("claude-3-sonnet-20240229", 1024),
+    ("claude-3-opus-20240229", 1024),
+])
+def test_min_cacheable_tokens(model, minimum):
+    assert min_cacheable_tokens(model) == minimum
+
+def test_prefix_checked_against_model_minimum():
+    tokens = prefix_tokens(AGENT_SYSTEM_PROMPT, [INTENT_TOOL])
+    assert min_cacheable_tokens("claude-3-sonnet-20240229") <= tokens < min_cacheable_tokens("claude-3-haiku-20240307")
+    # Haiku would process the whole prompt uncached on every request
+    assert not caches_prefix("claude-3-haiku-20240307", AGENT_SYSTEM_PROMPT, [INTENT_TOOL])
+
+def test_default_tool_path_is_cached():
+    assert caches_prefix(DEFAULT_INTENT_MODEL, AGENT_SYSTEM_PROMPT, [INTENT_TOOL])
+
+def test_prompt_alone_not_padded_to_minimum():
+    # Legacy mode sends no tool, so it keeps the short instruction
+    assert not caches_prefix("claude-3-sonnet-20240229", AGENT_SYSTEM_PROMPT)
@@ -0,0 +1,167 @@
+import pytest
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
+from src.api.cancellation import CancellationMiddleware, RequestCancelled, checkpoint
+from src.core.cancellation import CancellationStats, CancelScope, cancel_event, reset_scope, set_scope
+
+def make_app(stats, stage="interpretation", seconds=0.0, default_timeout=5.0):
+    state = {"finished": False, "cancelled": False, "event": None}
+    app = FastAPI()
+    app.add_middleware(
+        CancellationMiddleware,
+        stats=stats,
+        paths={"/work": "interpretation", "/stream/*/finish": "transcription"},
+        default_timeout=default_timeout
+    )
+
+    async def run():
+        state["event"] = cancel_event()
+        try:
+            checkpoint(stage)
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        state["finished"] = True
+
+    @app.post("/work")
+    async def work(payload: dict):
+        await run()
+        return {"echo": payload}
+
+    @app.post("/stream/{stream_id}/finish")
+    async def finish(stream_id: str):
+        await run()
+        return {"stream": stream_id}
+
+    @app.post("/other")
+    async def other():
+        state["event"] = cancel_event()
+        return {}
+
+    return app, state
+
+async def post(app, path, json=None, headers=None):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        return await client.post(path, json=json, headers=headers)
+
+async def call_then_disconnect(app, path, after):
+    """Drive the app like a server whose client leaves ``after`` seconds in."""
+    sent = []
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    return sent
+
+class TestCancellationMiddleware:
+    @pytest.mark.asyncio
+    async def test_completed_request_untouched(self):
+        stats = CancellationStats()
+        app, state = make_app(stats)
+        response = await post(app, "/work", json={"a": 1})
+        assert response.json() == {"echo": {"a": 1}}
+        assert state["finished"]
+        assert stats.summary()["requests"] == 1
+        assert stats.summary()["cancelled"] == {}
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_and_counts_skipped_stages(self):
+        stats = CancellationStats()
+        app, state = make_app(stats, seconds=5.0)
+        started = time.monotonic()
+        response = await post(app, "/work", json={}, headers={"X-Request-Timeout": "0.1"})
+        assert response.status_code == 504
+        assert time.monotonic() - started < 2.0
+        assert state["cancelled"] and state["event"].is_set()
+        assert stats.summary()["cancelled"] == {"deadline": 1}
+        assert stats.summary()["stages_skipped"] == {"interpretation": 1, "execution": 1}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels(self):
+        stats = CancellationStats()
+        app, state = make_app(stats, stage="transcription", seconds=5.0)
+        sent = await call_then_disconnect(app, "/stream/abc/finish", after=0.05)
+        assert state["cancelled"]
+        assert sent[0]["status"] == 499
+        assert stats.summary()["cancelled"] == {"disconnect": 1}
+        assert stats.summary()["stages_skipped"] == {"transcription": 1, "interpretation": 1, "execution": 1}
+
+    @pytest.mark.asyncio
+    async def test_execution_runs_to_completion(self):
+        stats = CancellationStats()
+        app, state = make_app(stats, stage="execution", seconds=0.2)
+        response = await post(app, "/work", json={}, headers={"X-Request-Timeout": "0.05"})
+        assert response.status_code == 200
+        assert state["finished"] and not state["cancelled"]
+        assert stats.summary()["cancelled"] == {"deadline": 1}
+        assert stats.summary()["stages_skipped"] == {}
+
+    def test_timeout_header_capped(self):
+        app, _ = make_app(CancellationStats())
+        middleware = CancellationMiddleware(app, CancellationStats(), {}, default_timeout=5.0, max_timeout=10.0)
+        assert middleware._timeout({"headers": [(b"x-request-timeout", b"60")]}) == 10.0
+        assert middleware._timeout({"headers": [(b"x-request-timeout", b"soon")]}) == 5.0
+        assert middleware._timeout({"headers": []}) == 5.0
+
+    @pytest.mark.asyncio
+    async def test_other_paths_have_no_scope(self):
+        stats = CancellationStats()
+        app, state = make_app(stats)
+        await post(app, "/other")
+        assert state["event"] is None
+        assert stats.summary()["requests"] == 0
+
+class TestCheckpoint:
+    def test_outside_request_is_noop(self):
+        checkpoint("transcription")
+
+    def test_expired_scope_raises(self):
+        scope = CancelScope(deadline=time.monotonic() - 1)
+        token = set_scope(scope)
+        try:
+            with pytest.raises(RequestCancelled) as excinfo:
+                checkpoint("interpretation")
+        finally:
+            reset_scope(token)
+        assert excinfo.value.status_code == 504
+        assert scope.stages_skipped() == ("interpretation", "execution")
+
+    def test_enters_stage(self):
+        scope = CancelScope(first_stage="transcription")
+        token = set_scope(scope)
+        try:
+            checkpoint("execution")
+        finally:
+            reset_scope(token)
+        scope.cancel("disconnect")
+        assert scope.cancelled_in == "execution"
+        assert scope.stages_skipped() == ()
+
+    def test_expired_before_execution_counts_it(self):
+        scope = CancelScope(deadline=time.monotonic() - 1, first_stage="interpretation")
+        scope.enter("interpretation")
+        token = set_scope(scope)
+        try:
+            with pytest.raises(RequestCancelled):
+                checkpoint("execution")
+        finally:
+            reset_scope(token)
+        assert scope.stages_skipped() == ("execution",)
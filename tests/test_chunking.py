@@ -0,0 +1,130 @@
+import pytest
+import threading
+import wave
+import numpy as np
+from src.voice import chunking
+from src.voice.backends import Transcription, TranscriptionCancelled
+from src.voice.chunking import ChunkedTranscriber, split_on_silence, stitch
+from src.voice.profiles import PROFILES
+
+SAMPLE_RATE = 16000
+
+def speech_with_pauses(seconds, pause_every=6.0):
+    """Tone that drops to silence for 0.3s every ``pause_every`` seconds."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = np.sin(2 * np.pi * 220 * t) * 8000
+    samples[(t % pause_every) > pause_every - 0.3] = 0
+    return samples.astype(np.int16)
+
+class TestSplitOnSilence:
+    def test_short_audio_single_chunk(self):
+        samples = speech_with_pauses(10)
+        assert split_on_silence(samples, chunk_seconds=30) == [(0, len(samples))]
+
+    def test_cuts_land_in_pauses_with_overlap(self):
+        samples = speech_with_pauses(65)
+        bounds = split_on_silence(samples, chunk_seconds=20, overlap_seconds=1.0, search_seconds=5)
+        
+        assert bounds[0][0] == 0
+        assert bounds[-1][1] == len(samples)
+        for (start, cut), (next_start, _) in zip(bounds, bounds[1:]):
+            assert cut - start <= 20 * SAMPLE_RATE
+            assert samples[cut] == 0  # cut inside a pause
+            assert cut - next_start == SAMPLE_RATE  # 1s overlap
+
+    def test_no_silence_falls_back_to_target(self):
+        samples = np.full(50 * SAMPLE_RATE, 8000, dtype=np.int16)
+        bounds = split_on_silence(samples, chunk_seconds=20, overlap_seconds=1.0)
+        assert len(bounds) == 3
+        assert all(end - start <= 20 * SAMPLE_RATE for start, end in bounds)
+
+class TestStitch:
+    def test_overlap_removed(self):
+        texts = ["please open the budget report", "Budget report, and email it to Sam."]
+        assert stitch(texts) == "please open the budget report and email it to Sam."
+
+    def test_no_overlap(self):
+        assert stitch(["first part.", "second part."]) == "first part. second part."
+
+    def test_empty_chunks(self):
+        assert stitch(["hello world", "", "world again"]) == "hello world again"
+
+class TestChunkedTranscriber:
+    @pytest.mark.asyncio
+    async def test_api_chunks_in_parallel_and_in_order(self):
+        seen = []
+        
+        async def api_transcribe(path):
+            with wave.open(path, 'rb') as wf:
+                frames = wf.getnframes()
+            seen.append(frames)
+            return f"chunk of {frames} samples"
+        
+        transcriber = ChunkedTranscriber(api_transcribe=api_transcribe, chunk_seconds=20, min_seconds=30)
+        samples = speech_with_pauses(65)
+        text = await transcriber.transcribe_samples(samples)
+        
+        assert len(seen) == 4
+        assert sum(seen) > len(samples)  # overlaps are transcribed twice
+        assert text.startswith(f"chunk of {seen[0]} samples")
+
+    @pytest.mark.asyncio
+    async def test_profile_sent_with_every_chunk(self):
+        received = []
+        
+        async def api_transcribe(path, **options):
+            received.append(options)
+            return "text"
+        
+        transcriber = ChunkedTranscriber(api_transcribe=api_transcribe, chunk_seconds=20)
+        assert await transcriber.transcribe_samples(speech_with_pauses(65), PROFILES["dictation"]) is not None
+        assert len(received) == 4
+        assert all(options == PROFILES["dictation"].api_options() for options in received)
+
+    def test_profile_options_reach_local_workers(self, monkeypatch):
+        received = {}
+        
+        class Backend:
+            def transcribe(self, audio, **options):
+                received.update(options)
+                return Transcription("text")
+        
+        monkeypatch.setattr(chunking, "_worker_backend", Backend())
+        options = PROFILES["command"].options()
+        assert chunking._transcribe_in_worker(speech_with_pauses(1), options) == "text"
+        assert received == options
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_unstarted_chunks(self):
+        cancel = threading.Event()
+        calls = []
+        
+        async def api_transcribe(path):
+            calls.append(path)
+            cancel.set()
+            return "text"
+        
+        transcriber = ChunkedTranscriber(api_transcribe=api_transcribe, chunk_seconds=20, concurrency=1)
+        with pytest.raises(TranscriptionCancelled):
+            await transcriber.transcribe_samples(speech_with_pauses(65), cancel_event=cancel)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_fails_transcription(self):
+        calls = []
+        
+        async def api_transcribe(path):
+            calls.append(path)
+            return None if len(calls) == 2 else "text"
+        
+        transcriber = ChunkedTranscriber(api_transcribe=api_transcribe, chunk_seconds=20)
+        assert await transcriber.transcribe_samples(speech_with_pauses(50)) is None
+
+    def test_should_chunk(self):
+        transcriber = ChunkedTranscriber(local_backend=("openai-whisper", "base.en", "int8"), min_seconds=45)
+        assert not transcriber.should_chunk(10)
+        assert transcriber.should_chunk(60)
+
+    def test_requires_a_backend(self):
+        with pytest.raises(ValueError):
+            ChunkedTranscriber()
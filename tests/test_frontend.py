@@ -1,5 +1,6 @@
 import pytest
 from src.frontend.app import AudioRecorder
+from src.frontend.audio import VoiceActivityDetector
 import numpy as np
 import av
 import wave
@@ -30,20 +31,20 @@ class TestAudioRecorder:
     def test_init(self, recorder):
         assert recorder.recording == False
         assert recorder.recorded_file is None
-        assert len(recorder.audio_chunks) == 0
+        assert len(recorder.samples) == 0
         assert len(recorder.audio_buffer) == 0
     
     def test_start_recording(self, recorder):
         recorder.start_recording()
         assert recorder.recording == True
         assert recorder.recorded_file is None
-        assert len(recorder.audio_chunks) == 0
+        assert len(recorder.samples) == 0
         assert len(recorder.audio_buffer) == 0
     
     def test_process_audio(self, recorder, mock_audio_frame):
         recorder.start_recording()
         frame = recorder.process_audio(mock_audio_frame)
-        assert len(recorder.audio_chunks) > 0
+        assert len(recorder.samples) == len(mock_audio_frame.to_ndarray())
         assert isinstance(frame, MockFrame)
     
     def test_stop_recording(self, recorder, mock_audio_frame):
@@ -68,8 +69,60 @@ class TestAudioRecorder:
         recorder.start_recording()
         recorder.process_audio(mock_audio_frame)
         assert len(recorder.audio_buffer) > 0
+        assert len(recorder.envelope) == len(recorder.audio_buffer)
         
         # Test buffer limits
         for _ in range(2000):  # More than maxlen
             recorder.audio_buffer.append(1.0)
-        assert len(recorder.audio_buffer) == 1000  # Should be limited to maxlen 
\ No newline at end of file
+        assert len(recorder.audio_buffer) == 1000  # Should be limited to maxlen 
+
+class TestHandsFreeRecording:
+    @staticmethod
+    def frames(samples, size=320):
+        return [MockFrame(samples[i:i + size]) for i in range(0, len(samples), size)]
+
+    @pytest.fixture
+    def utterance(self):
+        rng = np.random.default_rng(0)
+        quiet = rng.normal(0, 20, 8000).astype(np.int16)
+        t = np.arange(16000) / 16000
+        speech = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+        return quiet, speech
+
+    def test_trims_and_auto_stops(self, recorder, utterance):
+        quiet, speech = utterance
+        vad = VoiceActivityDetector(silence_ms=300, padding_ms=100)
+        recorder.start_recording(vad=vad)
+        
+        for frame in self.frames(np.concatenate((quiet, speech, quiet))):
+            recorder.process_audio(frame)
+        
+        assert recorder.auto_stopped
+        assert recorder.recording == False
+        # Pre-roll is bounded while waiting for speech
+        assert len(recorder.samples) < len(quiet) + len(speech) + len(quiet)
+        trimmed = recorder.trimmed()
+        assert abs(len(trimmed) - (len(speech) + 2 * vad.padding_samples)) <= 2 * vad.window
+
+    def test_no_speech_gives_no_file(self, recorder, utterance):
+        quiet, _ = utterance
+        recorder.start_recording(vad=VoiceActivityDetector())
+        for frame in self.frames(quiet):
+            recorder.process_audio(frame)
+        assert recorder.stop_recording() is None
+
+    def test_uploader_receives_only_trimmed_audio(self, recorder, utterance):
+        quiet, speech = utterance
+        
+        class Uploader:
+            def __init__(self):
+                self.sent = []
+            def send(self, samples):
+                self.sent.append(samples.copy())
+        
+        uploader = Uploader()
+        recorder.start_recording(uploader=uploader, vad=VoiceActivityDetector(silence_ms=300))
+        for frame in self.frames(np.concatenate((quiet, speech, quiet))):
+            recorder.process_audio(frame)
+        
+        assert np.array_equal(np.concatenate(uploader.sent), recorder.trimmed())
@@ -0,0 +1,125 @@
+import pytest
+import numpy as np
+from src.frontend.audio import SampleBuffer, RingBuffer, VoiceActivityDetector, window_stats, encode_audio
+from src.voice.codecs import decode_to_pcm
+
+class TestSampleBuffer:
+    def test_grows_past_capacity(self):
+        buf = SampleBuffer(capacity=4)
+        buf.extend(np.arange(3, dtype=np.int16))
+        buf.extend(np.arange(3, 8, dtype=np.int16))
+        assert len(buf) == 8
+        assert buf.capacity >= 8
+        assert buf.view().tolist() == [0, 1, 2, 3, 4, 5, 6, 7]
+
+    def test_clear_keeps_allocation(self):
+        buf = SampleBuffer(capacity=4)
+        buf.extend(np.ones(10, dtype=np.int16))
+        capacity = buf.capacity
+        buf.clear()
+        assert len(buf) == 0
+        assert buf.capacity == capacity
+
+    def test_keep_last(self):
+        buf = SampleBuffer(capacity=8)
+        buf.extend(np.arange(6, dtype=np.int16))
+        assert buf.keep_last(2) == 4
+        assert buf.view().tolist() == [4, 5]
+        assert buf.keep_last(5) == 0
+
+class TestRingBuffer:
+    def test_wraps_in_order(self):
+        ring = RingBuffer(maxlen=4)
+        ring.extend([1, 2, 3])
+        ring.extend([4, 5])
+        assert len(ring) == 4
+        assert ring.to_array().tolist() == [2, 3, 4, 5]
+        assert ring.last(2).tolist() == [4, 5]
+
+    def test_extend_larger_than_maxlen(self):
+        ring = RingBuffer(maxlen=3)
+        ring.append(0)
+        ring.extend(np.arange(10))
+        assert ring.to_array().tolist() == [7, 8, 9]
+
+    def test_rows(self):
+        ring = RingBuffer(maxlen=2, width=2)
+        ring.extend([[0, 1], [2, 3], [4, 5]])
+        assert ring.to_array().tolist() == [[2, 3], [4, 5]]
+
+def test_window_stats():
+    samples = np.array([3, -4, 3, -4, 1, 2], dtype=np.int16)
+    rms, envelope = window_stats(samples, window=2)
+    assert rms.shape == (3,)
+    assert rms[0] == pytest.approx(np.sqrt(12.5))
+    assert envelope.tolist() == [[-4, 3], [-4, 3], [1, 2]]
+    
+    rms, envelope = window_stats(samples[:1], window=2)
+    assert len(rms) == 0 and envelope.shape == (0, 2)
+
+class TestEncodeAudio:
+    @pytest.fixture
+    def speech_like(self):
+        t = np.arange(16000) / 16000
+        return (np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t) * 8000).astype(np.int16)
+
+    def test_flac_is_lossless_and_smaller(self, speech_like):
+        data = encode_audio(speech_like, "flac")
+        assert len(data) < speech_like.nbytes
+        assert np.array_equal(decode_to_pcm(data, 16000), speech_like)
+
+    def test_opus_round_trip(self, speech_like):
+        data = encode_audio(speech_like, "opus")
+        assert len(data) < speech_like.nbytes / 4
+        decoded = decode_to_pcm(data, 16000)
+        assert abs(len(decoded) - len(speech_like)) < 16000 * 0.05
+
+def tone(seconds, amplitude=8000, freq=220):
+    t = np.arange(int(16000 * seconds)) / 16000
+    return (np.sin(2 * np.pi * freq * t) * amplitude).astype(np.int16)
+
+def silence(seconds):
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 20, int(16000 * seconds)).astype(np.int16)
+
+def feed(vad, samples, frame=320):
+    for i in range(0, len(samples), frame):
+        vad.update(samples[i:i + frame])
+
+class TestVoiceActivityDetector:
+    def test_silence_does_not_trigger(self):
+        vad = VoiceActivityDetector()
+        feed(vad, silence(1.0))
+        assert not vad.triggered
+        assert vad.speech_start is None
+
+    def test_speech_bounds_and_endpoint(self):
+        vad = VoiceActivityDetector(silence_ms=500)
+        audio = np.concatenate((silence(0.5), tone(1.0), silence(0.3)))
+        feed(vad, audio)
+        assert vad.triggered
+        assert not vad.ended
+        assert abs(vad.speech_start - 8000) <= vad.window
+        assert abs(vad.speech_end - 24000) <= vad.window
+        
+        feed(vad, silence(0.3))
+        assert vad.ended
+
+    def test_short_click_ignored(self):
+        vad = VoiceActivityDetector(min_speech_ms=100)
+        feed(vad, np.concatenate((silence(0.2), tone(0.03), silence(0.2))))
+        assert not vad.triggered
+
+    def test_unvoiced_speech_counts(self):
+        vad = VoiceActivityDetector()
+        rng = np.random.default_rng(1)
+        hiss = rng.normal(0, 250, 16000).astype(np.int16)  # below energy threshold, high ZCR
+        feed(vad, np.concatenate((silence(0.2), hiss)))
+        assert vad.triggered
+
+    def test_reset(self):
+        vad = VoiceActivityDetector(silence_ms=200)
+        feed(vad, np.concatenate((tone(0.5), silence(0.5))))
+        assert vad.ended
+        vad.reset()
+        assert not vad.triggered and not vad.ended
@@ -0,0 +1,145 @@
+import pytest
+import asyncio
+import time
+from src.voice.backends import STTBackend, Transcription, TranscriptionCancelled
+from src.voice.hedging import HedgedTranscriber, LatencyTracker
+from src.voice.profiles import PROFILES
+
+class SlowLocalBackend(STTBackend):
+    name = "slow-local"
+    
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.cancelled = False
+        self.options = None
+    
+    def transcribe(self, audio, cancel_event=None, **options):
+        self.options = options
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancelled = True
+                raise TranscriptionCancelled()
+            time.sleep(0.005)
+        return Transcription(text="local text")
+
+def api(seconds, text="api text"):
+    calls = {"started": 0, "cancelled": 0}
+    
+    async def transcribe(path):
+        calls["started"] += 1
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            calls["cancelled"] += 1
+            raise
+        return text
+    
+    return transcribe, calls
+
+def tracker(delay=0.05):
+    return LatencyTracker(initial_delay=delay, min_delay=0.01)
+
+class TestLatencyTracker:
+    def test_initial_delay_until_enough_samples(self):
+        t = LatencyTracker(initial_delay=2.0, min_samples=3)
+        t.record(0.1)
+        assert t.delay() == 2.0
+
+    def test_percentile_with_floor(self):
+        t = LatencyTracker(percentile=50, min_samples=3, min_delay=0.5)
+        for seconds in (1.0, 2.0, 3.0):
+            t.record(seconds)
+        assert t.delay() == pytest.approx(2.0)
+        
+        t = LatencyTracker(percentile=50, min_samples=1, min_delay=0.5)
+        t.record(0.1)
+        assert t.delay() == 0.5
+
+class TestHedgedTranscriber:
+    @pytest.mark.asyncio
+    async def test_fast_api_not_hedged(self):
+        api_transcribe, calls = api(0.0)
+        local = SlowLocalBackend(1.0)
+        hedger = HedgedTranscriber(api_transcribe, local, tracker(0.5))
+        
+        assert await hedger.transcribe("a.wav") == "api text"
+        assert hedger.hedged == 0
+        assert hedger.wins["api"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_api_loses_to_local(self):
+        api_transcribe, calls = api(5.0)
+        hedger = HedgedTranscriber(api_transcribe, SlowLocalBackend(0.05), tracker())
+        
+        assert await hedger.transcribe("a.wav") == "local text"
+        assert hedger.hedged == 1
+        assert hedger.wins["local"] == 1
+        await asyncio.sleep(0)
+        assert calls["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_api_still_wins_race(self):
+        api_transcribe, _ = api(0.1)
+        local = SlowLocalBackend(2.0)
+        hedger = HedgedTranscriber(api_transcribe, local, tracker())
+        
+        assert await hedger.transcribe("a.wav") == "api text"
+        assert hedger.hedged == 1
+        assert hedger.wins["api"] == 1
+        await asyncio.sleep(0.05)
+        assert local.cancelled
+
+    @pytest.mark.asyncio
+    async def test_api_failure_falls_back_immediately(self):
+        api_transcribe, _ = api(0.0, text=None)
+        hedger = HedgedTranscriber(api_transcribe, SlowLocalBackend(0.0), tracker(5.0))
+        
+        start = time.monotonic()
+        assert await hedger.transcribe("a.wav") == "local text"
+        assert time.monotonic() - start < 1.0
+        assert hedger.wins["local"] == 1
+
+    @pytest.mark.asyncio
+    async def test_only_successful_latencies_recorded(self):
+        async def failing(path):
+            raise RuntimeError("rate limited")
+
+        t = tracker(5.0)
+        for api_transcribe in (api(0.0, text=None)[0], failing):
+            hedger = HedgedTranscriber(api_transcribe, SlowLocalBackend(0.0), t)
+            assert await hedger.transcribe("a.wav") == "local text"
+        assert len(t._samples) == 0
+        
+        hedger = HedgedTranscriber(api(0.0)[0], SlowLocalBackend(0.0), t)
+        assert await hedger.transcribe("a.wav") == "api text"
+        assert len(t._samples) == 1
+
+    @pytest.mark.asyncio
+    async def test_profile_options_passed_to_both(self):
+        received = {}
+
+        async def api_transcribe(path, **options):
+            received["api"] = options
+            await asyncio.sleep(5.0)
+
+        local = SlowLocalBackend(0.0)
+        hedger = HedgedTranscriber(api_transcribe, local, tracker(0.01))
+
+        assert await hedger.transcribe("a.wav", PROFILES["dictation"]) == "local text"
+        assert received["api"] == PROFILES["dictation"].api_options()
+        assert local.options == PROFILES["dictation"].options()
+
+def test_whisper_stt_hedging_stats(monkeypatch):
+    from src.voice import backends
+    from src.voice.whisper_handler import WhisperSTT
+    
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setitem(backends.BACKENDS, "slow-local", lambda model_name, **kwargs: SlowLocalBackend(0))
+    
+    stt = WhisperSTT(use_api=True, backend="slow-local", hedge_percentile=90)
+    assert stt.hedger is not None
+    assert stt.hedger.tracker.percentile == 90
+    assert stt.stats()["hedging"]["requests"] == 0
+    assert stt.stats()["cascade"] is None
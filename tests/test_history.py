@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.core.history import CommandHistory
+
+@pytest.fixture
+def history():
+    return CommandHistory(":memory:")
+
+def result(action, status="success"):
+    return {"status": status, "action": action, "message": "done"}
+
+class TestCommandHistory:
+    def test_record_and_get(self, history):
+        entry_id = history.record("text", "open chrome", result("open_app"), "Open Chrome")
+        entry = history.get(entry_id)
+        assert entry["text"] == "open chrome"
+        assert entry["action"] == "open_app"
+        assert entry["status"] == "success"
+        assert entry["interpretation"] == "Open Chrome"
+        assert entry["result"]["message"] == "done"
+        assert history.get(entry_id + 1) is None
+
+    def test_pagination_newest_first(self, history):
+        for i in range(25):
+            history.record("text", f"command {i}", result("create_note"))
+        
+        items, total = history.query(page=1, page_size=10)
+        assert total == 25
+        assert [item["text"] for item in items[:2]] == ["command 24", "command 23"]
+        
+        items, _ = history.query(page=3, page_size=10)
+        assert len(items) == 5
+        assert items[-1]["text"] == "command 0"
+
+    def test_filters(self, history):
+        history.record("voice", "open chrome", result("open_app"))
+        history.record("text", "open nothing", result("open_app", "error"))
+        history.record("text", "gibberish", {"status": "error", "message": "Could not understand command"})
+        
+        items, total = history.query(action="open_app")
+        assert total == 2
+        items, total = history.query(status="error")
+        assert total == 2
+        items, total = history.query(action="open_app", status="error")
+        assert [item["text"] for item in items] == ["open nothing"]
+
+    def test_time_filter(self, history):
+        history.record("text", "open chrome", result("open_app"))
+        now = datetime.now(timezone.utc)
+        assert history.query(since=now - timedelta(minutes=1))[1] == 1
+        assert history.query(since=now + timedelta(minutes=1))[1] == 0
+        assert history.query(until=now - timedelta(minutes=1))[1] == 0
+
+    def test_persists_to_disk(self, tmp_path):
+        db_path = tmp_path / "history" / "history.db"
+        CommandHistory(db_path).record("text", "open chrome", result("open_app"))
+        assert CommandHistory(db_path).query()[1] == 1
+
+    def test_clear(self, history):
+        history.record("text", "open chrome", result("open_app"))
+        assert history.clear() == 1
+        assert history.query()[1] == 0
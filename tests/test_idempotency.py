@@ -0,0 +1,195 @@
+import pytest
+import asyncio
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from src.api.idempotency import IdempotencyMiddleware, IdempotencyStore, StoredResponse, _BodyHasher
+
+def make_app(store, delay=0.0, fail_first=0, trusted_proxies=()):
+    calls = {"work": 0}
+    app = FastAPI()
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=store,
+        paths=["/work", "/upload", "/stream/"],
+        trusted_proxies=trusted_proxies
+    )
+
+    @app.post("/work")
+    async def work():
+        calls["work"] += 1
+        await asyncio.sleep(delay)
+        if calls["work"] <= fail_first:
+            raise HTTPException(503, "busy")
+        return {"run": calls["work"]}
+
+    @app.post("/stream/{stream_id}/finish")
+    async def finish(stream_id: str):
+        calls["work"] += 1
+        return {"stream": stream_id}
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        calls["work"] += 1
+        form = await request.form()
+        return {"size": len(await form["file"].read())}
+
+    @app.post("/other")
+    async def other():
+        calls["work"] += 1
+        return {"run": calls["work"]}
+
+    return app, calls
+
+class TestIdempotencyMiddleware:
+    def test_repeat_gets_stored_response(self):
+        app, calls = make_app(IdempotencyStore())
+        client = TestClient(app)
+        first = client.post("/work", headers={"Idempotency-Key": "abc"})
+        second = client.post("/work", headers={"Idempotency-Key": "abc"})
+        assert first.json() == second.json() == {"run": 1}
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert calls["work"] == 1
+
+    def test_without_key_or_other_path_runs_again(self):
+        app, calls = make_app(IdempotencyStore())
+        client = TestClient(app)
+        client.post("/work")
+        client.post("/work")
+        client.post("/other", headers={"Idempotency-Key": "abc"})
+        client.post("/other", headers={"Idempotency-Key": "abc"})
+        assert calls["work"] == 4
+
+    def test_keys_scoped_to_client_and_path(self):
+        # TestClient connects from "testclient"
+        app, calls = make_app(IdempotencyStore(), trusted_proxies=["testclient"])
+        client = TestClient(app)
+        client.post("/work", headers={"Idempotency-Key": "abc"})
+        client.post("/work", headers={"Idempotency-Key": "abc", "X-Client-ID": "other"})
+        client.post("/stream/1/finish", headers={"Idempotency-Key": "abc"})
+        assert calls["work"] == 3
+
+    def test_client_id_ignored_from_untrusted_peer(self):
+        app, calls = make_app(IdempotencyStore())
+        client = TestClient(app)
+        client.post("/work", headers={"Idempotency-Key": "abc", "X-Client-ID": "a"})
+        response = client.post("/work", headers={"Idempotency-Key": "abc", "X-Client-ID": "b"})
+        assert response.headers["Idempotent-Replayed"] == "true"
+        assert calls["work"] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_key_body_left_to_the_app(self):
+        # An app that rejects straight away, like admission control when busy
+        async def busy(scope, receive, send):
+            await send({"type": "http.response.start", "status": 503, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        read = []
+
+        async def receive():
+            read.append(True)
+            return {"type": "http.request", "body": b"x" * 1000, "more_body": False}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        store = IdempotencyStore()
+        middleware = IdempotencyMiddleware(busy, store, ["/work"])
+        scope = {
+            "type": "http", "method": "POST", "path": "/work", "query_string": b"",
+            "headers": [(b"idempotency-key", b"abc")], "client": ("127.0.0.1", 1),
+        }
+        await middleware(scope, receive, send)
+        assert sent[0]["status"] == 503
+        assert read == []
+        # Released, so the retry runs
+        assert ("127.0.0.1", "/work", b"abc") not in store
+
+    def test_retryable_failure_is_not_stored(self):
+        app, calls = make_app(IdempotencyStore(), fail_first=1)
+        client = TestClient(app)
+        assert client.post("/work", headers={"Idempotency-Key": "abc"}).status_code == 503
+        assert client.post("/work", headers={"Idempotency-Key": "abc"}).json() == {"run": 2}
+
+    def test_invalid_key_rejected(self):
+        app, calls = make_app(IdempotencyStore())
+        response = TestClient(app).post("/work", headers={"Idempotency-Key": "x" * 300})
+        assert response.status_code == 400
+        assert calls["work"] == 0
+
+    def test_key_reused_with_other_body_rejected(self):
+        app, calls = make_app(IdempotencyStore())
+        client = TestClient(app)
+        client.post("/work", params={"n": 1}, headers={"Idempotency-Key": "abc"})
+        response = client.post("/work", params={"n": 2}, headers={"Idempotency-Key": "abc"})
+        assert response.status_code == 422
+        assert calls["work"] == 1
+
+    def test_resent_upload_replayed_despite_new_boundary(self):
+        app, calls = make_app(IdempotencyStore())
+        client = TestClient(app)
+        files = {"file": ("a.wav", b"audio")}
+        first = client.post("/upload", files=files, headers={"Idempotency-Key": "abc"})
+        second = client.post("/upload", files=files, headers={"Idempotency-Key": "abc"})
+        assert first.json() == second.json() == {"size": 5}
+        assert calls["work"] == 1
+
+    @pytest.mark.asyncio
+    async def test_repeat_in_flight_waits_for_first(self):
+        store = IdempotencyStore()
+        app, calls = make_app(store, delay=0.1)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            responses = await asyncio.gather(*[
+                client.post("/work", headers={"Idempotency-Key": "abc"}) for _ in range(3)
+            ])
+        assert [r.json() for r in responses] == [{"run": 1}] * 3
+        assert calls["work"] == 1
+        assert store.waited == 2
+
+def test_fingerprint_independent_of_chunking():
+    headers = {b"content-type": b"multipart/form-data; boundary=XYZBOUNDARY"}
+    body = b"--XYZBOUNDARY\r\nfile contents\r\n--XYZBOUNDARY--\r\n"
+    whole = _BodyHasher({}, headers)
+    whole.update(body)
+    chunked = _BodyHasher({}, headers)
+    for i in range(0, len(body), 4):
+        chunked.update(body[i:i + 4])
+    other = _BodyHasher({}, {b"content-type": b"multipart/form-data; boundary=ABC"})
+    other.update(body.replace(b"XYZBOUNDARY", b"ABC"))
+    assert whole.hexdigest() == chunked.hexdigest() == other.hexdigest()
+
+class TestIdempotencyStore:
+    @pytest.mark.asyncio
+    async def test_bounded(self):
+        store = IdempotencyStore(max_keys=2)
+        for key in ("a", "b", "c"):
+            assert await store.claim(key) is None
+            store.complete(key, StoredResponse(200, [], b"{}"))
+        assert store.summary()["keys"] == 2
+        # The oldest key was forgotten and runs again
+        assert await store.claim("a") is None
+
+    @pytest.mark.asyncio
+    async def test_in_flight_keys_not_evicted(self):
+        store = IdempotencyStore(max_keys=1)
+        await store.claim("a")
+        await store.claim("b")
+        assert store.summary()["keys"] == 2
+
+    @pytest.mark.asyncio
+    async def test_expired(self):
+        store = IdempotencyStore(ttl=0.0)
+        await store.claim("a")
+        store.complete("a", StoredResponse(200, [], b"{}"))
+        await asyncio.sleep(0.01)
+        assert await store.claim("a") is None
+
+    @pytest.mark.asyncio
+    async def test_oversized_response_released(self):
+        store = IdempotencyStore(max_body_bytes=10)
+        await store.claim("a")
+        store.complete("a", StoredResponse(200, [], b"x" * 11))
+        assert await store.claim("a") is None
@@ -0,0 +1,101 @@
+import pytest
+import json
+import logging
+import logging.handlers
+import queue
+from src.core.logging_config import DeferredQueueHandler, JSONFormatter, SamplingFilter
+from src.core.tracing import Tracer
+
+class Expensive:
+    """Object whose string conversion is counted."""
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "expensive"
+
+@pytest.fixture
+def log_queue():
+    return queue.Queue()
+
+@pytest.fixture
+def logger(log_queue):
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter())
+    # Outside the logger hierarchy, so pytest's capture handler never sees it
+    logger = logging.Logger("isolated", logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+def drain(log_queue):
+    records = []
+    while not log_queue.empty():
+        records.append(log_queue.get_nowait())
+    return records
+
+class TestDeferredQueueHandler:
+    def test_formatting_left_to_listener(self, logger, log_queue):
+        value = Expensive()
+        logger.info("value is %s", value)
+        [record] = drain(log_queue)
+        assert value.formatted == 0
+        assert record.getMessage() == "value is expensive"
+
+    def test_captures_trace_context(self, logger, log_queue):
+        tracer = Tracer(None)
+        with tracer.span("request") as span:
+            logger.info("inside")
+        logger.info("outside")
+        inside, outside = drain(log_queue)
+        assert inside.trace_id == span.trace_id
+        assert inside.span_id == span.span_id
+        assert not hasattr(outside, "trace_id")
+
+class TestSamplingFilter:
+    def test_samples_per_call_site(self, logger, log_queue):
+        for _ in range(250):
+            logger.debug("frame", extra={"sample_every": 100})
+        records = drain(log_queue)
+        assert len(records) == 3
+        assert all(record.sampled == 100 for record in records)
+
+    def test_unsampled_records_pass(self, logger, log_queue):
+        for _ in range(5):
+            logger.info("request")
+        assert len(drain(log_queue)) == 5
+
+class TestJSONFormatter:
+    def test_structured_output(self):
+        record = logging.makeLogRecord({
+            "name": "clawd", "levelno": logging.INFO, "levelname": "INFO",
+            "msg": "took %d ms", "args": (12,), "stage": "transcription", "sample_every": 10,
+        })
+        entry = json.loads(JSONFormatter().format(record))
+        assert entry["message"] == "took 12 ms"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "clawd"
+        assert entry["stage"] == "transcription"
+        assert "sample_every" not in entry
+        assert entry["ts"].endswith("+00:00")
+
+    def test_exception_included(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.getLogger("clawd").makeRecord(
+                "clawd", logging.ERROR, __file__, 1, "failed", (), exc_info=__import__("sys").exc_info()
+            )
+        entry = json.loads(JSONFormatter().format(record))
+        assert "ValueError: boom" in entry["exc_info"]
+
+    def test_listener_writes_json_lines(self, logger, log_queue, tmp_path):
+        path = tmp_path / "app.log"
+        handler = logging.FileHandler(path)
+        handler.setFormatter(JSONFormatter())
+        listener = logging.handlers.QueueListener(log_queue, handler)
+        listener.start()
+        logger.warning("slow stage %s", "execution")
+        listener.stop()
+        handler.close()
+        assert json.loads(path.read_text())["message"] == "slow stage execution"
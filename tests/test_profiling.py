@@ -0,0 +1,97 @@
+import pytest
+import asyncio
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.routes import debug
+from src.core.profiling import LoopLagMonitor, SamplingProfiler, profile
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+def blocking_callback():
+    time.sleep(0.3)
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("CLAWD_ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(debug.router, prefix="/debug")
+    return TestClient(app)
+
+class TestSamplingProfiler:
+    def test_folded_stacks_show_busy_function(self):
+        worker = threading.Thread(target=spin, args=(0.3,), name="busy-worker")
+        worker.start()
+        profiler = SamplingProfiler(interval=0.002)
+        folded = profiler.run(0.2)
+        worker.join()
+
+        assert profiler.samples > 10
+        lines = [line for line in folded.splitlines() if line.startswith("busy-worker;")]
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert "spin (" in stack.split(";")[-1]
+        assert int(count) > 0
+
+    def test_one_profile_at_a_time(self):
+        results = []
+        first = threading.Thread(target=lambda: results.append(profile(0.2)))
+        first.start()
+        time.sleep(0.05)
+        assert profile(0.01) is None
+        first.join()
+        assert results[0] is not None
+
+class TestLoopLagMonitor:
+    @pytest.mark.asyncio
+    async def test_captures_blocking_stack(self):
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_callback()
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        summary = monitor.summary()
+        assert summary["stalls"] == 1
+        assert summary["max_lag_ms"] >= 200
+        stall = summary["recent"][0]
+        assert "blocking_callback" in stall["stack"]
+        assert stall["blocked_ms"] >= 100
+
+    @pytest.mark.asyncio
+    async def test_no_stalls_when_idle(self):
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02)
+        monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        assert monitor.stall_count == 0
+
+class TestDebugRoutes:
+    def test_requires_admin_token(self, client):
+        assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 403
+        response = client.get("/debug/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+
+    def test_disabled_without_configured_token(self, client, monkeypatch):
+        monkeypatch.delenv("CLAWD_ADMIN_TOKEN")
+        response = client.get("/debug/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": ""})
+        assert response.status_code == 404
+
+    def test_profile_returns_folded_stacks(self, client):
+        response = client.get("/debug/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for line in response.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+
+    def test_seconds_bounded(self, client):
+        response = client.get("/debug/profile", params={"seconds": 600}, headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 422
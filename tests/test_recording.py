@@ -0,0 +1,88 @@
+import pytest
+import hashlib
+from fastapi import HTTPException
+from src.core.recording import RequestRecorder, load_recordings, record_command
+from src.core.tracing import Tracer, collect_spans
+
+@pytest.fixture
+def tracer():
+    return Tracer(None)
+
+@pytest.fixture
+def replay_file(tmp_path):
+    return tmp_path / "replay.jsonl"
+
+class TestRequestRecorder:
+    def test_records_spans_and_actions_without_text(self, tracer, replay_file):
+        recorder = RequestRecorder(str(replay_file))
+        with recorder.record("text"):
+            with tracer.span("interpretation", queue_wait_ms=0.5):
+                with tracer.span("anthropic.tool_call", model="claude-3-haiku-20240307", prompt="secret"):
+                    pass
+            record_command("open firefox and create a note saying standup at 10")
+            with tracer.span("execution"):
+                pass
+        recorder.flush()
+        [record] = load_recordings(str(replay_file))
+        assert record["route"] == "text"
+        assert record["status"] == 200
+        assert record["chars"] == len("open firefox and create a note saying standup at 10")
+        assert record["actions"] == [
+            {"action": "open_app", "chars": 7, "depends_on": []},
+            {"action": "create_note", "chars": 13, "depends_on": []},
+        ]
+        assert set(record["spans"]) == {"interpretation", "anthropic.tool_call", "execution"}
+        assert record["spans"]["interpretation"]["queue_wait_ms"] == 0.5
+        assert record["spans"]["anthropic.tool_call"]["model"] == "claude-3-haiku-20240307"
+        assert "standup" not in replay_file.read_text()
+        assert "secret" not in replay_file.read_text()
+
+    def test_failed_request_status(self, tracer, replay_file):
+        recorder = RequestRecorder(str(replay_file))
+        with pytest.raises(HTTPException):
+            with recorder.record("voice"):
+                raise HTTPException(500, "Transcription failed")
+        recorder.flush()
+        assert load_recordings(str(replay_file))[0]["status"] == 500
+
+    def test_disabled_and_unsampled(self, replay_file):
+        with RequestRecorder(None).record("text") as recording:
+            assert recording is None
+        recorder = RequestRecorder(str(replay_file), sample_rate=0.0)
+        with recorder.record("text") as recording:
+            assert recording is None
+        record_command("open chrome")  # no-op outside a recording
+        assert not replay_file.exists()
+
+    def test_audio_hashed_and_kept(self, tmp_path, replay_file):
+        audio = tmp_path / "upload.ogg"
+        audio.write_bytes(b"OggS audio")
+        recorder = RequestRecorder(str(replay_file), audio_dir=str(tmp_path / "audio"))
+        with recorder.record("voice") as recording:
+            recorder.add_audio(recording, str(audio))
+        recorder.flush()
+        digest = hashlib.sha256(b"OggS audio").hexdigest()
+        assert load_recordings(str(replay_file))[0]["audio"] == {"format": "ogg", "bytes": 10, "sha256": digest}
+        assert (tmp_path / "audio" / f"{digest}.ogg").read_bytes() == b"OggS audio"
+
+    def test_recorded_decorator(self, replay_file):
+        recorder = RequestRecorder(str(replay_file))
+
+        @recorder.recorded("text")
+        async def route(command: str):
+            return command
+
+        import asyncio
+        assert asyncio.run(route("hi")) == "hi"
+        recorder.flush()
+        assert load_recordings(str(replay_file))[0]["route"] == "text"
+
+def test_collect_spans_without_exporter(tracer):
+    seen = []
+    with collect_spans(lambda span: seen.append(span.name)):
+        with tracer.span("outer"):
+            with tracer.span("inner"):
+                pass
+    with tracer.span("after"):
+        pass
+    assert seen == ["inner", "outer"]
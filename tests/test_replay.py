@@ -0,0 +1,22 @@
+from benchmarks.replay import compare_latencies, stage_latencies
+
+def record(total, **stages):
+    return {"total_ms": total, "spans": {name: {"ms": ms} for name, ms in stages.items()}}
+
+class TestLatencyComparison:
+    def test_stage_latencies(self):
+        recordings = [record(100 + i, transcription=50 + i, execution=1) for i in range(10)]
+        recordings.append(record(20, execution=1))
+        latencies = stage_latencies(recordings)
+        assert latencies["total"]["n"] == 11
+        assert latencies["transcription"]["n"] == 10
+        assert latencies["transcription"]["p50"] == 55
+        assert "interpretation" not in latencies
+
+    def test_regression_needs_relative_and_absolute_growth(self):
+        baseline = {"transcription": {"p50": 100, "p95": 200}, "history.record": {"p50": 1, "p95": 1}}
+        current = {"transcription": {"p50": 125, "p95": 205}, "history.record": {"p50": 2, "p95": 2.5}}
+        rows = {row["stage"]: row for row in compare_latencies(baseline, current)}
+        assert rows["transcription"]["regressed"]
+        assert rows["transcription"]["p50"] == (100, 125)
+        assert not rows["history.record"]["regressed"]
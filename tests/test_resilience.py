@@ -0,0 +1,197 @@
+import pytest
+import asyncio
+import time
+from src.core.cancellation import CancelScope, reset_scope, set_scope
+from src.core.resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    retry_after_seconds,
+)
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers)
+
+def flaky(errors, result="ok"):
+    """Coroutine function raising each of ``errors`` in turn, then returning ``result``."""
+    calls = {"count": 0}
+
+    async def fn():
+        calls["count"] += 1
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn, calls
+
+@pytest.fixture
+def guard():
+    return ProviderGuard(
+        "test",
+        transient_errors=(ConnectionError,),
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.05),
+        base_delay=0.001,
+        max_delay=0.01
+    )
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_additive_increase(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=4)
+        for _ in range(4):
+            limiter.on_success(0.1)
+        assert 4.9 < limiter.limit < 5.1
+
+    def test_overload_halves_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=1)
+        limiter.on_overload()
+        assert limiter.limit == 4
+        for _ in range(10):
+            limiter.on_overload()
+        assert limiter.limit == 1
+
+    def test_latency_spike_shrinks_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=10)
+        limiter.on_success(0.1)
+        before = limiter.limit
+        limiter.on_success(1.0)
+        assert limiter.limit < before
+
+    @pytest.mark.asyncio
+    async def test_slots_respect_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.inflight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        assert peak == 2
+        assert limiter.inflight == 0
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        breaker.before_call("p")
+        breaker.record_failure()
+        breaker.before_call("p")
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError) as exc:
+            breaker.before_call("p")
+        assert exc.value.retry_after > 9
+
+    def test_half_open_probe_closes_on_success(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call("p")
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("p")
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.before_call("p")
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_frees_slot(self, guard):
+        for _ in range(3):
+            guard.breaker.record_failure()
+        await asyncio.sleep(0.06)
+        probe = asyncio.create_task(guard.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # The next call is let through as a probe and closes the circuit
+        fn, calls = flaky([])
+        assert await guard.call(fn) == "ok"
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+class TestRetryAfter:
+    def test_seconds(self):
+        assert retry_after_seconds(FakeStatusError(429, {"retry-after": "2"})) == 2.0
+
+    def test_milliseconds_preferred(self):
+        error = FakeStatusError(429, {"retry-after": "2", "retry-after-ms": "150"})
+        assert retry_after_seconds(error) == pytest.approx(0.15)
+
+    def test_missing(self):
+        assert retry_after_seconds(ValueError("no response")) is None
+        assert retry_after_seconds(FakeStatusError(429, {"retry-after": "soon"})) is None
+
+class TestProviderGuard:
+    @pytest.mark.asyncio
+    async def test_no_retry_past_request_deadline(self, guard):
+        fn, calls = flaky([FakeStatusError(429, {"retry-after": "5"})])
+        scope = CancelScope(deadline=time.monotonic() + 1.0)
+        token = set_scope(scope)
+        try:
+            with pytest.raises(FakeStatusError):
+                await guard.call(fn, max_retries=2)
+        finally:
+            reset_scope(token)
+        assert calls["count"] == 1
+        assert scope.retries_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self, guard):
+        fn, calls = flaky([FakeStatusError(503), ConnectionError()])
+        assert await guard.call(fn, max_retries=2) == "ok"
+        assert calls["count"] == 3
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_backs_off_concurrency(self, guard):
+        fn, calls = flaky([FakeStatusError(429, {"retry-after-ms": "1"})])
+        before = guard.limiter.limit
+        assert await guard.call(fn, max_retries=1) == "ok"
+        assert guard.limiter.limit < before
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, guard):
+        fn, calls = flaky([FakeStatusError(500), FakeStatusError(500), FakeStatusError(500)])
+        with pytest.raises(FakeStatusError):
+            await guard.call(fn, max_retries=1)
+        assert calls["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_fatal_errors_not_retried(self, guard):
+        fn, calls = flaky([FakeStatusError(400)])
+        with pytest.raises(FakeStatusError):
+            await guard.call(fn, max_retries=3)
+        assert calls["count"] == 1
+        assert guard.breaker.failures == 0
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast_then_recovers(self, guard):
+        fn, calls = flaky([FakeStatusError(500)] * 3)
+        with pytest.raises(FakeStatusError):
+            await guard.call(fn, max_retries=2)
+        assert guard.breaker.state == CircuitBreaker.OPEN
+
+        with pytest.raises(CircuitOpenError):
+            await guard.call(fn)
+        assert calls["count"] == 3
+
+        await asyncio.sleep(0.06)
+        assert await guard.call(fn) == "ok"
+        assert guard.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,92 @@
+import pytest
+import wave
+import numpy as np
+from pathlib import Path
+from src.voice.streaming import StreamingUpload, StreamRegistry, StreamError
+from src.frontend.audio import encode_audio
+from src.voice.codecs import decode_to_pcm
+
+@pytest.fixture
+def pcm_chunk():
+    samples = (np.sin(np.linspace(0, 2 * np.pi, 800)) * 32767).astype(np.int16)
+    return samples.tobytes()
+
+class TestStreamingUpload:
+    def test_chunks_assembled_into_wav(self, pcm_chunk):
+        stream = StreamingUpload(sample_rate=16000)
+        try:
+            stream.append(0, pcm_chunk)
+            stream.append(1, pcm_chunk)
+            path = stream.finish()
+            
+            with wave.open(path, 'rb') as wf:
+                assert wf.getnchannels() == 1
+                assert wf.getsampwidth() == 2
+                assert wf.getframerate() == 16000
+                assert wf.readframes(wf.getnframes()) == pcm_chunk * 2
+        finally:
+            stream.discard()
+        assert not Path(stream.path).exists()
+
+    def test_flac_chunks_decoded(self, pcm_chunk):
+        flac = encode_audio(np.frombuffer(pcm_chunk, dtype=np.int16), "flac")
+        stream = StreamingUpload(encoding="flac")
+        try:
+            stream.append(0, flac)
+            stream.append(1, flac)
+            assert stream.bytes_received == 2 * len(flac)
+            assert stream.pcm_bytes == 2 * len(pcm_chunk)
+            
+            path = stream.finish()
+            # Sent to Whisper as FLAC, like a /process-voice upload
+            assert path.endswith(".flac")
+            assert decode_to_pcm(Path(path).read_bytes(), fmt="flac").tobytes() == pcm_chunk * 2
+        finally:
+            stream.discard()
+        assert not Path(stream.path).exists()
+
+    def test_unknown_encoding(self):
+        with pytest.raises(StreamError):
+            StreamingUpload(encoding="mp3")
+
+    def test_out_of_order_chunk_rejected(self, pcm_chunk):
+        stream = StreamingUpload()
+        try:
+            with pytest.raises(StreamError):
+                stream.append(1, pcm_chunk)
+        finally:
+            stream.discard()
+
+    def test_size_limit(self, pcm_chunk):
+        stream = StreamingUpload(sample_rate=100, max_seconds=1)
+        try:
+            with pytest.raises(StreamError):
+                stream.append(0, pcm_chunk)
+        finally:
+            stream.discard()
+
+    def test_append_after_finish(self, pcm_chunk):
+        stream = StreamingUpload()
+        stream.finish()
+        try:
+            with pytest.raises(StreamError):
+                stream.append(0, pcm_chunk)
+        finally:
+            stream.discard()
+
+class TestStreamRegistry:
+    def test_open_get_pop(self):
+        registry = StreamRegistry()
+        stream = registry.open()
+        assert registry.get(stream.id) is stream
+        assert registry.pop(stream.id) is stream
+        assert registry.get(stream.id) is None
+        stream.discard()
+
+    def test_expire_idle_streams(self):
+        registry = StreamRegistry(idle_timeout=0)
+        stream = registry.open()
+        stream.last_activity -= 1
+        registry.expire()
+        assert registry.get(stream.id) is None
+        assert not Path(stream.path).exists()
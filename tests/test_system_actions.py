@@ -61,6 +61,14 @@ class TestSystemActionHandler:
             # Restore original home directory function
             Path.home = original_home
 
+    def test_notes_in_same_second_kept(self, handler, temp_dir, monkeypatch):
+        monkeypatch.setattr(Path, "home", lambda: temp_dir)
+        first = handler.create_note("alpha")
+        second = handler.create_note("beta")
+        assert first != second
+        assert first.read_text() == "alpha"
+        assert second.read_text() == "beta"
+
     def test_create_note_with_filename(self, handler, temp_dir):
         # Temporarily override home directory for testing
         original_home = Path.home
@@ -78,4 +86,68 @@ class TestSystemActionHandler:
             
         finally:
             # Restore original home directory function
-            Path.home = original_home 
\ No newline at end of file
+            Path.home = original_home 
+
+class TestContentSearch:
+    @pytest.fixture
+    def documents(self, temp_dir):
+        (temp_dir / "notes.txt").write_text("Budget meeting moved. The budget is due Friday. BUDGET!")
+        (temp_dir / "plan.md").write_text("Quarterly budget draft")
+        (temp_dir / "todo.txt").write_text("buy milk")
+        (temp_dir / "image.bin").write_bytes(b"\x00\x01budget\x00")
+        (temp_dir / "photo.png").write_bytes(b"budget")
+        (temp_dir / ".hidden").mkdir()
+        (temp_dir / ".hidden" / "secret.txt").write_text("budget")
+        (temp_dir / "sub").mkdir()
+        (temp_dir / "sub" / "budget_2024.txt").write_text("numbers for the budget")
+        return temp_dir
+
+    def test_content_search_ranks_matches(self, handler, documents):
+        results = handler.search_files("budget", documents, content=True)
+        names = [r.name for r in results]
+        # Name match ranks first, then the file with most occurrences
+        assert names == ["budget_2024.txt", "notes.txt", "plan.md"]
+
+    def test_skips_binary_hidden_and_oversized(self, documents):
+        from src.core.file_search import search_contents, walk_files
+        (documents / "big.txt").write_text("budget " * 1000)
+        hits = search_contents("budget", walk_files(documents), max_bytes=1024)
+        names = {path.name for path, _ in hits}
+        assert names == {"budget_2024.txt", "notes.txt", "plan.md"}
+
+    def test_mixed_case_matches(self, handler, temp_dir):
+        (temp_dir / "network.txt").write_text("The WiFi password is on the router")
+        (temp_dir / "phone.txt").write_text("iPhone backup codes")
+        assert [r.name for r in handler.search_files("wifi", temp_dir, content=True)] == ["network.txt"]
+        assert [r.name for r in handler.search_files("IPHONE", temp_dir, content=True)] == ["phone.txt"]
+
+    def test_concurrent_searches_share_one_pool(self, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.core import file_search
+        created = []
+        monkeypatch.setattr(file_search, "ProcessPoolExecutor", lambda max_workers: created.append(1) or object())
+        monkeypatch.setattr(file_search, "_pool", None)
+        with ThreadPoolExecutor(8) as threads:
+            pools = list(threads.map(lambda _: file_search._get_pool(), range(8)))
+        assert len(created) == 1
+        assert all(pool is pools[0] for pool in pools)
+
+    def test_multi_word_query_needs_every_word(self, handler, documents):
+        results = handler.search_files("budget draft", documents, content=True)
+        assert [r.name for r in results] == ["plan.md"]
+
+    def test_parallel_scan_matches_serial(self, documents):
+        from src.core import file_search
+        for i in range(file_search.PARALLEL_THRESHOLD):
+            (documents / f"filler{i}.txt").write_text("nothing here")
+        (documents / "late.txt").write_text("budget")
+        try:
+            hits = file_search.search_contents("budget", file_search.walk_files(documents), limit=20)
+        finally:
+            file_search.shutdown()
+        assert {path.name for path, _ in hits} == {"budget_2024.txt", "notes.txt", "plan.md", "late.txt"}
+
+    def test_limit(self, handler, temp_dir):
+        for i in range(15):
+            (temp_dir / f"doc{i}.txt").write_text("budget")
+        assert len(handler.search_files("budget", temp_dir, content=True)) == 10
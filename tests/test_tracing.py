@@ -0,0 +1,206 @@
+import pytest
+import asyncio
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.tracing import TracingMiddleware
+from src.core.tracing import (
+    JSONLExporter,
+    Tracer,
+    add_attributes,
+    format_traceparent,
+    load_trace,
+    parse_traceparent,
+    render_waterfall,
+)
+from src.frontend.tracing import ClientTrace
+
+@pytest.fixture
+def trace_file(tmp_path):
+    return tmp_path / "traces.jsonl"
+
+@pytest.fixture
+def exporter(trace_file):
+    return JSONLExporter(str(trace_file))
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(exporter)
+
+def read_spans(exporter, trace_file):
+    exporter.flush()
+    return [json.loads(line) for line in trace_file.read_text().splitlines()]
+
+class TestTraceparent:
+    def test_round_trip(self):
+        header = format_traceparent("a" * 32, "b" * 16)
+        assert parse_traceparent(header) == ("a" * 32, "b" * 16)
+
+    def test_invalid(self):
+        assert parse_traceparent(None) is None
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent(format_traceparent("0" * 32, "b" * 16)) is None
+
+class TestTracer:
+    def test_nested_spans_share_trace(self, tracer, exporter, trace_file):
+        with tracer.span("request") as root:
+            with tracer.span("stage") as child:
+                add_attributes(model="tiny")
+        spans = {span["name"]: span for span in read_spans(exporter, trace_file)}
+        assert spans["stage"]["trace_id"] == root.trace_id
+        assert spans["stage"]["parent_id"] == root.span_id
+        assert spans["stage"]["attributes"] == {"model": "tiny"}
+        assert spans["request"]["parent_id"] is None
+        assert child.end >= child.start
+
+    def test_continues_incoming_trace(self, tracer):
+        with tracer.span("request", traceparent=format_traceparent("c" * 32, "d" * 16)) as span:
+            pass
+        assert span.trace_id == "c" * 32
+        assert span.parent_id == "d" * 16
+
+    def test_error_status(self, tracer, exporter, trace_file):
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        [span] = read_spans(exporter, trace_file)
+        assert span["status"] == "error"
+        assert "boom" in span["attributes"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_traced_functions(self, tracer, exporter, trace_file):
+        @tracer.traced("sync.work")
+        def work():
+            return 1
+
+        @tracer.traced("async.work")
+        async def async_work():
+            await asyncio.sleep(0)
+            return work() + 1
+
+        with tracer.span("request"):
+            assert await async_work() == 2
+        spans = {span["name"]: span for span in read_spans(exporter, trace_file)}
+        assert spans["sync.work"]["parent_id"] == spans["async.work"]["span_id"]
+        assert spans["async.work"]["parent_id"] == spans["request"]["span_id"]
+
+    def test_disabled_tracer_still_runs_block(self):
+        with Tracer(None).span("anything") as span:
+            add_attributes(ignored=True)
+        assert span.attributes == {"ignored": True}
+
+class TestWaterfall:
+    def test_load_and_render(self, tracer, exporter, trace_file):
+        with tracer.span("POST /voice/process-voice") as root:
+            with tracer.span("transcription"):
+                pass
+            with tracer.span("execution"):
+                pass
+        exporter.flush()
+        with tracer.span("unrelated"):
+            pass
+        exporter.flush()
+
+        spans = load_trace(str(trace_file), root.trace_id[:8])
+        assert {span["name"] for span in spans} == {"POST /voice/process-voice", "transcription", "execution"}
+        lines = render_waterfall(spans).splitlines()
+        assert lines[0].startswith(f"trace {root.trace_id}")
+        assert "api:POST /voice/process-voice" in lines[1]
+        assert lines[2].startswith("  api:transcription")
+        assert lines[3].startswith("  api:execution")
+
+    def test_latest_trace(self, tracer, exporter, trace_file):
+        with tracer.span("first"):
+            pass
+        with tracer.span("second") as latest:
+            pass
+        exporter.flush()
+        assert [span["name"] for span in load_trace(str(trace_file))] == ["second"]
+        assert load_trace(str(trace_file))[0]["trace_id"] == latest.trace_id
+
+    def test_file_rotated_at_max_bytes(self, trace_file):
+        exporter = JSONLExporter(str(trace_file), max_bytes=1)
+        tracer = Tracer(exporter)
+        with tracer.span("first") as first:
+            with tracer.span("child"):
+                pass
+        exporter.flush()
+        with tracer.span("second") as second:
+            pass
+        exporter.flush()
+        with tracer.span("third"):
+            pass
+        exporter.flush()
+        # Only the current file and one rotated file are kept
+        assert sorted(p.name for p in trace_file.parent.iterdir()) == ["traces.jsonl", "traces.jsonl.1"]
+        assert load_trace(str(trace_file), first.trace_id) == []
+        assert [span["name"] for span in load_trace(str(trace_file), second.trace_id)] == ["second"]
+        assert [span["name"] for span in load_trace(str(trace_file))] == ["third"]
+
+class TestTracingMiddleware:
+    def test_request_joins_client_trace(self, tracer, exporter, trace_file):
+        app = FastAPI()
+
+        @app.get("/work")
+        async def work():
+            with tracer.span("stage"):
+                return {"ok": True}
+
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+        client_trace = ClientTrace()
+        response = TestClient(app).get("/work", headers=client_trace.headers())
+
+        assert response.status_code == 200
+        assert parse_traceparent(response.headers["traceparent"])[0] == client_trace.trace_id
+        spans = {span["name"]: span for span in read_spans(exporter, trace_file)}
+        assert spans["GET /work"]["parent_id"] == client_trace.root_id
+        assert spans["GET /work"]["attributes"]["http.status_code"] == 200
+        assert spans["stage"]["parent_id"] == spans["GET /work"]["span_id"]
+
+class FakeSession:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        self.posts.append((url, json))
+
+class TestClientTrace:
+    def test_spans_submitted_with_root(self):
+        trace = ClientTrace("voice_command")
+        trace.add_span("capture", 1.0, 2.0, audio_seconds=1.0)
+        with trace.span("upload") as headers:
+            trace_id, parent_id = parse_traceparent(headers["traceparent"])
+        assert trace_id == trace.trace_id
+
+        session = FakeSession()
+        trace.finish(session, "http://api")
+        url, body = session.posts[0]
+        assert url == "http://api/traces"
+        spans = {span["name"]: span for span in body["spans"]}
+        assert set(spans) == {"capture", "upload", "voice_command"}
+        assert spans["upload"]["span_id"] == parent_id
+        assert spans["upload"]["parent_id"] == trace.root_id
+        assert spans["voice_command"]["parent_id"] is None
+
+class TestTracesRoute:
+    def test_accepts_frontend_spans(self, monkeypatch, tracer, exporter, trace_file):
+        from src.api.routes import traces
+        monkeypatch.setattr(traces, "tracer", tracer)
+        app = FastAPI()
+        app.include_router(traces.router, prefix="/traces")
+        client_trace = ClientTrace()
+        client_trace.add_span("capture", 1.0, 1.5)
+        session = TestClient(app)
+        client_trace.finish(session, "")
+
+        spans = read_spans(exporter, trace_file)
+        assert {span["name"] for span in spans} == {"capture", "command"}
+        assert all(span["service"] == "frontend" for span in spans)
+        assert [span["duration_ms"] for span in spans if span["name"] == "capture"] == [500.0]
+
+    def test_rejects_malformed_ids(self):
+        from src.api.routes import traces
+        app = FastAPI()
+        app.include_router(traces.router, prefix="/traces")
+        span = {"trace_id": "xyz", "span_id": "1" * 16, "name": "capture", "start": 0, "end": 1}
+        assert TestClient(app).post("/traces", json={"spans": [span]}).status_code == 422
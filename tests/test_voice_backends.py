@@ -0,0 +1,224 @@
+import pytest
+import logging
+import wave
+import numpy as np
+from src.frontend.audio import encode_audio
+from src.voice import backends
+from src.voice.backends import STTBackend, Transcription, create_backend, summarize_segments
+from src.voice.cascade import ModelCascade
+from src.voice.codecs import load_audio
+from src.voice.profiles import PROFILES, get_profile
+from src.voice.whisper_handler import WhisperSTT
+
+class FakeBackend(STTBackend):
+    name = "fake"
+    
+    def __init__(self, model_name, **kwargs):
+        self.model = model_name
+        self.kwargs = kwargs
+    
+    def transcribe(self, audio, **options):
+        return Transcription(text=f"heard {audio}")
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, "fake", FakeBackend)
+    return FakeBackend
+
+def test_summarize_segments():
+    segments = [
+        {"start": 0.0, "end": 3.0, "avg_logprob": -0.2, "no_speech_prob": 0.1, "compression_ratio": 1.2},
+        {"start": 3.0, "end": 4.0, "avg_logprob": -1.0, "no_speech_prob": 0.5, "compression_ratio": 2.8},
+    ]
+    result = summarize_segments(" open chrome ", segments, "en")
+    assert result.text == "open chrome"
+    assert result.avg_logprob == pytest.approx(-0.4)
+    assert result.no_speech_prob == pytest.approx(0.2)
+    assert result.compression_ratio == 2.8
+    assert result.language == "en"
+
+def test_summarize_no_segments():
+    result = summarize_segments("", [])
+    assert result.text == ""
+    assert result.avg_logprob is None
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_backend("nope", "base.en")
+
+class TestWhisperSTTBackendSelection:
+    def test_backend_argument(self, fake_backend):
+        stt = WhisperSTT(model_name="tiny.en", backend="fake", compute_type="int8")
+        assert isinstance(stt.backend, fake_backend)
+        assert stt.model == "tiny.en"
+        assert stt.backend.kwargs["compute_type"] == "int8"
+
+    def test_backend_from_environment(self, fake_backend, monkeypatch):
+        monkeypatch.setenv("CLAWD_STT_BACKEND", "fake")
+        monkeypatch.setenv("CLAWD_STT_MODEL", "small.en")
+        stt = WhisperSTT()
+        assert isinstance(stt.backend, fake_backend)
+        assert stt.model == "small.en"
+
+    @pytest.mark.asyncio
+    async def test_transcribe_uses_backend(self, fake_backend):
+        stt = WhisperSTT(backend="fake")
+        assert await stt.transcribe("command.wav") == "heard command.wav"
+
+class ScriptedBackend(STTBackend):
+    name = "scripted"
+    
+    def __init__(self, model_name, results=None, **kwargs):
+        self.model = model_name
+        self.results = results or {}
+        self.calls = 0
+    
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return self.results.get(audio, Transcription(text=f"{self.model} heard {audio}"))
+
+class TestModelCascade:
+    @pytest.fixture
+    def cascade(self):
+        fast = ScriptedBackend("tiny.en", {
+            "clear.wav": Transcription("open firefox", avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=1.1),
+            "mumbled.wav": Transcription("open fire", avg_logprob=-1.4, no_speech_prob=0.02, compression_ratio=1.1),
+            "noise.wav": Transcription("you", avg_logprob=-0.5, no_speech_prob=0.9, compression_ratio=1.0),
+            "rambling.wav": Transcription("um so yeah", avg_logprob=-0.3, no_speech_prob=0.05, compression_ratio=1.2),
+        })
+        accurate = ScriptedBackend("base.en")
+        return ModelCascade(fast, accurate)
+
+    def test_confident_result_not_escalated(self, cascade):
+        assert cascade.transcribe("clear.wav").text == "open firefox"
+        assert cascade.accurate.calls == 0
+        assert cascade.stats.escalations == 0
+
+    @pytest.mark.parametrize("audio,reason", [
+        ("mumbled.wav", "avg_logprob"),
+        ("noise.wav", "no_speech_prob"),
+        ("rambling.wav", "no_intent"),
+    ])
+    def test_escalation(self, cascade, audio, reason):
+        assert cascade.transcribe(audio).text == f"base.en heard {audio}"
+        assert cascade.stats.reasons[reason] == 1
+
+    def test_stats(self, cascade):
+        cascade.transcribe("clear.wav")
+        assert cascade.stats.summary()["estimated_saved_seconds"] is None
+        cascade.transcribe("mumbled.wav")
+        cascade.transcribe("clear.wav")
+        summary = cascade.stats.summary()
+        assert summary["requests"] == 3
+        assert summary["escalations"] == 1
+        assert summary["escalation_rate"] == pytest.approx(1 / 3)
+        assert summary["estimated_saved_seconds"] is not None
+
+    def test_logs_each_decision(self, cascade, caplog):
+        with caplog.at_level(logging.INFO, logger="src.voice.cascade"):
+            cascade.transcribe("mumbled.wav")
+        assert "Cascade escalated (avg_logprob), fast " in caplog.text
+        assert "escalated 1/1 (100%)" in caplog.text
+
+    def test_whisper_stt_builds_cascade(self, monkeypatch):
+        monkeypatch.setitem(backends.BACKENDS, "scripted", ScriptedBackend)
+        stt = WhisperSTT(model_name="base.en", backend="scripted", cascade_model="tiny.en")
+        assert isinstance(stt.backend, ModelCascade)
+        assert stt.backend.fast.model == "tiny.en"
+        assert stt.model == "base.en"
+
+def write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+class TestLoadAudio:
+    @pytest.fixture
+    def samples(self):
+        t = np.arange(16000) / 16000
+        return (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+
+    def test_wav_read_with_numpy(self, tmp_path, samples):
+        audio, decoder = load_audio(write_wav(tmp_path / "a.wav", samples))
+        assert decoder == "numpy"
+        assert audio.dtype == np.float32
+        assert np.allclose(audio, samples / 32768.0)
+
+    def test_stereo_wav_mixed_down(self, tmp_path, samples):
+        stereo = np.stack([samples, np.zeros_like(samples)], axis=1).reshape(-1)
+        audio, decoder = load_audio(write_wav(tmp_path / "a.wav", stereo, channels=2))
+        assert decoder == "numpy"
+        assert np.allclose(audio, samples / 65536.0)
+
+    def test_other_rates_resampled_in_process(self, tmp_path):
+        audio, decoder = load_audio(write_wav(tmp_path / "a.wav", np.zeros(44100), rate=44100))
+        assert decoder == "av"
+        assert abs(len(audio) - 16000) < 160
+
+    def test_compressed_decoded_in_process(self, tmp_path, samples):
+        path = tmp_path / "a.flac"
+        path.write_bytes(encode_audio(samples, "flac"))
+        audio, decoder = load_audio(str(path))
+        assert decoder == "av"
+        assert np.allclose(audio, samples / 32768.0)
+
+    def test_undecodable_falls_back_to_path(self, tmp_path):
+        path = tmp_path / "a.ogg"
+        path.write_bytes(b"not audio")
+        assert load_audio(str(path)) == (str(path), "ffmpeg")
+
+    @pytest.mark.asyncio
+    async def test_whisper_stt_passes_array(self, fake_backend, tmp_path, samples):
+        stt = WhisperSTT(backend="fake")
+        received = []
+        stt.backend.transcribe = lambda audio, **options: received.append(audio) or Transcription(text="ok")
+        assert await stt.transcribe(write_wav(tmp_path / "a.wav", samples)) == "ok"
+        assert isinstance(received[0], np.ndarray)
+
+class TestDecodeProfiles:
+    def test_command_profile_is_greedy_english(self):
+        options = get_profile(None).options()
+        assert options["language"] == "en"
+        assert options["beam_size"] == 1
+        assert options["temperature"] == (0.0,)
+        assert options["without_timestamps"] is True
+
+    def test_api_options(self):
+        assert PROFILES["command"].api_options() == {"temperature": 0.0, "language": "en"}
+        assert PROFILES["accurate"].api_options() == {"temperature": 0.0}
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="dictation"):
+            get_profile("fastest")
+
+    def test_unknown_default_rejected(self, fake_backend):
+        with pytest.raises(ValueError):
+            WhisperSTT(backend="fake", profile="fastest")
+
+    @pytest.mark.asyncio
+    async def test_whisper_stt_passes_profile_options(self, fake_backend, monkeypatch, tmp_path):
+        monkeypatch.setenv("CLAWD_STT_PROFILE", "dictation")
+        stt = WhisperSTT(backend="fake")
+        received = []
+        stt.backend.transcribe = lambda audio, cancel_event=None, **options: received.append(options) or Transcription(text="ok")
+        path = write_wav(tmp_path / "a.wav", np.zeros(1600, dtype=np.int16))
+        await stt.transcribe(path)
+        await stt.transcribe(path, profile="command")
+        assert received == [PROFILES["dictation"].options(), PROFILES["command"].options()]
+
+    @pytest.mark.asyncio
+    async def test_api_receives_api_options(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        stt = WhisperSTT(use_api=True)
+        received = []
+
+        async def transcribe(path, **options):
+            received.append(options)
+            return "ok"
+
+        stt.ai_services.transcribe_audio_with_whisper_api = transcribe
+        assert await stt.transcribe("missing.wav", profile="accurate") == "ok"
+        assert received == [{"temperature": 0.0}]